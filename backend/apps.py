@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        # readers don't block the writer and vice versa (the mode is persisted in the db file)
+        cursor.execute('PRAGMA journal_mode=WAL;')
+        # durable with WAL, only the checkpoints are fsynced
+        cursor.execute('PRAGMA synchronous=NORMAL;')
 
 
 class BackendConfig(AppConfig):
     name = 'backend'
     verbose_name = 'Local backend'
+
+    def ready(self):
+        connection_created.connect(set_sqlite_pragmas)
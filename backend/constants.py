@@ -1,5 +1,8 @@
 from utils.enum import ExtendedEnum
 
+
+LOCK_LEASE_DURATION = 30        # secs, a lock which is not renewed or released is free after this
+
 class UserType(ExtendedEnum):
     USER = 'user'
     ADMIN = 'admin'
\ No newline at end of file
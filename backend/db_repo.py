@@ -5,7 +5,6 @@ import os
 
 import sys
 from shared.logging.constants import LoggingType
-from django.core.paginator import Paginator
 
 from shared.logging.logging import AppLogger
 from utils.common_decorators import measure_execution_time
@@ -15,22 +14,38 @@ import sqlite3
 import subprocess
 from typing import List
 import uuid
-from shared.constants import InferenceStatus, InternalFileTag, InternalFileType, SortOrder
-from backend.serializers.dto import  AIModelDto, AppSettingDto, BackupDto, BackupListDto, InferenceLogDto, InternalFileDto, ProjectDto, SettingDto, ShotDto, TimingDto, UserDto
+from shared.constants import InferenceStatus, InternalFileTag, InternalFileType, ProjectChangeType, SortOrder
+from backend.serializers.dto import  AIModelDto, AppSettingDto, BackupDto, BackupListDto, InferenceLogDto, InternalFileDto, ProjectDto, SettingDto, ShotDto, TimingDto, UserDto, get_frame_index_dict, get_index_context, get_shot_index_dict, select_dto_related
 
 from shared.constants import AUTOMATIC_FILE_HOSTING, LOCAL_DATABASE_NAME, SERVER, ServerType
 from shared.file_upload.s3 import upload_file, upload_file_from_obj
 
-from backend.models import AIModel, AIModelParamMap, AppSetting, BackupTiming, InferenceLog, InternalFileObject, Lock, Project, Setting, Shot, Timing, User
+from backend.models import ORDER_KEY_GAP, add_change_events, AIModel, AIModelParamMap, AppSetting, BackupTiming, InferenceLog, InternalFileObject, Lock, Project, ProjectChangeEvent, Setting, Shot, Timing, User, assign_order_keys, get_order_key
 
+from backend.pagination import paginate_queryset
+from backend.uuid_resolver import UUIDResolver
 from backend.serializers.dao import CreateAIModelDao, CreateAIModelParamMapDao, CreateAppSettingDao, CreateFileDao, CreateInferenceLogDao, CreateProjectDao, CreateSettingDao, CreateTimingDao, CreateUserDao, UpdateAIModelDao, UpdateAppSettingDao, UpdateSettingDao
 from shared.constants import InternalResponse
-from django.db.models import F
-from django.db import transaction
+from django.db.models import F, Q
+from django.db import IntegrityError, transaction
+from backend.constants import LOCK_LEASE_DURATION
 
 
 logger = AppLogger()
 
+# uuid fields of the timing, resolved to ids in a single query per model
+TIMING_FK_MODEL_DICT = {
+    'shot_id': Shot,
+    'model_id': AIModel,
+    'source_image_id': InternalFileObject,
+    'mask_id': InternalFileObject,
+    'canny_image_id': InternalFileObject,
+    'primary_image_id': InternalFileObject
+}
+
+def get_invalid_uuid_msg(field):
+    return f'invalid {field[:-3].replace("_", " ")} uuid'
+
 # @measure_execution_time
 class DBRepo:
     _instance = None
@@ -161,7 +176,7 @@ class DBRepo:
 
     # internal file object
     def get_file_from_name(self, name):
-        file = InternalFileObject.objects.filter(name=name, is_disabled=False).first()
+        file = select_dto_related(InternalFileObject.objects.filter(name=name, is_disabled=False), InternalFileDto).first()
         if not file:
             return InternalResponse({}, 'file not found', False)
         
@@ -172,7 +187,7 @@ class DBRepo:
         return InternalResponse(payload, 'file found', True)
 
     def get_file_from_uuid(self, uuid):
-        file = InternalFileObject.objects.filter(uuid=uuid, is_disabled=False).first()
+        file = select_dto_related(InternalFileObject.objects.filter(uuid=uuid, is_disabled=False), InternalFileDto).first()
         if not file:
             return InternalResponse({}, 'file not found', False)
         
@@ -186,6 +201,7 @@ class DBRepo:
     # or else entire list will be fetched. will standardise this later
     def get_all_file_list(self, **kwargs):
         kwargs['is_disabled'] = False
+        fields = kwargs.pop('fields', None)     # projection of the output (check ProjectedDtoMixin)
 
         if 'project_id' in kwargs and kwargs['project_id']:
             project = Project.objects.filter(uuid=kwargs['project_id'], is_disabled=False).first()
@@ -194,57 +210,63 @@ class DBRepo:
 
             kwargs['project_id'] = project.id
 
-        if 'page' in kwargs and kwargs['page']:
-            page = kwargs['page']
-            del kwargs['page']
+        # paginated using the cursor (next_cursor of the previous page) if present, otherwise using the page number
+        if ('page' in kwargs and kwargs['page']) or ('cursor' in kwargs and kwargs['cursor']):
+            page = kwargs.pop('page', None) or 1
+            cursor = kwargs.pop('cursor', None)
             data_per_page = kwargs['data_per_page']
             del kwargs['data_per_page']
-            sort_order = kwargs['sort_order'] if 'sort_order' in kwargs else None
-            del kwargs['sort_order']
+            sort_order = kwargs.pop('sort_order', None)
+            include_count = kwargs.pop('include_count', True)
             
             shot_uuid_list = []
             if 'shot_uuid_list' in kwargs:
                 shot_uuid_list = kwargs['shot_uuid_list']
                 del kwargs['shot_uuid_list']
 
-            file_list = InternalFileObject.objects.filter(**kwargs).all()
+            # created_on is read for the cursor
+            fields = list(set(fields) | {'created_on'}) if fields is not None else None
+            file_list = select_dto_related(InternalFileObject.objects.filter(**kwargs), InternalFileDto, fields)
             
             if shot_uuid_list and len(shot_uuid_list):
                 file_list = file_list.filter(shot_uuid__in=shot_uuid_list)
 
-            if sort_order:
-                if sort_order == SortOrder.DESCENDING.value:
-                    file_list = file_list.order_by('-created_on')
-
-            paginator = Paginator(file_list, data_per_page)
-            if page > paginator.num_pages or page < 1:
+            payload = paginate_queryset(file_list, data_per_page, sort_order, cursor, page, include_count)
+            if not payload:
                 return InternalResponse({}, "invalid page number", False)
             
-            payload = {
-                "data_per_page": data_per_page,
-                "page": page,
-                "total_pages": paginator.num_pages,
-                "count": paginator.count,
-                "data": InternalFileDto(
-                    paginator.page(page), many=True
-                ).data,
-            }
+            payload['data'] = InternalFileDto(payload['data'], many=True, fields=fields).data
         else:
-            file_list = InternalFileObject.objects.filter(**kwargs).all()
+            kwargs.pop('cursor', None)
+            kwargs.pop('include_count', None)
+            file_list = select_dto_related(InternalFileObject.objects.filter(**kwargs), InternalFileDto, fields)
 
             if 'sort_order' in kwargs:
                 if kwargs['sort_order'] == SortOrder.DESCENDING.value:
                     file_list = file_list.order_by('-created_on')
             
             payload = {
-                'data': InternalFileDto(file_list, many=True).data
+                'data': InternalFileDto(file_list, many=True, fields=fields).data
             }
 
         return InternalResponse(payload, 'file found', True)
     
-    def get_file_list_from_log_uuid_list(self, log_uuid_list):
-        inference_log_list = InferenceLog.objects.filter(uuid__in=log_uuid_list, is_disabled=False).all()
-        file_list = InternalFileObject.objects.filter(inference_log__uuid__in=[str(log.uuid) for log in inference_log_list], is_disabled=False).all()
+    def get_file_list_from_log_uuid_list(self, log_uuid_list, fields=None):
+        file_list = InternalFileObject.objects.filter(inference_log__uuid__in=log_uuid_list, inference_log__is_disabled=False, is_disabled=False)
+        file_list = select_dto_related(file_list, InternalFileDto, fields)
+        payload = {
+            'data': InternalFileDto(file_list, many=True, fields=fields).data
+        }
+
+        return InternalResponse(payload, 'file list fetched successfully', True)
+    
+    # files generated from the source files (previews, posters..), of the given tags (all if None)
+    def get_derived_file_list(self, source_file_uuid_list, tag_list=None):
+        file_list = InternalFileObject.objects.filter(source_file_uuid__in=[str(u) for u in source_file_uuid_list], is_disabled=False)
+        if tag_list:
+            file_list = file_list.filter(tag__in=tag_list)
+
+        file_list = select_dto_related(file_list, InternalFileDto)
         payload = {
             'data': InternalFileDto(file_list, many=True).data
         }
@@ -299,25 +321,16 @@ class DBRepo:
             
             data._data['hosted_url'] = hosted_url
 
-        if 'project_id' in kwargs and kwargs['project_id']:
-            project = Project.objects.filter(uuid=kwargs['project_id'], is_disabled=False).first()
-            if not project:
-                return InternalResponse({}, 'invalid project', False)
-            
-            data._data['project_id'] = project.id
-
-        if 'inference_log_id' in kwargs and kwargs['inference_log_id']:
-            inference_log = InferenceLog.objects.filter(uuid=kwargs['inference_log_id'], is_disabled=False).first()
-            if not inference_log:
-                return InternalResponse({}, 'invalid log id', False)
-            
-            data._data['inference_log_id'] = inference_log.id
+        invalid_field = UUIDResolver().resolve([data._data], {'project_id': Project, 'inference_log_id': InferenceLog})
+        if invalid_field:
+            return InternalResponse({}, 'invalid project' if invalid_field == 'project_id' else 'invalid log id', False)
         
 
         if not data.is_valid():
             return InternalResponse({}, data.errors, False)
         
         file = InternalFileObject.objects.create(**data.data)
+        file = select_dto_related(InternalFileObject.objects.filter(id=file.id), InternalFileDto).first()
         
         payload = {
             'data': InternalFileDto(file).data
@@ -335,8 +348,10 @@ class DBRepo:
         return InternalResponse({}, 'file deleted successfully', True)
     
     def get_image_list_from_uuid_list(self, uuid_list, file_type=InternalFileType.IMAGE.value):
-        file_list = InternalFileObject.objects.filter(uuid__in=uuid_list, \
-                                                      is_disabled=False, type=file_type).all()
+        file_list = InternalFileObject.objects.filter(uuid__in=uuid_list, is_disabled=False)
+        if file_type:
+            file_list = file_list.filter(type=file_type)
+        file_list = select_dto_related(file_list, InternalFileDto)
         
         if file_list and len(file_list):
             uuid_dict = {str(obj.uuid): obj for obj in file_list}
@@ -406,10 +421,12 @@ class DBRepo:
     
     def update_temp_gallery_images(self, project_uuid):
         project = Project.objects.filter(uuid=project_uuid, is_disabled=False).first()
-        InternalFileObject.objects.filter(
-            tag=InternalFileTag.TEMP_GALLERY_IMAGE.value, 
-            project_id=project.id,
-            is_disabled=False).update(tag=InternalFileTag.GALLERY_IMAGE.value)
+        with transaction.atomic():
+            InternalFileObject.objects.filter(
+                tag=InternalFileTag.TEMP_GALLERY_IMAGE.value, 
+                project_id=project.id,
+                is_disabled=False).update(tag=InternalFileTag.GALLERY_IMAGE.value, updated_on=datetime.datetime.now())
+            add_change_events(project.id, [(ProjectChangeType.GALLERY_UPDATE.value, "")])
 
         return True
 
@@ -600,7 +617,7 @@ class DBRepo:
 
     # inference log
     def get_inference_log_from_uuid(self, uuid):
-        log = InferenceLog.objects.filter(uuid=uuid, is_disabled=False).first()
+        log = select_dto_related(InferenceLog.objects.filter(uuid=uuid, is_disabled=False), InferenceLogDto).first()
         if not log:
             return InternalResponse({}, 'invalid inference log uuid', False)
         
@@ -610,7 +627,8 @@ class DBRepo:
         
         return InternalResponse(payload, 'inference log fetched', True)
     
-    def get_all_inference_log_list(self, project_id=None, page=1, data_per_page=5, status_list=None, exclude_model_list=None, model_name_list=""):
+    def get_all_inference_log_list(self, project_id=None, page=1, data_per_page=5, status_list=None, exclude_model_list=None, model_name_list="", \
+                                   cursor=None, include_count=True, fields=None):
         if project_id:
             project = Project.objects.filter(uuid=project_id, is_disabled=False).first()
             log_list = InferenceLog.objects.filter(project_id=project.id, is_disabled=False).order_by('-created_on').all()
@@ -626,20 +644,14 @@ class DBRepo:
             log_list = log_list.filter(model_name__in=model_name_list)
         
         log_list = log_list.exclude(model_id=None)       # hackish sol to exclude non-image/video logs
+        fields = list(set(fields) | {'created_on'}) if fields is not None else None
+        log_list = select_dto_related(log_list, InferenceLogDto, fields)
 
-        paginator = Paginator(log_list, data_per_page)
-        if page > paginator.num_pages or page < 1:
+        payload = paginate_queryset(log_list, data_per_page, SortOrder.DESCENDING.value, cursor, page, include_count)
+        if not payload:
             return InternalResponse({}, "invalid page number", False)
         
-        payload = {
-            "data_per_page": data_per_page,
-            "page": page,
-            "total_pages": paginator.num_pages,
-            "count": paginator.count,
-            "data": InferenceLogDto(
-                paginator.page(page), many=True
-            ).data,
-        }
+        payload['data'] = InferenceLogDto(payload['data'], many=True, fields=fields).data
 
         return InternalResponse(payload, 'inference log list fetched', True)
     
@@ -648,22 +660,13 @@ class DBRepo:
         if not attributes.is_valid():
             return InternalResponse({}, attributes.errors, False)
         
-        if 'project_id' in attributes.data and attributes.data['project_id']:
-            project = Project.objects.filter(uuid=attributes.data['project_id'], is_disabled=False).first()
-            if not project:
-                return InternalResponse({}, 'invalid project', False)
-            
-            attributes._data['project_id'] = project.id
-        
-        if 'model_id' in attributes.data and attributes.data['model_id']:
-            model = AIModel.objects.filter(uuid=attributes.data['model_id'], is_disabled=False).first()
-            if not model:
-                return InternalResponse({}, 'invalid model', False)
-            
-            attributes._data['model_id'] = model.id
-
-        log = InferenceLog.objects.create(**attributes.data)
+        log_data = dict(attributes.data)
+        invalid_field = UUIDResolver().resolve([log_data], {'project_id': Project, 'model_id': AIModel})
+        if invalid_field:
+            return InternalResponse({}, 'invalid project' if invalid_field == 'project_id' else 'invalid model', False)
 
+        log = InferenceLog.objects.create(**log_data)
+        log = select_dto_related(InferenceLog.objects.filter(id=log.id), InferenceLogDto).first()
         
         payload = {
             'data': InferenceLogDto(log).data
@@ -743,12 +746,12 @@ class DBRepo:
 
     # timing
     def get_timing_from_uuid(self, uuid):
-        timing = Timing.objects.filter(uuid=uuid, is_disabled=False).first()
+        timing = select_dto_related(Timing.objects.filter(uuid=uuid, is_disabled=False), TimingDto).first()
         if not timing:
             return InternalResponse({'data': None}, 'invalid timing uuid', False)
         
         payload = {
-            'data': TimingDto(timing).data
+            'data': TimingDto(timing, context=get_index_context([timing])).data
         }
         
         return InternalResponse(payload, 'timing fetched', True)
@@ -756,10 +759,13 @@ class DBRepo:
     def get_timing_from_frame_number(self, shot_uuid, frame_number):
         shot: Shot = Shot.objects.filter(uuid=shot_uuid, is_disabled=False).first()
         if shot:
-            timing = Timing.objects.filter(aux_frame_index=frame_number, shot_id=shot.id, is_disabled=False).first()
+            timing_list = select_dto_related(Timing.objects.filter(shot_id=shot.id, is_disabled=False), TimingDto)\
+                .order_by('frame_order', 'id')[frame_number:frame_number + 1] if frame_number >= 0 else []
+            timing = timing_list[0] if len(timing_list) else None
             if timing:
+                context = {**get_index_context(shot_list=[shot]), 'frame_index_dict': {timing.uuid: frame_number}}
                 payload = {
-                    'data': TimingDto(timing).data
+                    'data': TimingDto(timing, context=context).data
                 }
                 
                 return InternalResponse(payload, 'timing fetched', True)
@@ -777,16 +783,17 @@ class DBRepo:
         
         return InternalResponse(payload, 'timing fetched', True)
     
-    # this is based on the aux_frame_index and not the order in the db
+    # this is based on the frame order and not the order in the db
     def get_next_timing(self, uuid):
         timing = Timing.objects.filter(uuid=uuid, is_disabled=False).first()
         if not timing:
             return InternalResponse({}, 'invalid timing uuid', False)
         
-        next_timing = Timing.objects.filter(aux_frame_index=timing.aux_frame_index + 1, shot_id=timing.shot_id, is_disabled=False).order_by('aux_frame_index').first()
+        next_timing = select_dto_related(Timing.objects.filter(frame_order__gt=timing.frame_order, shot_id=timing.shot_id, is_disabled=False), TimingDto)\
+            .order_by('frame_order', 'id').first()
         
         payload = {
-            'data': TimingDto(next_timing).data if next_timing else None
+            'data': TimingDto(next_timing, context=get_index_context([next_timing])).data if next_timing else None
         }
         
         return InternalResponse(payload, 'timing fetched', True)
@@ -796,10 +803,11 @@ class DBRepo:
         if not timing:
             return InternalResponse({}, 'invalid timing uuid', False)
         
-        prev_timing = Timing.objects.filter(aux_frame_index=timing.aux_frame_index - 1, shot_id=timing.shot_id, is_disabled=False).order_by('aux_frame_index').first()
+        prev_timing = select_dto_related(Timing.objects.filter(frame_order__lt=timing.frame_order, shot_id=timing.shot_id, is_disabled=False), TimingDto)\
+            .order_by('-frame_order', '-id').first()
         
         payload = {
-            'data': TimingDto(prev_timing).data if prev_timing else None
+            'data': TimingDto(prev_timing, context=get_index_context([prev_timing])).data if prev_timing else None
         }
         
         return InternalResponse(payload, 'timing fetched', True)
@@ -817,13 +825,16 @@ class DBRepo:
             if not project:
                 return InternalResponse({}, 'invalid project', False)
             
-            shot_list = Shot.objects.filter(project_id=project.id, is_disabled=False).all()
-            timing_list = Timing.objects.filter(shot_id__in=[s.id for s in shot_list], is_disabled=False).order_by('aux_frame_index').all()
+            timing_list = Timing.objects.filter(shot__project_id=project.id, shot__is_disabled=False, is_disabled=False).order_by('frame_order', 'id')
+            context = {'shot_index_dict': get_shot_index_dict(Shot.objects.filter(project_id=project.id, is_disabled=False))}
         else:
-            timing_list = Timing.objects.filter(is_disabled=False).order_by('aux_frame_index').all()
+            timing_list = Timing.objects.filter(is_disabled=False).order_by('frame_order', 'id')
+            context = {'shot_index_dict': get_shot_index_dict(Shot.objects.filter(is_disabled=False))}
         
+        timing_list = select_dto_related(timing_list, TimingDto)
+        context['frame_index_dict'] = get_frame_index_dict(timing_list)
         payload = {
-            'data': TimingDto(timing_list, many=True).data
+            'data': TimingDto(timing_list, context=context, many=True).data
         }
         
         return InternalResponse(payload, 'timing list fetched', True)
@@ -834,10 +845,10 @@ class DBRepo:
         if not shot:
             return InternalResponse({}, 'invalid shot', False)
         
-        timing_list = Timing.objects.filter(shot_id=shot.id, is_disabled=False).order_by('aux_frame_index').all()
-        
+        timing_list = select_dto_related(Timing.objects.filter(shot_id=shot.id, is_disabled=False), TimingDto).order_by('frame_order', 'id')
+        context = {**get_index_context(shot_list=[shot]), 'frame_index_dict': get_frame_index_dict(timing_list)}
         payload = {
-            'data': TimingDto(timing_list, many=True).data
+            'data': TimingDto(timing_list, context=context, many=True).data
         }
         
         return InternalResponse(payload, 'timing list fetched', True)
@@ -847,64 +858,99 @@ class DBRepo:
         if not attributes.is_valid():
             return InternalResponse({}, attributes.errors, False)
         
-        print(attributes.data)
+        timing_data = dict(attributes.data)
+        invalid_field = UUIDResolver().resolve([timing_data], TIMING_FK_MODEL_DICT)
+        if invalid_field:
+            return InternalResponse({}, get_invalid_uuid_msg(invalid_field), False)
         
-        if 'shot_id' in attributes.data and attributes.data['shot_id']:
-            shot = Shot.objects.filter(uuid=attributes.data['shot_id'], is_disabled=False).first()
-            if not shot:
-                return InternalResponse({}, 'invalid shot', False)
-            
-            attributes._data['shot_id'] = shot.id
+        # placing the frame in the gap at aux_frame_index (at the end by default)
+        timing_data['frame_order'] = get_order_key(Timing.objects.filter(shot_id=timing_data.get('shot_id', None), is_disabled=False), \
+                                                   'frame_order', timing_data.pop('aux_frame_index', None))
         
-        if 'aux_frame_index' not in attributes.data or attributes.data['aux_frame_index'] == None: 
-            attributes._data['aux_frame_index'] = Timing.objects.filter(shot_id=attributes.data['shot_id'], is_disabled=False).count()
+        timing = Timing.objects.create(**timing_data)
+        timing = select_dto_related(Timing.objects.filter(id=timing.id), TimingDto).first()
+        payload = {
+            'data': TimingDto(timing, context=get_index_context([timing])).data
+        }
         
-        if 'model_id' in attributes.data:
-            if attributes.data['model_id'] != None:
-                model: AIModel = AIModel.objects.filter(uuid=attributes.data['model_id'], is_disabled=False).first()
-                if not model:
-                    return InternalResponse({}, 'invalid model uuid', False)
-                
-                attributes._data['model_id'] = model.id
-
-        if 'source_image_id' in attributes.data:
-            if attributes.data['source_image_id'] != None:
-                source_image: InternalFileObject = InternalFileObject.objects.filter(uuid=attributes.data['source_image_id'], is_disabled=False).first()
-                if not source_image:
-                    return InternalResponse({}, 'invalid source image uuid', False)
-                
-                attributes._data['source_image_id'] = source_image.id
-
-        if 'mask_id' in attributes.data:
-            if attributes.data['mask_id'] != None:
-                mask: InternalFileObject = InternalFileObject.objects.filter(uuid=attributes.data['mask_id'], is_disabled=False).first()
-                if not mask:
-                    return InternalResponse({}, 'invalid mask uuid', False)
-                
-                attributes._data['mask_id'] = mask.id
-
-        if 'canny_image_id' in attributes.data:
-            if attributes.data['canny_image_id'] != None:
-                canny_image: InternalFileObject = InternalFileObject.objects.filter(uuid=attributes.data['canny_image_id'], is_disabled=False).first()
-                if not canny_image:
-                    return InternalResponse({}, 'invalid canny image uuid', False)
-                
-                attributes._data['canny_image_id'] = canny_image.id
+        return InternalResponse(payload, 'timing created successfully', True)
+    
+    # creates the timings inside the shot in a single transaction, every entry takes the same params as create_timing
+    # (except shot_id). entries without aux_frame_index are added at the end of the shot
+    def create_timings(self, shot_uuid, timing_data_list):
+        shot = Shot.objects.filter(uuid=shot_uuid, is_disabled=False).first()
+        if not shot:
+            return InternalResponse({}, 'invalid shot', False)
+        
+        data_list = []
+        for timing_data in timing_data_list:
+            attributes = CreateTimingDao(data={**timing_data, 'shot_id': str(shot_uuid)})
+            if not attributes.is_valid():
+                return InternalResponse({}, attributes.errors, False)
+            
+            data_list.append(dict(attributes.data))
 
-        if 'primary_image_id' in attributes.data:
-            if attributes.data['primary_image_id'] != None:
-                primay_image: InternalFileObject = InternalFileObject.objects.filter(uuid=attributes.data['primary_image_id'], is_disabled=False).first()
-                if not primay_image:
-                    return InternalResponse({}, 'invalid primary image uuid', False)
-                
-                attributes._data['primary_image_id'] = primay_image.id
+        # resolving the uuids of all the entries together
+        for data in data_list:
+            data['shot_id'] = shot.id
         
-        timing = Timing.objects.create(**attributes.data)
+        invalid_field = UUIDResolver().resolve(data_list, {k: v for k, v in TIMING_FK_MODEL_DICT.items() if k != 'shot_id'})
+        if invalid_field:
+            return InternalResponse({}, get_invalid_uuid_msg(invalid_field), False)
+
+        with transaction.atomic():
+            timing_list = list(Timing.objects.filter(shot_id=shot.id, is_disabled=False).order_by('frame_order', 'id'))
+            new_timing_list = []
+            for data in data_list:
+                aux_frame_index = data.pop('aux_frame_index', None)
+                timing = Timing(**data)
+                timing_list.insert(len(timing_list) if aux_frame_index is None else max(aux_frame_index, 0), timing)
+                new_timing_list.append(timing)
+            
+            # the new frames take the gaps at their positions, the existing frames are only rekeyed if a gap runs out
+            Timing.objects.bulk_update(assign_order_keys(timing_list, new_timing_list, 'frame_order'), ['frame_order'])
+            Timing.objects.bulk_create(new_timing_list)
+            add_change_events(shot.project_id, [(ProjectChangeType.SHOT_UPDATE.value, shot.uuid)])
+
+        uuid_list = [timing.uuid for timing in new_timing_list]
+        timing_dict = {t.uuid: t for t in select_dto_related(Timing.objects.filter(uuid__in=uuid_list), TimingDto)}
+        context = {**get_index_context(shot_list=[shot]), 'frame_index_dict': get_frame_index_dict(timing_list)}
         payload = {
-            'data': TimingDto(timing).data
+            'data': TimingDto([timing_dict[timing_uuid] for timing_uuid in uuid_list], context=context, many=True).data
         }
+
+        return InternalResponse(payload, 'timings created successfully', True)
+    
+    # timing_uuid_list should have all the timings of the shot in the new order
+    def reorder_timings(self, shot_uuid, timing_uuid_list):
+        try:
+            timing_uuid_list = [str(uuid.UUID(str(timing_uuid))) for timing_uuid in timing_uuid_list]
+        except (ValueError, TypeError):
+            return InternalResponse({}, 'invalid timing uuid', False)
         
-        return InternalResponse(payload, 'timing created successfully', True)
+        shot = Shot.objects.filter(uuid=shot_uuid, is_disabled=False).first()
+        if not shot:
+            return InternalResponse({}, 'invalid shot', False)
+        
+        timing_dict = {str(timing.uuid): timing for timing in \
+                       Timing.objects.filter(shot_id=shot.id, is_disabled=False)}
+        if len(timing_uuid_list) != len(timing_dict) or set(timing_uuid_list) != set(timing_dict.keys()):
+            return InternalResponse({}, 'timing list does not match the timings of the shot', False)
+        
+        updated_timing_list = []
+        updated_on = datetime.datetime.now()
+        for idx, timing_uuid in enumerate(timing_uuid_list):
+            timing = timing_dict[timing_uuid]
+            if timing.frame_order != (idx + 1) * ORDER_KEY_GAP:
+                timing.frame_order = (idx + 1) * ORDER_KEY_GAP
+                timing.updated_on = updated_on
+                updated_timing_list.append(timing)
+
+        with transaction.atomic():
+            Timing.objects.bulk_update(updated_timing_list, ['frame_order', 'updated_on'])
+            add_change_events(shot.project_id, [(ProjectChangeType.SHOT_UPDATE.value, shot.uuid)])
+
+        return InternalResponse({}, 'timings reordered successfully', True)
     
     def remove_existing_timing(self, project_uuid):
         if project_uuid:
@@ -914,7 +960,9 @@ class DBRepo:
         
         if project:
             shot_list = Shot.objects.filter(project_id=project.id, is_disabled=False).all()
-            Timing.objects.filter(shot_id__in=[s.id for s in shot_list], is_disabled=False).update(is_disabled=True)
+            with transaction.atomic():
+                Timing.objects.filter(shot_id__in=[s.id for s in shot_list], is_disabled=False).update(is_disabled=True, updated_on=datetime.datetime.now())
+                add_change_events(project.id, [(ProjectChangeType.SHOT_UPDATE.value, s.uuid) for s in shot_list])
         
         return InternalResponse({}, 'timing removed successfully', True)
     
@@ -938,66 +986,15 @@ class DBRepo:
         if not timing:
             return InternalResponse({}, 'invalid timing uuid', False)
         
-        if 'primary_image_id' in kwargs:
-            if kwargs['primary_image_id'] != None:
-                primary_image: InternalFileObject = InternalFileObject.objects.filter(uuid=kwargs['primary_image_id'], is_disabled=False).first()
-                if not primary_image:
-                    return InternalResponse({}, 'invalid primary image uuid', False)
-                
-                kwargs['primary_image_id'] = primary_image.id
-
-        if 'shot_id' in kwargs:
-            if kwargs['shot_id'] != None:
-                shot: Shot = Shot.objects.filter(uuid=kwargs['shot_id'], is_disabled=False).first()
-                if not shot:
-                    return InternalResponse({}, 'invalid shot uuid', False)
-                
-                kwargs['shot_id'] = shot.id
-
-        if 'model_id' in kwargs:
-            if kwargs['model_id'] != None:
-                model: AIModel = AIModel.objects.filter(uuid=kwargs['model_id'], is_disabled=False).first()
-                if not model:
-                    return InternalResponse({}, 'invalid model uuid', False)
-                
-                kwargs['model_id'] = model.id
-        
-
-        if 'source_image_id' in kwargs:
-            if kwargs['source_image_id'] != None:
-                source_image: InternalFileObject = InternalFileObject.objects.filter(uuid=kwargs['source_image_id'], is_disabled=False).first()
-                if not source_image:
-                    return InternalResponse({}, 'invalid source image uuid', False)
-                
-                kwargs['source_image_id'] = source_image.id
+        invalid_field = UUIDResolver().resolve([kwargs], TIMING_FK_MODEL_DICT)
+        if invalid_field:
+            return InternalResponse({}, get_invalid_uuid_msg(invalid_field), False)
         
+        if 'aux_frame_index' in kwargs:
+            # moving the frame in the gap at aux_frame_index, only this row is updated
+            shot_timing_list = Timing.objects.filter(shot_id=kwargs.get('shot_id', timing.shot_id), is_disabled=False).exclude(id=timing.id)
+            kwargs['frame_order'] = get_order_key(shot_timing_list, 'frame_order', kwargs.pop('aux_frame_index'))
 
-        if 'mask_id' in kwargs:
-            if kwargs['mask_id'] != None:
-                mask: InternalFileObject = InternalFileObject.objects.filter(uuid=kwargs['mask_id'], is_disabled=False).first()
-                if not mask:
-                    return InternalResponse({}, 'invalid mask uuid', False)
-                
-                kwargs['mask_id'] = mask.id
-        
-
-        if 'canny_image_id' in kwargs:
-            if kwargs['canny_image_id'] != None:
-                canny_image: InternalFileObject = InternalFileObject.objects.filter(uuid=kwargs['canny_image_id'], is_disabled=False).first()
-                if not canny_image:
-                    return InternalResponse({}, 'invalid canny image uuid', False)
-                
-                kwargs['canny_image_id'] = canny_image.id
-        
-
-        if 'primay_image_id' in kwargs:
-            if kwargs['primay_image_id'] != None:
-                primay_image: InternalFileObject = InternalFileObject.objects.filter(uuid=kwargs['primay_image_id'], is_disabled=False).first()
-                if not primay_image:
-                    return InternalResponse({}, 'invalid primary image uuid', False)
-                
-                kwargs['primay_image_id'] = primay_image.id
-        
         for attr, value in kwargs.items():
             setattr(timing, attr, value)
         timing.save()
@@ -1287,7 +1284,7 @@ class DBRepo:
         if not project:
             return InternalResponse({}, 'invalid project', False)
         
-        timing_list = Timing.objects.filter(project_id=project.id, is_disabled=False).order_by('aux_frame_index').all()
+        timing_list = Timing.objects.filter(project_id=project.id, is_disabled=False).order_by('frame_order').all()
         
         # bulk fetching files and models from the database
         model_uuid_list = set()
@@ -1439,17 +1436,49 @@ class DBRepo:
         return InternalResponse({'data': 'https://buy.stripe.com/test_8wMbJib8g3HK7vi5ko'}, 'success', True)     # temp link
     
     # lock
-    def acquire_lock(self, key):
+    # returns the lease {key, owner, fence, expires_on} if acquired, None if the lock is held by some other owner.
+    # the fence of the key increases on every acquisition, so a holder whose lease expired can be detected.
+    # acquiring a lease already held by the owner succeeds (a retried acquire whose response was lost)
+    def acquire_lock(self, key, owner=None, lease_duration=LOCK_LEASE_DURATION):
+        owner = owner or uuid.uuid4().hex
+        now = datetime.datetime.now()
+        expires_on = now + datetime.timedelta(seconds=lease_duration)
         with transaction.atomic():
-            lock, created = Lock.objects.get_or_create(row_key=key)
-            if lock.created_on + datetime.timedelta(minutes=1) < datetime.datetime.now():
-                created = True  # after 1 min, we will assume this to be a fresh lock
-            return InternalResponse({'data': True if created else False}, 'success', True)
+            # taking over a released or an expired lease (or the owner's own lease)
+            if Lock.objects.filter(Q(expires_on__isnull=True) | Q(expires_on__lt=now) | Q(owner=owner), row_key=key) \
+                    .update(owner=owner, expires_on=expires_on, fence=F('fence') + 1):
+                lock = Lock.objects.filter(row_key=key).first()
+            else:
+                try:
+                    with transaction.atomic():
+                        lock = Lock.objects.create(row_key=key, owner=owner, expires_on=expires_on, fence=1)
+                except IntegrityError:
+                    return InternalResponse({'data': None}, 'lock held by another owner', True)
+
+        payload = {
+            'data': {
+                'key': key,
+                'owner': owner,
+                'fence': lock.fence,
+                'expires_on': expires_on.isoformat()
+            }
+        }
+        return InternalResponse(payload, 'success', True)
+    
+    # extends the lease, fails if the lease has expired or was taken over (fence changed)
+    def renew_lock(self, key, owner, fence, lease_duration=LOCK_LEASE_DURATION):
+        now = datetime.datetime.now()
+        renewed = Lock.objects.filter(row_key=key, owner=owner, fence=fence, expires_on__gte=now) \
+            .update(expires_on=now + datetime.timedelta(seconds=lease_duration))
+        return InternalResponse({'data': bool(renewed)}, 'success', True)
         
-    def release_lock(self, key):
-        with transaction.atomic():
-            Lock.objects.filter(row_key=key).delete()
-            return InternalResponse({'data': True}, 'success', True)
+    # only the owner can release the lock
+    def release_lock(self, key, owner):
+        if not owner:
+            return InternalResponse({'data': False}, 'owner is required', False)
+        
+        released = Lock.objects.filter(row_key=key, owner=owner).update(owner="", expires_on=None)
+        return InternalResponse({'data': bool(released)}, 'success', True)
         
     
     # shot
@@ -1458,12 +1487,15 @@ class DBRepo:
         if not project:
             return InternalResponse({}, 'invalid project uuid', False)
         
-        shot: Shot = Shot.objects.filter(project_id=project.id, shot_idx=shot_number, is_disabled=False).first()
+        # shot_number starts from 1
+        shot_list = select_dto_related(Shot.objects.filter(project_id=project.id, is_disabled=False), ShotDto)\
+            .order_by('shot_order', 'id')[shot_number - 1:shot_number] if shot_number > 0 else []
+        shot: Shot = shot_list[0] if len(shot_list) else None
         if not shot:
             return InternalResponse({}, 'invalid shot number', False)
         
-        timing_list = Timing.objects.filter(shot_id=shot.id, is_disabled=False).all()
-        context = {'timing_list': timing_list}
+        timing_list = select_dto_related(Timing.objects.filter(shot_id=shot.id, is_disabled=False), TimingDto)
+        context = {'timing_list': timing_list, 'shot_index_dict': {shot.uuid: shot_number}}
         payload = {
             'data': ShotDto(shot, context=context).data
         }
@@ -1471,12 +1503,12 @@ class DBRepo:
         return InternalResponse(payload, 'shot fetched successfully', True)
 
     def get_shot_from_uuid(self, shot_uuid):
-        shot: Shot = Shot.objects.filter(uuid=shot_uuid, is_disabled=False).first()
+        shot: Shot = select_dto_related(Shot.objects.filter(uuid=shot_uuid, is_disabled=False), ShotDto).first()
         if not shot:
             return InternalResponse({}, 'invalid shot uuid', False)
         
-        timing_list = Timing.objects.filter(shot_id=shot.id, is_disabled=False).all()
-        context = {'timing_list': timing_list}
+        timing_list = select_dto_related(Timing.objects.filter(shot_id=shot.id, is_disabled=False), TimingDto)
+        context = {**get_index_context(shot_list=[shot]), 'timing_list': timing_list}
 
         payload = {
             'data': ShotDto(shot, context=context).data
@@ -1490,9 +1522,16 @@ class DBRepo:
         if not project:
             return InternalResponse({}, 'invalid project uuid', False)
         
-        shot_list: List[Shot] = Shot.objects.filter(project_id=project.id, is_disabled=False).order_by('shot_idx').all()
-        timing_list = Timing.objects.filter(is_disabled=False).all()
-        context = {'timing_list': timing_list}
+        shot_list: List[Shot] = select_dto_related(Shot.objects.filter(project_id=project.id, is_disabled=False), ShotDto).order_by('shot_order', 'id')
+        timing_list = select_dto_related(Timing.objects.filter(shot__project_id=project.id, shot__is_disabled=False, is_disabled=False), TimingDto)
+        
+        # fetching the interpolated clips of all the shots at once
+        clip_uuid_list = []
+        for shot in shot_list:
+            clip_uuid_list.extend(json.loads(shot.interpolated_clip_list) if shot.interpolated_clip_list else [])
+        
+        clip_list = select_dto_related(InternalFileObject.objects.filter(uuid__in=clip_uuid_list, is_disabled=False), InternalFileDto)
+        context = {'timing_list': list(timing_list), 'interpolated_clip_list': list(clip_list), 'shot_index_dict': get_shot_index_dict(shot_list)}
 
         payload = {
             'data': ShotDto(shot_list, context=context, many=True).data
@@ -1516,7 +1555,6 @@ class DBRepo:
         shot_data = {
             "name" : name,
             "desc" : desc,
-            "shot_idx" : shot_number,
             "duration" : duration,
             "meta_data" : meta_data,
             "project_id" : project.id
@@ -1524,8 +1562,8 @@ class DBRepo:
 
         shot = Shot.objects.create(**shot_data)
         
-        timing_list = Timing.objects.filter(is_disabled=False).all()
-        context = {'timing_list': timing_list}
+        # newly created shot has no timings
+        context = {**get_index_context(shot_list=[shot]), 'timing_list': []}
         
         payload = {
             'data': ShotDto(shot, context=context).data
@@ -1540,23 +1578,28 @@ class DBRepo:
         
         if 'name' in kwargs:
             name = kwargs['name']
-            prev_shot = Shot.objects.filter(project_id=shot.project.id, name=name, is_disabled=False).first()
+            prev_shot = Shot.objects.filter(project_id=shot.project_id, name=name, is_disabled=False).first()
             if prev_shot:
                 return InternalResponse({}, 'shot name already exists', False)
             
             kwargs['name'] = name
 
         if 'main_clip_id' in kwargs:
-            file = InternalFileObject.objects.filter(uuid=kwargs['main_clip_id'], is_disabled=False).first()
-            if file:
-                kwargs['main_clip_id'] = file.id
+            main_clip_id = UUIDResolver().get_id(InternalFileObject, kwargs['main_clip_id'])
+            if main_clip_id:
+                kwargs['main_clip_id'] = main_clip_id
+
+        if 'shot_idx' in kwargs:
+            # moving the shot in the gap at shot_idx (starting from 1), only this row is updated
+            project_shot_list = Shot.objects.filter(project_id=shot.project_id, is_disabled=False).exclude(id=shot.id)
+            kwargs['shot_order'] = get_order_key(project_shot_list, 'shot_order', kwargs.pop('shot_idx') - 1)
 
         for k,v in kwargs.items():
             setattr(shot, k, v)
 
         shot.save()
-        timing_list = Timing.objects.filter(is_disabled=False).all()
-        context = {'timing_list': timing_list}
+        timing_list = select_dto_related(Timing.objects.filter(shot_id=shot.id, is_disabled=False), TimingDto)
+        context = {**get_index_context(shot_list=[shot]), 'timing_list': timing_list}
 
         payload = {
             'data': ShotDto(shot, context=context).data
@@ -1569,38 +1612,41 @@ class DBRepo:
         if not shot:
             return InternalResponse({}, 'invalid shot uuid', False)
         
-        shot_number = Shot.objects.filter(project_id=shot.project.id, is_disabled=False).count() + 1
         shot_data = {
             "name" : shot.name + " (copy)",
             "desc" : shot.desc,
-            "shot_idx" : shot_number,
             "duration" : shot.duration,
             "meta_data" : shot.meta_data,
             "project_id" : shot.project.id
         }
 
-        new_shot = Shot.objects.create(**shot_data)
-        
-        timing_list = Timing.objects.filter(shot_id=shot.id, is_disabled=False).all()
-        new_timing_list = []
-        for timing in timing_list:
-            data = {
-                "model_id": timing.model_id,
-                "source_image_id": timing.source_image_id,
-                "mask_id": timing.mask_id,
-                "canny_image_id": timing.canny_image_id,
-                "primary_image_id": timing.primary_image_id,
-                "shot_id": new_shot.id,
-                "alternative_images": timing.alternative_images,
-                "notes": timing.notes,
-                "clip_duration": timing.clip_duration,
-                "aux_frame_index": timing.aux_frame_index,
-            }
+        with transaction.atomic():
+            new_shot = Shot.objects.create(**shot_data)
+            
+            timing_list = Timing.objects.filter(shot_id=shot.id, is_disabled=False).order_by('frame_order', 'id')
+            new_timing_list = []
+            for idx, timing in enumerate(timing_list):
+                data = {
+                    "model_id": timing.model_id,
+                    "source_image_id": timing.source_image_id,
+                    "mask_id": timing.mask_id,
+                    "canny_image_id": timing.canny_image_id,
+                    "primary_image_id": timing.primary_image_id,
+                    "shot_id": new_shot.id,
+                    "alternative_images": timing.alternative_images,
+                    "notes": timing.notes,
+                    "clip_duration": timing.clip_duration,
+                    "frame_order": (idx + 1) * ORDER_KEY_GAP,
+                }
 
-            new_timing = Timing.objects.create(**data)
-            new_timing_list.append(new_timing)
+                new_timing_list.append(Timing(**data))
+            
+            # copying the frames together, without the per row reindexing of Timing.save
+            Timing.objects.bulk_create(new_timing_list)
+        
+        new_timing_list = select_dto_related(Timing.objects.filter(shot_id=new_shot.id, is_disabled=False), TimingDto).order_by('frame_order', 'id')
         
-        context = {'timing_list': new_timing_list}
+        context = {**get_index_context(shot_list=[new_shot]), 'timing_list': new_timing_list}
         
         payload = {
             'data': ShotDto(new_shot, context=context).data
@@ -1617,3 +1663,34 @@ class DBRepo:
         shot.save()
         
         return InternalResponse({}, 'shot deleted successfully', True)
+    
+    def get_project_change_event_list(self, project_uuid, after_seq=None):
+        '''
+        distinct changes of the project in the events after after_seq, along with the last sequence number
+        (to be passed in the next call). no changes are returned if after_seq is None (nothing is cached yet).
+        is_reset is True if the events after after_seq have been pruned, so the changes are unknown
+        '''
+        project = Project.objects.filter(uuid=project_uuid, is_disabled=False).first()
+        if not project:
+            return InternalResponse({}, 'invalid project uuid', False)
+        
+        # ids are sequential across the projects, the latest event is never pruned
+        last_seq = ProjectChangeEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        event_list, is_reset = [], False
+        if after_seq is not None:
+            after_seq = int(after_seq)
+            first_seq = ProjectChangeEvent.objects.order_by('id').values_list('id', flat=True).first()
+            is_reset = after_seq > last_seq or (first_seq is not None and after_seq < first_seq - 1)
+            if not is_reset:
+                event_list = ProjectChangeEvent.objects.filter(project_id=project.id, id__gt=after_seq, id__lte=last_seq)\
+                    .values('change_type', 'entity_uuid').distinct()
+
+        payload = {
+            'data': {
+                'event_list': list(event_list),
+                'last_seq': last_seq,
+                'is_reset': is_reset
+            }
+        }
+
+        return InternalResponse(payload, 'change event list fetched', True)
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:30
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0013_filter_keys_added'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aimodel',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='aimodelparammap',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='appsetting',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='backuptiming',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='inferencelog',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='internalfileobject',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='lock',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='setting',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='shot',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='timing',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='inferencelog',
+            index=models.Index(fields=['status', 'is_disabled'], name='inference_log_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='internalfileobject',
+            index=models.Index(fields=['project', 'tag', 'is_disabled', 'created_on'], name='file_project_tag_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shot',
+            index=models.Index(fields=['project', 'is_disabled', 'shot_idx'], name='shot_project_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timing',
+            index=models.Index(fields=['shot', 'is_disabled', 'aux_frame_index'], name='timing_shot_idx'),
+        ),
+    ]
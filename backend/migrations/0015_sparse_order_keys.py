@@ -0,0 +1,72 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+
+ORDER_KEY_GAP = 1 << 16
+
+# converting the dense positions into sparse order keys (keeping the current order)
+def populate_order_keys(apps, schema_editor):
+    Shot = apps.get_model('backend', 'Shot')
+    Timing = apps.get_model('backend', 'Timing')
+
+    shot_list = list(Shot.objects.order_by('project_id', 'shot_idx', 'id'))
+    project_id, idx = None, 0
+    for shot in shot_list:
+        idx = idx + 1 if shot.project_id == project_id else 1
+        project_id = shot.project_id
+        shot.shot_order = idx * ORDER_KEY_GAP
+    Shot.objects.bulk_update(shot_list, ['shot_order'], batch_size=500)
+
+    timing_list = list(Timing.objects.order_by('shot_id', 'aux_frame_index', 'id'))
+    shot_id, idx = None, 0
+    for timing in timing_list:
+        idx = idx + 1 if timing.shot_id == shot_id else 1
+        shot_id = timing.shot_id
+        timing.frame_order = idx * ORDER_KEY_GAP
+    Timing.objects.bulk_update(timing_list, ['frame_order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0014_indexes_added'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shot',
+            name='shot_order',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='timing',
+            name='frame_order',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_order_keys, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='shot',
+            name='shot_project_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='timing',
+            name='timing_shot_idx',
+        ),
+        migrations.RemoveField(
+            model_name='shot',
+            name='shot_idx',
+        ),
+        migrations.RemoveField(
+            model_name='timing',
+            name='aux_frame_index',
+        ),
+        migrations.AddIndex(
+            model_name='shot',
+            index=models.Index(fields=['project', 'is_disabled', 'shot_order'], name='shot_project_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timing',
+            index=models.Index(fields=['shot', 'is_disabled', 'frame_order'], name='timing_shot_idx'),
+        ),
+    ]
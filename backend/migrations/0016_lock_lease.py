@@ -0,0 +1,28 @@
+# Generated by Django 4.2.1 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0015_sparse_order_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lock',
+            name='owner',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lock',
+            name='expires_on',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='lock',
+            name='fence',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.1 on 2026-10-18 15:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0016_lock_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, unique=True)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('is_disabled', models.BooleanField(default=False)),
+                ('change_type', models.CharField(max_length=255)),
+                ('entity_uuid', models.CharField(blank=True, default='', max_length=255)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='backend.project')),
+            ],
+            options={
+                'db_table': 'project_change_event',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='projectchangeevent',
+            index=models.Index(fields=['project', 'id'], name='change_event_project_idx'),
+        ),
+    ]
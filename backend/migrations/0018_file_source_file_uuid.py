@@ -0,0 +1,22 @@
+# Generated by Django 4.2.1 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0017_project_change_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='internalfileobject',
+            name='source_file_uuid',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='internalfileobject',
+            index=models.Index(fields=['source_file_uuid', 'tag'], name='file_source_idx'),
+        ),
+    ]
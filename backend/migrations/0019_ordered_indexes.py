@@ -0,0 +1,37 @@
+# Generated by Django 4.2.1 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0018_file_source_file_uuid'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='internalfileobject',
+            name='file_project_tag_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shot',
+            name='shot_project_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='timing',
+            name='timing_shot_idx',
+        ),
+        migrations.AddIndex(
+            model_name='internalfileobject',
+            index=models.Index(fields=['project', 'tag', 'created_on'], name='file_project_tag_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shot',
+            index=models.Index(fields=['project', 'shot_order'], name='shot_project_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timing',
+            index=models.Index(fields=['shot', 'frame_order'], name='timing_shot_idx'),
+        ),
+    ]
@@ -2,17 +2,106 @@ from django.db import models
 import uuid
 import json
 import requests
-from django.db.models import F
+from django.db.models import Q
 from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 import urllib
 
-from shared.constants import SERVER, InferenceStatus, ServerType
+from shared.constants import SERVER, InferenceStatus, ProjectChangeType, ServerType
 from shared.file_upload.s3 import generate_s3_url, is_s3_image_url
 
+
+# frames and shots are ordered by sparse keys (gaps between consecutive entries), so an insert/move only writes
+# the row itself. their dense positions (aux_frame_index/shot_idx) are computed at read time
+ORDER_KEY_GAP = 1 << 16
+
+def get_order_key(queryset, order_field, index=None):
+    '''
+    key for an entry placed at the (dense) index of the ordered queryset (which shouldn't include the entry),
+    picked in the gap between its neighbours. the queryset is rebalanced once the gap runs out. index None
+    places the entry at the end
+    '''
+    for _ in range(2):
+        queryset = queryset.order_by(order_field, 'id')
+        if index is None:
+            return (queryset.reverse().values_list(order_field, flat=True).first() or 0) + ORDER_KEY_GAP
+        
+        index = max(index, 0)
+        key_list = list(queryset.values_list(order_field, flat=True)[max(index - 1, 0):index + 1])
+        if index == 0:
+            prev_key, next_key = None, key_list[0] if len(key_list) else None
+        elif len(key_list):
+            prev_key, next_key = key_list[0], key_list[1] if len(key_list) > 1 else None
+        else:
+            # index is past the end of the list
+            prev_key, next_key = queryset.reverse().values_list(order_field, flat=True).first(), None
+
+        if next_key is None:
+            return (prev_key or 0) + ORDER_KEY_GAP
+        
+        prev_key = prev_key or 0
+        if next_key - prev_key > 1:
+            return (prev_key + next_key) // 2
+        
+        rebalance_order_keys(queryset, order_field)
+
+def assign_order_keys(entity_list, new_entity_list, order_field):
+    '''
+    sets the keys of the new entities placed in the ordered entity_list, spread in the gaps between the existing
+    ones. returns the existing entities whose keys had to be changed (all of them, if a gap runs out)
+    '''
+    new_entity_id_list = set(id(entity) for entity in new_entity_list)
+    run, prev_key = [], 0       # consecutive new entities after prev_key
+    for entity in entity_list + [None]:
+        if entity is not None and id(entity) in new_entity_id_list:
+            run.append(entity)
+            continue
+
+        next_key = getattr(entity, order_field) if entity is not None else None
+        if len(run):
+            step = ORDER_KEY_GAP if next_key is None else (next_key - prev_key) // (len(run) + 1)
+            if step < 1:
+                break
+
+            for idx, new_entity in enumerate(run):
+                setattr(new_entity, order_field, prev_key + (idx + 1) * step)
+            run = []
+        
+        prev_key = next_key
+    else:
+        return []
+    
+    updated_entity_list = []
+    for idx, entity in enumerate(entity_list):
+        if id(entity) not in new_entity_id_list and getattr(entity, order_field) != (idx + 1) * ORDER_KEY_GAP:
+            updated_entity_list.append(entity)
+        setattr(entity, order_field, (idx + 1) * ORDER_KEY_GAP)
+    
+    return updated_entity_list
+
+# appends the change events of the project's entities, read by the other app sessions/processes to sync their
+# cache. the events are written in the transaction of the change, so they are visible once it commits
+# change_list: [(change_type, entity_uuid)]
+def add_change_events(project_id, change_list):
+    if not project_id or not len(change_list):
+        return
+
+    ProjectChangeEvent.objects.bulk_create([
+        ProjectChangeEvent(project_id=project_id, change_type=change_type, entity_uuid=str(entity_uuid)) \
+            for change_type, entity_uuid in dict.fromkeys((c, str(u)) for c, u in change_list)
+    ])
+
+# spreads the keys evenly again (doesn't change the order)
+def rebalance_order_keys(queryset, order_field):
+    entity_list = list(queryset.order_by(order_field, 'id'))
+    for idx, entity in enumerate(entity_list):
+        setattr(entity, order_field, (idx + 1) * ORDER_KEY_GAP)
+    
+    queryset.model.objects.bulk_update(entity_list, [order_field])
+
 class BaseModel(models.Model):
-    uuid = models.UUIDField(default=uuid.uuid4)
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True)
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
     is_disabled = models.BooleanField(default=False)
@@ -22,8 +111,12 @@ class BaseModel(models.Model):
         abstract = True
 
 
+# lease lock, the row is kept after the release so that the fence of the key keeps increasing
 class Lock(BaseModel):
     row_key = models.CharField(max_length=255, unique=True)
+    owner = models.CharField(max_length=255, default="", blank=True)
+    expires_on = models.DateTimeField(default=None, null=True)      # None if released
+    fence = models.BigIntegerField(default=0)       # incremented on every acquisition
 
     class Meta:
         app_label = 'backend'
@@ -58,6 +151,8 @@ class Project(BaseModel):
         app_label = 'backend'
         db_table = 'project'
         
+    init_field_list = ('name', )       # read in __init__, never deferred in the projected querysets
+
     def __init__(self, *args, **kwargs):
         super(Project, self).__init__(*args, **kwargs)
         self.old_project_name = self.name
@@ -72,6 +167,20 @@ class Project(BaseModel):
         super().save(*args, **kwargs)
 
 
+# append-only, the app reads the events after the last id (sequence number) it has seen
+class ProjectChangeEvent(BaseModel):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    change_type = models.CharField(max_length=255)      # ProjectChangeType
+    entity_uuid = models.CharField(max_length=255, default="", blank=True)     # NOTE: not a foreignkey, the entity depends on the change type
+
+    class Meta:
+        app_label = 'backend'
+        db_table = 'project_change_event'
+        indexes = [
+            models.Index(fields=['project', 'id'], name='change_event_project_idx'),
+        ]
+
+
 class AIModel(BaseModel):
     name = models.CharField(max_length=255, default="")
     user = models.ForeignKey(User, on_delete=models.DO_NOTHING, null=True)
@@ -102,7 +211,12 @@ class InferenceLog(BaseModel):
     class Meta:
         app_label = 'backend'
         db_table = 'inference_log'
+        indexes = [
+            models.Index(fields=['status', 'is_disabled'], name='inference_log_status_idx'),     # polled by the runner
+        ]
     
+    init_field_list = ('status', )
+
     def __init__(self, *args, **kwargs):
         super(InferenceLog, self).__init__(*args, **kwargs)
         self.old_status = self.status
@@ -124,10 +238,17 @@ class InternalFileObject(BaseModel):
     project = models.ForeignKey(Project, on_delete=models.SET_NULL, default=None, null=True)
     inference_log = models.ForeignKey(InferenceLog, on_delete=models.SET_NULL, default=None, null=True)
     shot_uuid = models.CharField(max_length=255, default="", blank=True)    # NOTE: this is not a foreignkey and purely for filtering purpose
+    source_file_uuid = models.CharField(max_length=255, default="", blank=True)     # file this is derived from (previews, posters..), not a foreignkey
 
     class Meta:
         app_label = 'backend'
         db_table = 'file'
+        indexes = [
+            # is_disabled is left out, sqlite filters it as NOT is_disabled (not an index key) which would stop the
+            # created_on part from being used for the ordering
+            models.Index(fields=['project', 'tag', 'created_on'], name='file_project_tag_idx'),
+            models.Index(fields=['source_file_uuid', 'tag'], name='file_source_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         # if the online url is not an s3 url and it's a production environment then we need to save the file in s3
@@ -143,6 +264,7 @@ class InternalFileObject(BaseModel):
             self.download_and_save_file(file_location)
             
         super(InternalFileObject, self).save(*args, **kwargs)
+        add_change_events(self.project_id, [(ProjectChangeType.FILE_UPDATE.value, self.uuid)])
 
 
     def download_and_save_file(self, file_location):
@@ -191,7 +313,7 @@ class Shot(BaseModel):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     main_clip = models.ForeignKey(InternalFileObject, default=None, null=True, on_delete=models.DO_NOTHING)   # main clip has the correct duration
     desc = models.TextField(default="", blank=True)
-    shot_idx = models.IntegerField()
+    shot_order = models.BigIntegerField(default=0)     # sparse order key inside the project
     duration = models.FloatField(default=2.5)
     meta_data = models.TextField(default="", blank=True)
     interpolated_clip_list = models.TextField(default=None, null=True)
@@ -199,6 +321,9 @@ class Shot(BaseModel):
     class Meta:
         app_label = 'backend'
         db_table = 'shot'
+        indexes = [
+            models.Index(fields=['project', 'shot_order'], name='shot_project_idx'),
+        ]
 
     @property
     def meta_data_dict(self):
@@ -206,8 +331,6 @@ class Shot(BaseModel):
 
     def __init__(self, *args, **kwargs):
         super(Shot, self).__init__(*args, **kwargs)
-        self.old_shot_idx = self.shot_idx
-        self.old_is_disabled = self.is_disabled
         self.old_duration = self.duration
 
     def add_interpolated_clip_list(self, clip_uuid_list):
@@ -216,41 +339,21 @@ class Shot(BaseModel):
         cur_list = list(set(cur_list))
         self.interpolated_clip_list = json.dumps(cur_list)
 
+    # dense position of the shot in the project (starting from 1), ties are broken by the id (as in get_shot_index_dict)
+    @property
+    def shot_idx(self):
+        before_query = Q(shot_order__lt=self.shot_order)
+        if self.id:
+            before_query |= Q(shot_order=self.shot_order, id__lt=self.id)
+        return Shot.objects.filter(before_query, project_id=self.project_id, is_disabled=False).count() + 1
+
     def save(self, *args, **kwargs):
-        # --------------- handling shot_idx change --------------
-        # if the shot is being deleted (disabled)
-        if self.old_is_disabled != self.is_disabled:
-            shot_list = Shot.objects.filter(project_id=self.project_id, is_disabled=False).all()
-
-            # if this is disabled then shifting every shot backwards one step
-            if self.is_disabled:
-                shot_list = shot_list.filter(shot_idx__gt=self.shot_idx).order_by('shot_idx')
-                shot_list.update(shot_idx=F('shot_idx') - 1)
-            else:
-                shot_list = shot_list.filter(shot_idx__gte=self.shot_idx).order_by('shot_idx')
-                shot_list.update(shot_idx=F('shot_idx') + 1)
-
-        # if this is a newly created shot or assigned new shot_idx (and not disabled)
-        if (not self.id or self.old_shot_idx != self.shot_idx) and not self.is_disabled:
-            # newly created shot
-            if not self.id:
-                # if a shot already exists at this place then moving everything one step forward
-                if Shot.objects.filter(project_id=self.project_id, shot_idx=self.shot_idx, is_disabled=False).exists():
-                    shot_list = Shot.objects.filter(project_id=self.project_id, \
-                                            shot_idx__gte=self.shot_idx, is_disabled=False)
-                    shot_list.update(shot_idx=F('shot_idx') + 1)
-            elif self.old_shot_idx != self.shot_idx:
-                if self.shot_idx >= self.old_shot_idx:
-                    shots_to_move = Shot.objects.filter(project_id=self.project_id, shot_idx__gt=self.old_shot_idx, \
-                                    shot_idx__lte=self.shot_idx, is_disabled=False).order_by('shot_idx')
-                    # moving the frames between old and new index one step backwards
-                    shots_to_move.update(shot_idx=F('shot_idx') - 1)
-                else:
-                    shots_to_move = Shot.objects.filter(project_id=self.project_id, shot_idx__gte=self.shot_idx, \
-                                       shot_idx__lt=self.old_shot_idx, is_disabled=False).order_by('shot_idx')
-                    shots_to_move.update(shot_idx=F('shot_idx') + 1)
+        # new shots are added at the end of the project
+        if not self.id and not self.shot_order:
+            self.shot_order = get_order_key(Shot.objects.filter(project_id=self.project_id, is_disabled=False), 'shot_order')
 
         super(Shot, self).save(*args, **kwargs)
+        add_change_events(self.project_id, [(ProjectChangeType.SHOT_UPDATE.value, self.uuid)])
 
 
 class Timing(BaseModel):
@@ -263,66 +366,44 @@ class Timing(BaseModel):
     alternative_images = models.TextField(default=None, null=True)
     notes = models.TextField(default="", blank=True)
     clip_duration = models.FloatField(default=None, null=True)
-    aux_frame_index = models.IntegerField(default=0)
+    frame_order = models.BigIntegerField(default=0)    # sparse order key inside the shot
 
     class Meta:
         app_label = 'backend'
         db_table = 'frame_timing'
+        indexes = [
+            models.Index(fields=['shot', 'frame_order'], name='timing_shot_idx'),
+        ]
 
     def __init__(self, *args, **kwargs):
         super(Timing, self).__init__(*args, **kwargs)
-        self.old_is_disabled = self.is_disabled
-        self.old_aux_frame_index = self.aux_frame_index
-        self.old_shot = self.shot
+        self.old_frame_order = self.frame_order
+        self.old_shot_id = self.shot_id     # only the id, accessing self.shot here would fire a query per instance
 
-    def save(self, *args, **kwargs):
-        # TODO: updating details of every frame this way can be slow - implement a better strategy
+    # dense position of the frame in the shot (starting from 0), ties are broken by the id (as in get_frame_index_dict)
+    @property
+    def aux_frame_index(self):
+        before_query = Q(frame_order__lt=self.frame_order)
+        if self.id:
+            before_query |= Q(frame_order=self.frame_order, id__lt=self.id)
+        return Timing.objects.filter(before_query, shot_id=self.shot_id, is_disabled=False).count()
 
-        # ------ handling aux_frame_index ------
-        # if the frame is being deleted (disabled)
-        if self.old_is_disabled != self.is_disabled and self.is_disabled:
-            timing_list = Timing.objects.filter(shot_id=self.shot_id, \
-                                            aux_frame_index__gte=self.aux_frame_index, is_disabled=False).order_by('aux_frame_index')
-            
-            # shifting aux_frame_index of all frames after this frame one backwards
-            if self.is_disabled:
-                timing_list.update(aux_frame_index=F('aux_frame_index') - 1)
-            else:
-                # shifting aux_frame_index of all frames after this frame one forward
-                timing_list.update(aux_frame_index=F('aux_frame_index') + 1)
-
-        # if this is a newly created frame or assigned a new aux_frame_index (and not disabled)
-        if (not self.id or self.old_aux_frame_index != self.aux_frame_index) and not self.is_disabled:
-            if not self.id:
-                # shifting aux_frame_index of all frames after this frame one forward
-                if Timing.objects.filter(shot_id=self.shot_id, aux_frame_index=self.aux_frame_index, is_disabled=False).exists():
-                    timing_list = Timing.objects.filter(shot_id=self.shot_id, \
-                                            aux_frame_index__gte=self.aux_frame_index, is_disabled=False)
-                    timing_list.update(aux_frame_index=F('aux_frame_index') + 1)
-            elif self.old_aux_frame_index != self.aux_frame_index:
-                if self.aux_frame_index >= self.old_aux_frame_index:
-                    timings_to_move = Timing.objects.filter(shot_id=self.shot_id, aux_frame_index__gt=self.old_aux_frame_index, \
-                                    aux_frame_index__lte=self.aux_frame_index, is_disabled=False).order_by('aux_frame_index')
-
-                    # moving the frames between old and new index one step backwards
-                    timings_to_move.update(aux_frame_index=F('aux_frame_index') - 1)
-                else:
-                    timings_to_move = Timing.objects.filter(shot_id=self.shot_id, aux_frame_index__gte=self.aux_frame_index, \
-                                       aux_frame_index__lt=self.old_aux_frame_index, is_disabled=False).order_by('aux_frame_index')
-                    timings_to_move.update(aux_frame_index=F('aux_frame_index') + 1)
-
-        # --------------- handling shot change -------------------
-        if not self.is_disabled and self.id and self.old_shot != self.shot:
-            # moving all frames ahead of this frame, one step backwards
-            timing_list = Timing.objects.filter(shot_id=self.old_shot.id, \
-                                               aux_frame_index__gt=self.aux_frame_index, is_disabled=False).order_by('aux_frame_index')
-            # changing the aux_frame_index of this frame to be the last one in the new shot
-            new_index = Timing.objects.filter(shot_id=self.shot.id, is_disabled=False).count()
-            self.aux_frame_index = new_index
-            timing_list.update(aux_frame_index=F('aux_frame_index') - 1)
+    def save(self, *args, **kwargs):
+        # new frames (without a position) and frames moved to a different shot are added at the end of the shot
+        if (not self.id and not self.frame_order) or \
+            (self.id and self.old_shot_id != self.shot_id and self.old_frame_order == self.frame_order):
+            shot_timing_list = Timing.objects.filter(shot_id=self.shot_id, is_disabled=False).exclude(id=self.id)
+            self.frame_order = get_order_key(shot_timing_list, 'frame_order')
 
         super().save(*args, **kwargs)
 
+        # the shots embed their timing list, so the shot (and the previous one if the timing moved) changes too
+        shot_data_list = list(Shot.objects.filter(id__in=[self.shot_id, self.old_shot_id]).values_list('uuid', 'project_id'))
+        if len(shot_data_list):
+            change_list = [(ProjectChangeType.TIMING_UPDATE.value, self.uuid)] + \
+                [(ProjectChangeType.SHOT_UPDATE.value, shot_uuid) for shot_uuid, _ in shot_data_list]
+            add_change_events(shot_data_list[0][1], change_list)
+
 
     @property
     def alternative_images_list(self):
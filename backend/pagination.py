@@ -0,0 +1,77 @@
+import base64
+import datetime
+import json
+import math
+
+from django.db.models import Q
+
+from shared.constants import SortOrder
+
+
+'''
+keyset pagination on (created_on, id). the cursor is an opaque token with the position of the last entry
+of a page, so the next page is fetched through the index without an OFFSET scan or a COUNT(*)
+'''
+def encode_cursor(entity, sort_order):
+    data = {
+        "created_on": entity.created_on.isoformat(),
+        "id": entity.id,
+        "sort_order": sort_order
+    }
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+# returns None if the cursor is invalid
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return datetime.datetime.fromisoformat(data['created_on']), int(data['id']), data['sort_order']
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+def paginate_queryset(queryset, data_per_page, sort_order=None, cursor=None, page=1, include_count=True):
+    '''
+    returns the page with the next_cursor (None on the last page). pages without a cursor are fetched by
+    their offset, so only jumps to an unvisited page scan the skipped rows. count and total_pages are only
+    added if include_count is True. returns None if the cursor or the page is invalid
+    '''
+    sort_order = sort_order if sort_order == SortOrder.DESCENDING.value else SortOrder.ASCENDING.value
+    if sort_order == SortOrder.DESCENDING.value:
+        queryset = queryset.order_by('-created_on', '-id')
+    else:
+        queryset = queryset.order_by('created_on', 'id')
+
+    count = queryset.count() if include_count else None
+    if cursor:
+        cursor_data = decode_cursor(cursor)
+        if not cursor_data or cursor_data[2] != sort_order:
+            return None
+
+        created_on, id, _ = cursor_data
+        if sort_order == SortOrder.DESCENDING.value:
+            queryset = queryset.filter(Q(created_on__lt=created_on) | Q(created_on=created_on, id__lt=id))
+        else:
+            queryset = queryset.filter(Q(created_on__gt=created_on) | Q(created_on=created_on, id__gt=id))
+        offset = 0
+    else:
+        if page < 1:
+            return None
+        offset = (page - 1) * data_per_page
+
+    # fetching an extra entry to know if there is a next page
+    entity_list = list(queryset[offset:offset + data_per_page + 1])
+    if not len(entity_list) and not cursor and page > 1:
+        return None
+
+    next_cursor = encode_cursor(entity_list[data_per_page - 1], sort_order) if len(entity_list) > data_per_page else None
+    res = {
+        "data_per_page": data_per_page,
+        "page": page,
+        "next_cursor": next_cursor,
+        "data": entity_list[:data_per_page]
+    }
+
+    if include_count:
+        res["count"] = count
+        res["total_pages"] = max(math.ceil(count / data_per_page), 1)
+
+    return res
@@ -19,6 +19,7 @@ class CreateFileDao(serializers.Serializer):
     project_id = serializers.CharField(max_length=100, required=False)
     shot_uuid = serializers.CharField(max_length=512, required=False, default="", allow_blank=True)
     inference_log_id = serializers.CharField(max_length=100, allow_null=True, required=False)
+    source_file_uuid = serializers.CharField(max_length=100, required=False, default="", allow_blank=True)
 
     def validate(self, data):
         local_path = data.get('local_path')
@@ -1,4 +1,5 @@
 import json
+from functools import lru_cache
 from rest_framework import serializers
 
 from backend.models import AIModel, AppSetting, BackupTiming, InferenceLog, InternalFileObject, Project, Setting, Shot, Timing, User
@@ -15,8 +16,51 @@ class UserDto(serializers.ModelSerializer):
             'total_credits'
         )
 
-class ProjectDto(serializers.ModelSerializer):
+class LookupDtoMixin:
+    '''
+    memoizes the output against the object's pk in a lookup table kept in the root serializer's context,
+    so objects shared by the nested dtos (e.g. the project of every file) are serialized only once
+    '''
+    def to_representation(self, instance):
+        lookup = self.context.setdefault('lookup', {})
+        key = (self.Meta.model.__name__, instance.pk, tuple(self.fields))     # projected outputs are kept apart
+        if key not in lookup:
+            lookup[key] = super().to_representation(instance)
+
+        return dict(lookup[key])
+
+
+class ProjectedDtoMixin:
+    '''
+    takes an optional 'fields' list and outputs only those fields (list/grid views only need a few of them).
+    fields of the nested dtos are given as '<field>.<nested_field>' (e.g. 'inference_log.status'), a nested
+    dto given without any of its fields is output fully
+    '''
+    def __init__(self, *args, **kwargs):
+        field_list = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if field_list is None:
+            return
+
+        nested_field_dict = {}
+        for field in field_list:
+            field_name, _, nested_field = field.partition('.')
+            nested_field_dict.setdefault(field_name, [])
+            if nested_field:
+                nested_field_dict[field_name].append(nested_field)
+
+        for field_name in list(self.fields):
+            if field_name not in nested_field_dict:
+                self.fields.pop(field_name)
+            elif nested_field_dict[field_name] and isinstance(self.fields[field_name], ProjectedDtoMixin):
+                self.fields[field_name] = self.fields[field_name].__class__(fields=nested_field_dict[field_name])
+
+
+class ProjectDto(LookupDtoMixin, ProjectedDtoMixin, serializers.ModelSerializer):
     user_uuid = serializers.SerializerMethodField()
+    # relations accessed outside of the nested dtos
+    related_field_list = ('user', )
+
     class Meta:
         model = Project
         fields = ('uuid', 'name', 'user_uuid', 'created_on', 'temp_file_list', 'meta_data')
@@ -25,8 +69,10 @@ class ProjectDto(serializers.ModelSerializer):
         return obj.user.uuid
     
 
-class AIModelDto(serializers.ModelSerializer):
+class AIModelDto(LookupDtoMixin, ProjectedDtoMixin, serializers.ModelSerializer):
     user_uuid = serializers.SerializerMethodField()
+    related_field_list = ('user', )
+
     class Meta:
         model = AIModel
         fields = (
@@ -47,7 +93,7 @@ class AIModelDto(serializers.ModelSerializer):
     def get_user_uuid(self, obj):
         return obj.user.uuid
     
-class InferenceLogDto(serializers.ModelSerializer):
+class InferenceLogDto(ProjectedDtoMixin, serializers.ModelSerializer):
     project = ProjectDto()
     model = AIModelDto()
 
@@ -67,8 +113,8 @@ class InferenceLogDto(serializers.ModelSerializer):
         )
 
 
-class InternalFileDto(serializers.ModelSerializer):
-    project = ProjectDto()      # TODO: pass this as context to speed up the api
+class InternalFileDto(ProjectedDtoMixin, serializers.ModelSerializer):
+    project = ProjectDto()      # serialized once per request through the context lookup table
     inference_log = InferenceLogDto()
     class Meta:
         model = InternalFileObject
@@ -82,12 +128,14 @@ class InternalFileDto(serializers.ModelSerializer):
                 'inference_log', 
                 'project', 
                 'tag',
-                'shot_uuid'
+                'shot_uuid',
+                'source_file_uuid'
             )
 
 
-class BasicShotDto(serializers.ModelSerializer):
+class BasicShotDto(LookupDtoMixin, serializers.ModelSerializer):
     project = ProjectDto()
+    shot_idx = serializers.SerializerMethodField()
 
     class Meta:
         model = Shot
@@ -102,6 +150,9 @@ class BasicShotDto(serializers.ModelSerializer):
             "meta_data",
         )
 
+    def get_shot_idx(self, obj):
+        return get_shot_index(obj, self.context)
+
 
 class TimingDto(serializers.ModelSerializer):
     model = AIModelDto()
@@ -110,6 +161,7 @@ class TimingDto(serializers.ModelSerializer):
     canny_image = InternalFileDto()
     primary_image  = InternalFileDto()
     shot = BasicShotDto()
+    aux_frame_index = serializers.SerializerMethodField()
     
     class Meta:
         model = Timing
@@ -127,6 +179,10 @@ class TimingDto(serializers.ModelSerializer):
             "shot"
         )
 
+    def get_aux_frame_index(self, obj):
+        frame_index_dict = self.context.get('frame_index_dict', {})
+        return frame_index_dict[obj.uuid] if obj.uuid in frame_index_dict else obj.aux_frame_index
+
 
 class AppSettingDto(serializers.ModelSerializer):
     user = UserDto()
@@ -191,6 +247,7 @@ class ShotDto(serializers.ModelSerializer):
     interpolated_clip_list = serializers.SerializerMethodField()
     main_clip = InternalFileDto()
     project = ProjectDto()
+    shot_idx = serializers.SerializerMethodField()
 
     class Meta:
         model = Shot
@@ -207,14 +264,106 @@ class ShotDto(serializers.ModelSerializer):
             "main_clip"
         )
     
+    def get_shot_idx(self, obj):
+        return get_shot_index(obj, self.context)
+
+    # the timing_list in the context should have all the frames of the shot
     def get_timing_list(self, obj):
-        timing_list = self.context.get("timing_list", [])
-        timing_list = [TimingDto(timing).data for timing in timing_list if str(timing.shot.uuid) == str(obj.uuid)]
-        timing_list.sort(key=lambda x: x['aux_frame_index'])
-        return timing_list
+        timing_list = [timing for timing in self.context.get("timing_list", []) if timing.shot_id == obj.id]
+        self.context.setdefault('frame_index_dict', {}).update(get_frame_index_dict(timing_list))
+        timing_list.sort(key=lambda timing: self.context['frame_index_dict'][timing.uuid])
+        return [TimingDto(timing, context=self.context).data for timing in timing_list]
     
+    # clips can be passed in the context as 'interpolated_clip_list' (fetched for all the shots at once)
     def get_interpolated_clip_list(self, obj):
         id_list = json.loads(obj.interpolated_clip_list) if obj.interpolated_clip_list else []
-        file_list = InternalFileObject.objects.filter(uuid__in=id_list, is_disabled=False).all()
-        return [InternalFileDto(file).data for file in file_list]
+        if 'interpolated_clip_list' in self.context:
+            id_list = [str(file_uuid) for file_uuid in id_list]
+            file_list = [file for file in self.context['interpolated_clip_list'] if str(file.uuid) in id_list]
+        else:
+            file_list = select_dto_related(InternalFileObject.objects.filter(uuid__in=id_list, is_disabled=False), InternalFileDto)
+        
+        return [InternalFileDto(file, context=self.context).data for file in file_list]
+
+
+# frames and shots are stored with sparse order keys, their dense positions are computed here. the serializers
+# of the lists get them in the context as 'frame_index_dict'/'shot_index_dict' ({uuid: idx}) instead of counting
+# them for every object. the lists should have all the frames of the shots/all the shots of the projects
+def get_frame_index_dict(timing_list):
+    res, frame_count = {}, {}
+    for timing in sorted(timing_list, key=lambda timing: (timing.shot_id or 0, timing.frame_order, timing.id or 0)):
+        res[timing.uuid] = frame_count.get(timing.shot_id, 0)
+        frame_count[timing.shot_id] = res[timing.uuid] + 1
+    
+    return res
+
+def get_shot_index_dict(shot_list):
+    res, shot_count = {}, {}
+    for shot in sorted(shot_list, key=lambda shot: (shot.project_id, shot.shot_order, shot.id)):
+        res[shot.uuid] = shot_count.get(shot.project_id, 0) + 1
+        shot_count[shot.project_id] = res[shot.uuid]
+    
+    return res
+
+# context with the indexes of the given frames and shots (and of the shots of the frames). their siblings
+# are fetched in a query each, so single objects are serialized without the count based index properties
+def get_index_context(timing_list=(), shot_list=()):
+    context = {}
+    shot_id_list = {timing.shot_id for timing in timing_list if timing.shot_id}
+    if len(shot_id_list):
+        sibling_list = Timing.objects.filter(shot_id__in=shot_id_list, is_disabled=False).only('uuid', 'shot_id', 'frame_order')
+        context['frame_index_dict'] = get_frame_index_dict(sibling_list)
+    
+    project_id_list = {shot.project_id for shot in shot_list} | \
+        {timing.shot.project_id for timing in timing_list if timing.shot_id}
+    if len(project_id_list):
+        # Shot.__init__ reads the duration
+        sibling_list = Shot.objects.filter(project_id__in=project_id_list, is_disabled=False)\
+            .only('uuid', 'project_id', 'shot_order', 'duration')
+        context['shot_index_dict'] = get_shot_index_dict(sibling_list)
+    
+    return context
+
+def get_shot_index(shot, context):
+    shot_index_dict = context.get('shot_index_dict', {})
+    return shot_index_dict[shot.uuid] if shot.uuid in shot_index_dict else shot.shot_idx
+
+
+# select_related paths of all the nested dtos (and their related_field_list), so that a queryset
+# is serialized without firing a query for every related object
+@lru_cache(maxsize=None)
+def get_dto_related_field_list(dto_class, prefix=''):
+    res = [prefix + field_name for field_name in getattr(dto_class, 'related_field_list', ())]
+    for field_name, field in dto_class._declared_fields.items():
+        if isinstance(field, serializers.ModelSerializer):
+            res.append(prefix + field_name)
+            res.extend(get_dto_related_field_list(field.__class__, prefix + field_name + '__'))
+
+    return tuple(res)
+
+# related paths and the model fields read by a (projected) dto instance
+def get_dto_projection(dto, prefix=''):
+    related_field_list = [prefix + field_name for field_name in getattr(dto, 'related_field_list', ())]
+    # fields read in the model's __init__ can't be deferred
+    only_field_list = [prefix + field_name for field_name in getattr(dto.Meta.model, 'init_field_list', ())]
+    only_field_list.extend(related_field_list)
+    for field in dto.fields.values():
+        if isinstance(field, serializers.ModelSerializer):
+            related_field_list.append(prefix + field.source)
+            only_field_list.append(prefix + field.source)
+            nested_related_field_list, nested_only_field_list = get_dto_projection(field, prefix + field.source + '__')
+            related_field_list.extend(nested_related_field_list)
+            only_field_list.extend(nested_only_field_list)
+        elif not isinstance(field, serializers.SerializerMethodField) and field.source != '*':
+            only_field_list.append(prefix + field.source)
+
+    return related_field_list, only_field_list
+
+# for the dtos projected to 'fields' only the output fields are loaded (the rest are deferred)
+def select_dto_related(queryset, dto_class, fields=None):
+    if fields is None:
+        return queryset.select_related(*get_dto_related_field_list(dto_class))
+
+    related_field_list, only_field_list = get_dto_projection(dto_class(fields=fields))
+    return queryset.select_related(*related_field_list).only(*only_field_list)
         
\ No newline at end of file
@@ -0,0 +1,61 @@
+import uuid
+
+
+class UUIDResolver:
+    '''
+    resolves the uuids sent by the app to primary keys. the lookups of a model are batched in a single
+    IN query and the resolved ids (and the misses) are memoized for the lifetime of the resolver,
+    so a resolver is created per request
+    '''
+    def __init__(self):
+        self._id_dict = {}      # {model: {uuid: id}}, id is None for the invalid uuids
+
+    @staticmethod
+    def _normalize(value):
+        try:
+            return str(uuid.UUID(str(value)))
+        except ValueError:
+            return None
+
+    # fetches the ids of the uuids that are not resolved yet
+    def prefetch(self, model, uuid_list):
+        id_dict = self._id_dict.setdefault(model, {})
+        uuid_list = set(self._normalize(value) for value in uuid_list if value) - set(id_dict.keys())
+        uuid_list.discard(None)
+        if not len(uuid_list):
+            return
+
+        # values_list, as some models access their fields in __init__ (they can't be deferred)
+        fetched_dict = dict(model.objects.filter(uuid__in=uuid_list, is_disabled=False).values_list('uuid', 'id'))
+        fetched_dict = {str(k): v for k, v in fetched_dict.items()}
+        for value in uuid_list:
+            id_dict[value] = fetched_dict.get(value, None)
+
+    def get_id(self, model, value):
+        self.prefetch(model, [value])
+        return self._id_dict[model].get(self._normalize(value), None)
+
+    def resolve(self, data_list, field_model_dict):
+        '''
+        replaces the uuids of the fields in field_model_dict ({field: model}) with the ids, in every dict of data_list.
+        empty fields are left as it is. returns the first field with an invalid uuid (None if all of them are valid)
+        '''
+        model_uuid_dict = {}
+        for data in data_list:
+            for field, model in field_model_dict.items():
+                if data.get(field, None):
+                    model_uuid_dict.setdefault(model, []).append(data[field])
+
+        for model, uuid_list in model_uuid_dict.items():
+            self.prefetch(model, uuid_list)
+
+        for data in data_list:
+            for field, model in field_model_dict.items():
+                if data.get(field, None):
+                    resolved_id = self._id_dict[model].get(self._normalize(data[field]), None)
+                    if resolved_id is None:
+                        return field
+
+                    data[field] = resolved_id
+
+        return None
@@ -1,3 +1,4 @@
+import datetime
 import json
 import os
 import shutil
@@ -9,21 +10,27 @@ import psutil
 import requests
 import socket
 import platform
+import threading
 import traceback
 import sentry_sdk
 import setproctitle
+from concurrent.futures import ThreadPoolExecutor
+from django.db import close_old_connections, transaction
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 import django
-from shared.constants import COMFY_PORT, LOCAL_DATABASE_NAME, OFFLINE_MODE, InferenceParamType, InferenceStatus, InferenceType, ProjectMetaData, HOSTED_BACKGROUND_RUNNER_MODE
+from shared.constants import COMFY_PORT, GPU_MAX_IN_FLIGHT, LOCAL_DATABASE_NAME, OFFLINE_MODE, REPLICATE_WEBHOOK_ENABLED, InferenceParamType, InferenceStatus, InferenceType, InternalFileTag, InternalFileType, ProjectChangeType, HOSTED_BACKGROUND_RUNNER_MODE
 from shared.logging.constants import LoggingType
 from shared.logging.logging import app_logger
 from ui_components.methods.file_methods import load_from_env, save_to_env
-from utils.common_utils import acquire_lock, release_lock
 from utils.data_repo.data_repo import DataRepo
 from utils.ml_processor.constants import replicate_status_map
+from utils.ml_processor.job_pool import ProjectJobPool
+from utils.ml_processor.replicate.webhook import start_webhook_server
 
-from utils.constants import RUNNER_PROCESS_NAME, RUNNER_PROCESS_PORT, AUTH_TOKEN, REFRESH_AUTH_TOKEN
-from utils.ml_processor.gpu.utils import is_comfy_runner_present, predict_gpu_output, setup_comfy_runner
+from utils.constants import RUNNER_PROCESS_NAME, RUNNER_PROCESS_PORT, AUTH_TOKEN, REFRESH_AUTH_TOKEN, RUNNER_WEBHOOK_PORT
+from utils.ml_processor.gpu.job_queue import GPUJobQueue
+from utils.ml_processor.gpu.utils import interrupt_gpu_prediction, is_comfy_runner_present, predict_gpu_output, setup_comfy_runner
 
 
 load_dotenv()
@@ -36,6 +43,24 @@ SERVER = os.getenv('SERVER', 'development')
 REFRESH_FREQUENCY = 2   # refresh every 2 seconds
 MAX_APP_RETRY_CHECK = 3  # if the app is not running after 3 retries then the script will stop
 
+REPLICATE_POLL_WORKERS = 8      # max concurrent status requests to replicate
+REPLICATE_REQUEST_TIMEOUT = 10
+# (initial, max) seconds between two status checks of a prediction, based on the status replicate reports.
+# the interval doubles for every check in which the status stays the same
+REPLICATE_POLL_INTERVAL = {
+    "starting": (4, 30),        # model is booting up, can take minutes on a cold start
+    "processing": (2, 10),
+}
+REPLICATE_ERROR_POLL_INTERVAL = (4, 60)     # failed requests/rate limiting
+# with webhooks enabled, predictions are only polled at this interval to reconcile missed callbacks
+REPLICATE_WEBHOOK_RECONCILE_INTERVAL = 60
+WEBHOOK_RESULT_EXPIRY = 5 * 60      # results of predictions whose log is not pending are dropped after this
+OUTPUT_PROCESSING_WORKERS = 4       # max logs whose output (files, videos..) is being processed in parallel
+CHANGE_EVENT_RETENTION = 24 * 60 * 60     # secs, app sessions which haven't synced since then reload the whole project
+CHANGE_EVENT_PRUNE_INTERVAL = 60 * 60
+PREVIEW_WORKERS = 2                 # max videos whose previews/posters are being created in parallel
+PREVIEW_SCAN_INTERVAL = 10          # secs
+
 TERMINATE_SCRIPT = False
 
 # sentry init
@@ -63,6 +88,32 @@ def handle_termination(signal, frame):
 
 signal.signal(signal.SIGTERM, handle_termination)
 
+# pooled connections (keep-alive) for the status calls, shared by the poll threads
+replicate_session = requests.Session()
+replicate_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=REPLICATE_POLL_WORKERS))
+poll_executor = ThreadPoolExecutor(max_workers=REPLICATE_POLL_WORKERS)
+prediction_poll_dict = {}       # {prediction_id: {"status": str, "interval": float, "next_poll": float}}
+
+# results received through the webhook (on the server threads), consumed by the next cycle of the main loop
+webhook_lock = threading.Lock()
+webhook_event = threading.Event()   # set on every callback to start the next cycle right away
+webhook_result_dict = {}            # {prediction_id: (received_on, result)}
+
+# outputs of the completed logs are processed in this pool (one log at a time per project), keyed by the log uuid
+output_pool = ProjectJobPool(OUTPUT_PROCESSING_WORKERS)
+
+# these items will updated in the cache when the app refreshes the next time (filled by the output pool)
+cache_update_lock = threading.Lock()
+timing_update_list = {}     # {project_id: [timing_uuids]}
+gallery_update_list = {}    # {project_id: True/False}
+shot_update_list = {}       # {project_id: [shot_uuids]}
+last_event_prune_time = 0
+
+# previews of the videos are created in the background
+preview_pool = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS)
+last_preview_scan_id = 0        # videos up to this id have been scanned (failed ones are not retried)
+last_preview_scan_time = 0
+
 def main():
     if SERVER != 'development' and HOSTED_BACKGROUND_RUNNER_MODE in [False, 'False']:
         return
@@ -76,6 +127,9 @@ def main():
         server_socket.bind(("localhost", RUNNER_PROCESS_PORT))
         server_socket.listen(1)
     
+    if REPLICATE_WEBHOOK_ENABLED:
+        start_webhook_server(RUNNER_WEBHOOK_PORT, on_webhook_result)
+
     print('runner running')
     while True:
         if TERMINATE_SCRIPT:
@@ -92,7 +146,9 @@ def main():
             else:
                 retries = min(retries + 1, MAX_APP_RETRY_CHECK)
         
-        time.sleep(REFRESH_FREQUENCY)
+        # waking up early if a prediction completed
+        webhook_event.wait(REFRESH_FREQUENCY)
+        webhook_event.clear()
         if HOSTED_BACKGROUND_RUNNER_MODE not in [False, 'False']:
             validate_admin_auth_token()
         check_and_update_db()
@@ -183,6 +239,64 @@ def stop_server(self, port):
             process.terminate()
             process.wait()
 
+def is_prediction_due(prediction_id):
+    poll_data = prediction_poll_dict.get(prediction_id, None)
+    return not poll_data or poll_data['next_poll'] <= time.time()
+
+# backing off the checks of a prediction while its status doesn't change (status None -> request failed)
+def schedule_next_poll(prediction_id, status):
+    if status in ["succeeded", "failed", "canceled"]:
+        prediction_poll_dict.pop(prediction_id, None)
+        return
+
+    initial_interval, max_interval = REPLICATE_POLL_INTERVAL.get(status, REPLICATE_ERROR_POLL_INTERVAL)
+    poll_data = prediction_poll_dict.get(prediction_id, None)
+    interval = min(poll_data['interval'] * 2, max_interval) \
+        if poll_data and poll_data['status'] == status else initial_interval
+    if REPLICATE_WEBHOOK_ENABLED:
+        interval = max(interval, REPLICATE_WEBHOOK_RECONCILE_INTERVAL)
+    prediction_poll_dict[prediction_id] = {"status": status, "interval": interval, "next_poll": time.time() + interval}
+
+def on_webhook_result(result):
+    if not (isinstance(result, dict) and result.get('id', None) and result.get('status', None)):
+        return
+
+    with webhook_lock:
+        webhook_result_dict[result['id']] = (time.time(), result)
+    webhook_event.set()
+
+# returns {prediction_id: result} of the given predictions, received through the webhook
+def pop_webhook_result_list(prediction_id_list):
+    res = {}
+    with webhook_lock:
+        for prediction_id in prediction_id_list:
+            if prediction_id in webhook_result_dict:
+                res[prediction_id] = webhook_result_dict.pop(prediction_id)[1]
+
+        for prediction_id in [k for k, v in webhook_result_dict.items() if v[0] + WEBHOOK_RESULT_EXPIRY < time.time()]:
+            del webhook_result_dict[prediction_id]
+
+    return res
+
+def fetch_replicate_prediction(prediction_id, replicate_key):
+    url = "https://api.replicate.com/v1/predictions/" + prediction_id
+    headers = {
+        "Authorization": f"Token {replicate_key}"
+    }
+
+    try:
+        response = replicate_session.get(url, headers=headers, timeout=REPLICATE_REQUEST_TIMEOUT)
+    except Exception as e:
+        sentry_sdk.capture_exception(e)
+        return None
+
+    if response.status_code in [200, 201]:
+        return response.json()
+    
+    app_logger.log(LoggingType.DEBUG, f"Error: {response.content}")
+    sentry_sdk.capture_exception(response.content)
+    return None
+
 def check_and_update_db():
     # print("updating logs")
     from backend.models import InferenceLog, AppSetting, User
@@ -211,32 +325,45 @@ def check_and_update_db():
     log_list = InferenceLog.objects.filter(status__in=[InferenceStatus.QUEUED.value, InferenceStatus.IN_PROGRESS.value],
                                            is_disabled=False).all()
     
-    # these items will updated in the cache when the app refreshes the next time
-    timing_update_list = {}     # {project_id: [timing_uuids]}
-    gallery_update_list = {}    # {project_id: True/False}
-    shot_update_list = {}       # {project_id: [shot_uuids]}
+    # parsing the params only once per log (skipping the logs whose output is already being processed)
+    log_data_list = [(log, json.loads(log.input_params)) for log in log_list if not output_pool.is_pending(str(log.uuid))]
 
-    for log in log_list:
-        input_params = json.loads(log.input_params)
+    replicate_log_list = []     # [(log_id, prediction_id)]
+    for log, input_params in log_data_list:
+        replicate_data = input_params.get(InferenceParamType.REPLICATE_INFERENCE.value, None)
+        if replicate_data:
+            replicate_log_list.append((log.id, replicate_data['prediction_id']))
+
+    # predictions completed through the webhook don't need a status check
+    webhook_result_list = pop_webhook_result_list([prediction_id for _, prediction_id in replicate_log_list])
+    prediction_result_dict = {log_id: webhook_result_list[prediction_id] for log_id, prediction_id in replicate_log_list \
+                              if prediction_id in webhook_result_list}
+
+    # fetching the status of all the predictions due for a check concurrently
+    prediction_list = [(log_id, prediction_id) for log_id, prediction_id in replicate_log_list \
+                       if log_id not in prediction_result_dict and is_prediction_due(prediction_id)]
+    result_list = poll_executor.map(lambda data: fetch_replicate_prediction(data[1], replicate_key), prediction_list)
+    prediction_result_dict.update({log_id: result for (log_id, _), result in zip(prediction_list, result_list)})
+
+    # removing the predictions which are no longer pending
+    active_prediction_list = [prediction_id for _, prediction_id in replicate_log_list]
+    for prediction_id in [p for p in prediction_poll_dict if p not in active_prediction_list]:
+        del prediction_poll_dict[prediction_id]
+
+    gpu_job_list = []           # [(log, gpu_data)]
+    status_update_list = []     # [(log_id, update_data)] written together at the end of the cycle
+    for log, input_params in log_data_list:
         replicate_data = input_params.get(InferenceParamType.REPLICATE_INFERENCE.value, None)
         local_gpu_data = input_params.get(InferenceParamType.GPU_INFERENCE.value, None)
         if replicate_data:
             prediction_id = replicate_data['prediction_id']
+            if log.id not in prediction_result_dict:
+                # not due for a check in this cycle
+                continue
 
-            url = "https://api.replicate.com/v1/predictions/" + prediction_id
-            headers = {
-                "Authorization": f"Token {replicate_key}"
-            }
-
-            try:
-                response = requests.get(url, headers=headers)
-            except Exception as e:
-                sentry_sdk.capture_exception(e)
-                response = None
-
-            if response and response.status_code in [200, 201]:
-                # print("response: ", response)
-                result = response.json()
+            result = prediction_result_dict[log.id]
+            schedule_next_poll(prediction_id, result['status'] if result else None)
+            if result:
                 log_status = replicate_status_map[result['status']] if result['status'] in replicate_status_map else InferenceStatus.IN_PROGRESS.value
                 output_details = json.loads(log.output_details)
                 
@@ -253,110 +380,232 @@ def check_and_update_db():
                         if 'metrics' in result and result['metrics'] and 'predict_time' in result['metrics']:
                             update_data['total_inference_time'] = float(result['metrics']['predict_time'])
 
-                        InferenceLog.objects.filter(id=log.id).update(**update_data)
-                        origin_data = json.loads(log.input_params).get(InferenceParamType.ORIGIN_DATA.value, {})
-                        if origin_data and log_status == InferenceStatus.COMPLETED.value:
-                            from ui_components.methods.common_methods import process_inference_output
-
-                            try:
-                                origin_data['output'] = output_details['output']
-                                origin_data['log_uuid'] = log.uuid
-                                print("processing inference output")
-                                process_inference_output(**origin_data)
-                                timing_uuid, shot_uuid = origin_data.get('timing_uuid', None), origin_data.get('shot_uuid', None)
-                                update_cache_dict(origin_data.get('inference_type', ""), log, timing_uuid, shot_uuid, timing_update_list, shot_update_list, gallery_update_list)
-
-                            except Exception as e:
-                                app_logger.log(LoggingType.ERROR, f"Error: {e}")
-                                output_details['error'] = str(e)
-                                InferenceLog.objects.filter(id=log.id).update(status=InferenceStatus.FAILED.value, output_details=json.dumps(output_details))
-                                sentry_sdk.capture_exception(e)
+                        submit_log_output(log, update_data)
 
                     else:
                         log_status = InferenceStatus.FAILED.value
-                        InferenceLog.objects.filter(id=log.id).update(status=log_status, output_details=json.dumps(output_details))
+                        status_update_list.append((log.id, {"status": log_status, "output_details": json.dumps(output_details)}))
                 
-                else:
-                    InferenceLog.objects.filter(id=log.id).update(status=log_status)
-            else:
-                if response:
-                    app_logger.log(LoggingType.DEBUG, f"Error: {response.content}")
-                    sentry_sdk.capture_exception(response.content)
+                elif log_status != log.status:
+                    status_update_list.append((log.id, {"status": log_status}))
         elif local_gpu_data:
-            data = json.loads(local_gpu_data)
-            try:
-                setup_comfy_runner()
-                
-                # fetching the current status again (as this could have been cancelled)
-                log = InferenceLog.objects.filter(id=log.id).first()
-                cur_status = log.status
-                if cur_status in [InferenceStatus.FAILED.value, InferenceStatus.CANCELED.value]:
-                    return
-                
-                InferenceLog.objects.filter(id=log.id).update(status=InferenceStatus.IN_PROGRESS.value)
-                start_time = time.time()
-                output = predict_gpu_output(data['workflow_input'], data['file_path_list'], \
-                    data['output_node_ids'], data.get("extra_model_list", []), data.get("ignore_model_list", []))
-                end_time = time.time()
-
-                output = output[-1]     # TODO: different models can have different logic
-                destination_path = "./videos/temp/" + str(uuid.uuid4()) + "." + output.split(".")[-1]
-                shutil.copy2("./output/" + output, destination_path)
-                output_details = json.loads(log.output_details)
-                output_details['output'] = destination_path
-                update_data = {
-                    "status" : InferenceStatus.COMPLETED.value,
-                    "output_details" : json.dumps(output_details),
-                    "total_inference_time" : end_time - start_time,
-                }
-
-                InferenceLog.objects.filter(id=log.id).update(**update_data)
-                origin_data = json.loads(log.input_params).get(InferenceParamType.ORIGIN_DATA.value, {})
-                origin_data['output'] = destination_path
-                origin_data['log_uuid'] = log.uuid
-                print("processing inference output")
-
-                from ui_components.methods.common_methods import process_inference_output
-                process_inference_output(**origin_data)
-                timing_uuid, shot_uuid = origin_data.get('timing_uuid', None), origin_data.get('shot_uuid', None)
-                update_cache_dict(origin_data.get('inference_type', ''), log, timing_uuid, shot_uuid, timing_update_list, shot_update_list, gallery_update_list)
-
-            except Exception as e:
-                print("error occured: ", str(e))
-                # sentry_sdk.capture_exception(e)
-                traceback.print_exc()
-                InferenceLog.objects.filter(id=log.id).update(status=InferenceStatus.FAILED.value)
+            gpu_job_list.append((log, json.loads(local_gpu_data)))
         else:
             # if replicate/gpu data is not present then removing the status
-            InferenceLog.objects.filter(id=log.id).update(status="")
+            status_update_list.append((log.id, {"status": ""}))
+
+    flush_status_updates(status_update_list)
+
+    # local gpu jobs run in the background, replicate logs keep being polled meanwhile
+    gpu_queue.sync(gpu_job_list)
+    flush_cache_updates()
+    queue_video_previews()
 
-    # adding update_data in the project
-    from backend.models import Project
+    if not len(log_list):
+        # app_logger.log(LoggingType.DEBUG, f"No logs found")
+        pass
+
+    return
+
+# writes the status updates of a cycle in a single transaction, logs with the same update share a single query.
+# only the pending logs are updated (a log can be canceled from the app meanwhile)
+def flush_status_updates(status_update_list):
+    from backend.models import InferenceLog
+
+    if not len(status_update_list):
+        return
+
+    update_dict = {}        # {update_data json: [log_id]}
+    for log_id, update_data in status_update_list:
+        update_dict.setdefault(json.dumps(update_data, sort_keys=True), []).append(log_id)
 
-    final_res = {}
-    for project_uuid, val in timing_update_list.items():
-        final_res[project_uuid] = {ProjectMetaData.DATA_UPDATE.value: list(set(val))}
+    with transaction.atomic():
+        for update_data, log_id_list in update_dict.items():
+            InferenceLog.objects.filter(id__in=log_id_list, status__in=[InferenceStatus.QUEUED.value, InferenceStatus.IN_PROGRESS.value]) \
+                .update(**json.loads(update_data))
 
-    for project_uuid, val in gallery_update_list.items():
-        if project_uuid not in final_res:
-            final_res[project_uuid] = {}
+# runs a local gpu job (in the gpu queue's threads)
+def run_gpu_job(log, data):
+    from backend.models import InferenceLog
+
+    close_old_connections()
+    try:
+        setup_comfy_runner()
         
-        final_res[project_uuid].update({f"{ProjectMetaData.GALLERY_UPDATE.value}": val})
+        # claiming the job (it could have been canceled meanwhile)
+        pending_status_list = [InferenceStatus.QUEUED.value, InferenceStatus.IN_PROGRESS.value]
+        if not InferenceLog.objects.filter(id=log.id, status__in=pending_status_list, is_disabled=False)\
+                .update(status=InferenceStatus.IN_PROGRESS.value):
+            return
+        
+        start_time = time.time()
+        output = predict_gpu_output(data['workflow_input'], data['file_path_list'], \
+            data['output_node_ids'], data.get("extra_model_list", []), data.get("ignore_model_list", []))
+        end_time = time.time()
+
+        output = output[-1]     # TODO: different models can have different logic
+        destination_path = "./videos/temp/" + str(uuid.uuid4()) + "." + output.split(".")[-1]
+        shutil.copy2("./output/" + output, destination_path)
+        output_details = json.loads(log.output_details)
+        output_details['output'] = destination_path
+        update_data = {
+            "status" : InferenceStatus.COMPLETED.value,
+            "output_details" : json.dumps(output_details),
+            "total_inference_time" : end_time - start_time,
+        }
+
+        # the output of a canceled job is discarded when the output pool fails to claim the log
+        submit_log_output(log, update_data)
 
-    for project_uuid, val in shot_update_list.items():
-        final_res[project_uuid] = {ProjectMetaData.SHOT_VIDEO_UPDATE.value: list(set(val))}
+    except Exception as e:
+        print("error occured: ", str(e))
+        # sentry_sdk.capture_exception(e)
+        traceback.print_exc()
+        InferenceLog.objects.filter(id=log.id, status__in=[InferenceStatus.QUEUED.value, InferenceStatus.IN_PROGRESS.value])\
+            .update(status=InferenceStatus.FAILED.value)
+    finally:
+        close_old_connections()
+
+def cancel_gpu_job(log_id, is_only_running_job):
+    # comfy executes one prompt at a time and the interrupt stops whichever is being executed, so it is only
+    # sent when no other job is running. otherwise the canceled job is allowed to finish and its output is dropped
+    if is_only_running_job:
+        interrupt_gpu_prediction()
+
+def submit_log_output(log, update_data):
+    output_pool.submit(str(log.uuid), log.project_id, lambda: process_log_output(log.id, update_data))
+
+# completes the log and processes its output (runs in the output pool)
+def process_log_output(log_id, update_data):
+    from backend.models import InferenceLog
+    from ui_components.methods.common_methods import process_inference_output
+
+    close_old_connections()
+    # the log's status transition works as the idempotency key: only a pending log can be claimed, so its
+    # output is never processed twice (e.g. canceled meanwhile or the runner restarted after processing)
+    claimed = InferenceLog.objects.filter(id=log_id, is_disabled=False, \
+                                          status__in=[InferenceStatus.QUEUED.value, InferenceStatus.IN_PROGRESS.value]).update(**update_data)
+    if not claimed:
+        return
+    
+    log = InferenceLog.objects.filter(id=log_id).first()
+    origin_data = json.loads(log.input_params).get(InferenceParamType.ORIGIN_DATA.value, {})
+    if not origin_data:
+        return
     
+    output_details = json.loads(update_data['output_details'])
+    try:
+        origin_data['output'] = output_details['output']
+        origin_data['log_uuid'] = log.uuid
+        print("processing inference output")
+        process_inference_output(**origin_data)
+        timing_uuid, shot_uuid = origin_data.get('timing_uuid', None), origin_data.get('shot_uuid', None)
+        with cache_update_lock:
+            update_cache_dict(origin_data.get('inference_type', ""), log, timing_uuid, shot_uuid, timing_update_list, shot_update_list, gallery_update_list)
 
-    for project_uuid, val in final_res.items():
-        key = str(project_uuid)
-        if acquire_lock(key):
-            _ = Project.objects.filter(uuid=project_uuid).update(meta_data=json.dumps(val))
-            release_lock(key)
+    except Exception as e:
+        app_logger.log(LoggingType.ERROR, f"Error: {e}")
+        output_details['error'] = str(e)
+        InferenceLog.objects.filter(id=log.id).update(status=InferenceStatus.FAILED.value, output_details=json.dumps(output_details))
+        sentry_sdk.capture_exception(e)
+    finally:
+        close_old_connections()
+
+# appending the cache updates (collected since the last cycle) in the change events of the projects
+def flush_cache_updates():
+    from backend.models import Project, ProjectChangeEvent
+
+    with cache_update_lock:
+        change_list = []    # [(project_uuid, change_type, entity_uuid)]
+        for project_uuid, val in timing_update_list.items():
+            change_list.extend((project_uuid, ProjectChangeType.TIMING_UPDATE.value, timing_uuid) for timing_uuid in set(val))
+
+        for project_uuid, val in gallery_update_list.items():
+            if val:
+                change_list.append((project_uuid, ProjectChangeType.GALLERY_UPDATE.value, ""))
+
+        for project_uuid, val in shot_update_list.items():
+            change_list.extend((project_uuid, ProjectChangeType.SHOT_VIDEO_UPDATE.value, shot_uuid) for shot_uuid in set(val))
+        
+        timing_update_list.clear()
+        gallery_update_list.clear()
+        shot_update_list.clear()
+
+    if len(change_list):
+        try:
+            project_id_dict = dict(Project.objects.filter(uuid__in=set(c[0] for c in change_list)).values_list('uuid', 'id'))
+            project_id_dict = {str(k): v for k, v in project_id_dict.items()}
+            ProjectChangeEvent.objects.bulk_create([
+                ProjectChangeEvent(project_id=project_id_dict[project_uuid], change_type=change_type, entity_uuid=str(entity_uuid or ""))
+                for project_uuid, change_type, entity_uuid in change_list if project_uuid in project_id_dict
+            ])
+        except Exception as e:
+            # retrying in the next cycle
+            app_logger.log(LoggingType.ERROR, f"Error adding the change events: {e}")
+            requeue_cache_updates(change_list)
+
+    prune_change_events()
+
+def requeue_cache_updates(change_list):
+    with cache_update_lock:
+        for project_uuid, change_type, entity_uuid in change_list:
+            if change_type == ProjectChangeType.TIMING_UPDATE.value:
+                timing_update_list.setdefault(project_uuid, []).append(entity_uuid)
+            elif change_type == ProjectChangeType.GALLERY_UPDATE.value:
+                gallery_update_list[project_uuid] = True
+            elif change_type == ProjectChangeType.SHOT_VIDEO_UPDATE.value:
+                shot_update_list.setdefault(project_uuid, []).append(entity_uuid)
+
+# submits the videos added since the last scan (all of them on the first one) in the preview pool, if they don't
+# have a preview yet
+def queue_video_previews():
+    from backend.models import InternalFileObject
+    global last_preview_scan_time, last_preview_scan_id
+
+    if time.time() - last_preview_scan_time < PREVIEW_SCAN_INTERVAL:
+        return
+    
+    last_preview_scan_time = time.time()
+    video_list = list(InternalFileObject.objects.filter(id__gt=last_preview_scan_id, type=InternalFileType.VIDEO.value, \
+        source_file_uuid="", is_disabled=False).order_by('id').values_list('id', 'uuid'))
+    if not len(video_list):
+        return
+    
+    last_preview_scan_id = video_list[-1][0]
+    video_uuid_list = [str(video_uuid) for _, video_uuid in video_list]
+    processed_uuid_list = set(InternalFileObject.objects.filter(tag=InternalFileTag.PREVIEW_VIDEO.value, \
+        source_file_uuid__in=video_uuid_list, is_disabled=False).values_list('source_file_uuid', flat=True))
+    for video_uuid in video_uuid_list:
+        if video_uuid not in processed_uuid_list:
+            preview_pool.submit(create_preview, video_uuid)
 
-    if not len(log_list):
-        # app_logger.log(LoggingType.DEBUG, f"No logs found")
-        pass
+def create_preview(video_uuid):
+    from ui_components.methods.video_methods import create_video_preview
 
-    return
+    try:
+        video_file = DataRepo().get_file_from_uuid(video_uuid)
+        if video_file:
+            create_video_preview(video_file)
+    except Exception as e:
+        app_logger.log(LoggingType.ERROR, f"Error creating the preview of {video_uuid}: {e}")
+    finally:
+        close_old_connections()
+
+# deleting the old change events, the latest one is kept so that the sequence numbers keep increasing
+def prune_change_events():
+    from backend.models import ProjectChangeEvent
+    global last_event_prune_time
+
+    if time.time() - last_event_prune_time < CHANGE_EVENT_PRUNE_INTERVAL:
+        return
+    
+    last_event_prune_time = time.time()
+    last_seq = ProjectChangeEvent.objects.order_by('-id').values_list('id', flat=True).first()
+    if last_seq:
+        expired_on = datetime.datetime.now() - datetime.timedelta(seconds=CHANGE_EVENT_RETENTION)
+        ProjectChangeEvent.objects.filter(id__lt=last_seq, created_on__lt=expired_on).delete()
+
+# local gpu jobs (run in the background while the replicate logs are being polled)
+gpu_queue = GPUJobQueue(GPU_MAX_IN_FLIGHT, run_gpu_job, cancel_gpu_job)
 
-main()
\ No newline at end of file
+main()
@@ -7,7 +7,7 @@ sys.path.append('../')
 
 from dotenv import load_dotenv
 
-from shared.constants import HOSTED_BACKGROUND_RUNNER_MODE, LOCAL_DATABASE_NAME, SERVER, ServerType
+from shared.constants import HOSTED_BACKGROUND_RUNNER_MODE, LOCAL_DATABASE_NAME, SQLITE_BUSY_TIMEOUT, SERVER, ServerType
 
 
 load_dotenv()
@@ -20,10 +20,15 @@ else:
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 if HOSTED_BACKGROUND_RUNNER_MODE in [False, 'False']:
+    # the app and the runner write to the same file, WAL and synchronous are set on connect (backend/apps.py)
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': DB_LOCATION,
+            'CONN_MAX_AGE': None,       # connections are kept open (one per thread)
+            'OPTIONS': {
+                'timeout': SQLITE_BUSY_TIMEOUT,
+            },
         }
     }
 else:
@@ -0,0 +1,136 @@
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_settings")
+
+
+'''
+helpers shared by the benchmark scripts. the scripts run against a fresh (migrated) test database,
+the local database is never touched. run them from the repo root, e.g. python scripts/benchmarks/reorder.py
+'''
+def setup_db(db_path=None):
+    '''
+    creates the test database, in memory by default. pass db_path for a file database (e.g. when it's
+    written from several threads, WAL only applies to files)
+    '''
+    import django
+    django.setup()
+
+    from django.db import connection
+    if db_path:
+        connection.settings_dict['TEST']['NAME'] = db_path
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    # marking the DBRepo singleton as initialized, so that it doesn't create/migrate the local database
+    from backend.db_repo import DBRepo
+    DBRepo.__new__(DBRepo)._initialized = True
+
+def create_project(name="benchmark"):
+    from backend.models import Project, User
+
+    user = User.objects.create(name=name, email=f"{name}@banodoco.ai")
+    return Project.objects.create(name=name, user=user)
+
+def create_shot(project, frame_count, with_images=True):
+    '''
+    creates a shot with frame_count frames (with a primary image each if with_images is True), the frames
+    are bulk created with evenly spaced order keys
+    '''
+    from backend.models import ORDER_KEY_GAP, InternalFileObject, Shot, Timing
+
+    shot = Shot.objects.create(name=f"shot_{frame_count}", project=project, duration=2.5)
+    timing_list = []
+    for i in range(frame_count):
+        image = None
+        if with_images:
+            image = InternalFileObject.objects.create(name=f"frame_{i}.png", type="image", project=project, \
+                                                      local_path=f"videos/benchmark/frame_{i}.png")
+        timing_list.append(Timing(shot=shot, primary_image=image, frame_order=(i + 1) * ORDER_KEY_GAP))
+
+    Timing.objects.bulk_create(timing_list)
+    return shot
+
+# runs fn inside CaptureQueriesContext, returns (result, query count, time taken in ms)
+def measure(fn):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as ctx:
+        start_time = time.perf_counter()
+        res = fn()
+        time_taken = (time.perf_counter() - start_time) * 1000
+    
+    return res, len(ctx.captured_queries), time_taken
+
+
+class StubServer:
+    '''
+    local http server (with keep-alive) for benchmarking the http clients. respond(method, path, body) returns
+    (status code, json data) and every response is delayed by latency secs. counts the requests and the connections
+    '''
+    def __init__(self, respond, latency=0):
+        self.respond = respond
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.connection_count = 0
+        self.server = ThreadingHTTPServer(('localhost', 0), self._get_handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        return f"http://localhost:{self.server.server_address[1]}"
+
+    def _get_handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                # the headers and the body are sent separately, nagle would hold the body for the client's ack
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with stub.lock:
+                    stub.connection_count += 1
+
+            def handle_request(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                with stub.lock:
+                    stub.request_count += 1
+                time.sleep(stub.latency)
+
+                status, data = stub.respond(self.command, self.path, body)
+                content = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def reset_stats(self):
+        with self.lock:
+            self.request_count = 0
+            self.connection_count = 0
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
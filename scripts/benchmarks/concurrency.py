@@ -0,0 +1,141 @@
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from common import create_project, create_shot, setup_db
+
+
+'''
+the runner and the app sessions write to the same sqlite file. this runs a runner like writer (status updates of
+every pending log written per cycle, either batched in a single transaction as in flush_status_updates of
+banodoco_runner.py or one query per log) along with app like writers (frame moves, new logs) and readers
+on a WAL file database, and reports the write latencies. fails if any thread hits 'database is locked'
+'''
+LOG_COUNT = 200
+FRAME_COUNT = 100
+DURATION = 10       # secs
+CYCLE_INTERVAL = 0.05
+
+class Worker(threading.Thread):
+    def __init__(self, name, fn, stop_event):
+        super().__init__(name=name, daemon=True)
+        self.fn = fn
+        self.stop_event = stop_event
+        self.time_list = []
+        self.error_list = []
+
+    def run(self):
+        from django.db import OperationalError, connection
+
+        rng = random.Random(self.name)
+        try:
+            while not self.stop_event.is_set():
+                start_time = time.perf_counter()
+                try:
+                    self.fn(rng)
+                except OperationalError as e:
+                    self.error_list.append(str(e))
+                else:
+                    self.time_list.append((time.perf_counter() - start_time) * 1000)
+                time.sleep(CYCLE_INTERVAL * rng.random())
+        finally:
+            connection.close()
+
+# the status of every pending log changes in the cycle (the worst case for the runner)
+def runner_cycle(batched):
+    from django.db import transaction
+    from backend.models import InferenceLog
+    from shared.constants import InferenceStatus
+
+    pending_status_list = [InferenceStatus.QUEUED.value, InferenceStatus.IN_PROGRESS.value]
+    def cycle(rng):
+        log_list = list(InferenceLog.objects.filter(status__in=pending_status_list, is_disabled=False).values_list('id', 'status'))
+        update_dict = {}        # {status: [log_id]}
+        for log_id, status in log_list:
+            new_status = InferenceStatus.IN_PROGRESS.value if status == InferenceStatus.QUEUED.value else InferenceStatus.QUEUED.value
+            update_dict.setdefault(new_status, []).append(log_id)
+
+        if batched:
+            with transaction.atomic():
+                for status, log_id_list in update_dict.items():
+                    InferenceLog.objects.filter(id__in=log_id_list, status__in=pending_status_list).update(status=status)
+        else:
+            for status, log_id_list in update_dict.items():
+                for log_id in log_id_list:
+                    InferenceLog.objects.filter(id=log_id, status__in=pending_status_list).update(status=status)
+
+    return cycle
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--app-writers', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=DURATION)
+    parser.add_argument('--unbatched', action='store_true', help="runner writes every status in its own query")
+    args = parser.parse_args()
+
+    db_dir = tempfile.mkdtemp()
+    try:
+        setup_db(os.path.join(db_dir, 'benchmark.db'))
+        run(args)
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+def run(args):
+    from django.db import connection
+    from backend.db_repo import DBRepo
+    from backend.models import InferenceLog, Timing
+    from shared.constants import InferenceStatus
+
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode;')
+        journal_mode = cursor.fetchone()[0]
+    assert journal_mode == 'wal', f"journal mode is {journal_mode}"
+
+    db_repo = DBRepo()
+    project = create_project()
+    shot = create_shot(project, FRAME_COUNT, with_images=False)
+    InferenceLog.objects.bulk_create([InferenceLog(project=project, status=InferenceStatus.QUEUED.value) for _ in range(LOG_COUNT)])
+    timing_uuid_list = [str(u) for u in Timing.objects.filter(shot_id=shot.id).values_list('uuid', flat=True)]
+    connection.close()      # the threads open their own connections
+
+    def app_write(rng):
+        if rng.random() < 0.8:
+            res = db_repo.update_specific_timing(rng.choice(timing_uuid_list), aux_frame_index=rng.randrange(FRAME_COUNT))
+        else:
+            res = db_repo.create_inference_log(project_id=str(project.uuid), status=InferenceStatus.COMPLETED.value)
+        assert res.status, res.message
+
+    def app_read(rng):
+        res = db_repo.get_timing_list_from_shot(str(shot.uuid))
+        assert res.status, res.message
+
+    stop_event = threading.Event()
+    worker_list = [Worker('runner', runner_cycle(not args.unbatched), stop_event)] + \
+        [Worker(f'app_writer_{i}', app_write, stop_event) for i in range(args.app_writers)] + \
+        [Worker(f'app_reader_{i}', app_read, stop_event) for i in range(args.readers)]
+    for worker in worker_list:
+        worker.start()
+    time.sleep(args.duration)
+    stop_event.set()
+    for worker in worker_list:
+        worker.join()
+
+    print(f"runner writes {'one query per log' if args.unbatched else 'batched'}, {LOG_COUNT} pending logs, {args.duration}s")
+    print(f"{'thread':<16} {'calls':>7} {'ms (median/p95/max)':>24} {'lock errors':>12}")
+    for worker in worker_list:
+        time_list = sorted(worker.time_list) or [0]
+        p95 = time_list[int(len(time_list) * 0.95) - 1] if len(time_list) > 1 else time_list[0]
+        print(f"{worker.name:<16} {len(worker.time_list):>7} {statistics.median(time_list):>9.2f} / {p95:>6.2f} / "
+              f"{time_list[-1]:<7.2f} {len(worker.error_list):>9}")
+
+    error_list = [e for worker in worker_list for e in worker.error_list]
+    assert not error_list, f"{len(error_list)} calls failed: {error_list[0]}"
+
+if __name__ == '__main__':
+    main()
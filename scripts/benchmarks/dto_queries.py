@@ -0,0 +1,51 @@
+from common import create_project, create_shot, measure, setup_db
+
+
+'''
+query count of the timing/shot reads. the DTOs are serialized from a single select_related/prefetch_related
+queryset and the frame/shot indexes come from the context, so the count doesn't depend on the number of frames.
+fails if a per-row query (N+1) comes back, e.g. a DTO field reading a relation or a count based index property
+'''
+FRAME_COUNT = 30
+EXPECTED_QUERY_COUNT = {
+    'get_timing_list_from_shot': 3,          # shot, shots of the project (for the shot index), timings with their relations
+    'get_timing_list_from_project': 3,       # project, shots (for the shot indexes), timings with their relations
+    'get_timing_from_uuid': 3,               # timing with its relations, frames of the shot, shots of the project
+    'get_next_timing': 4,                    # timing, next timing with its relations, frames of the shot, shots of the project
+    'get_shot_from_uuid': 3,                 # shot, shots of the project, timings with their relations
+    'get_shot_list': 3,                      # project, shots, timings with their relations
+}
+
+def main():
+    setup_db()
+
+    from backend.db_repo import DBRepo
+
+    db_repo = DBRepo()
+    project = create_project()
+    shot = create_shot(project, FRAME_COUNT)
+    create_shot(project, FRAME_COUNT)
+
+    timing_uuid = str(shot.timing_set.order_by('frame_order', 'id').first().uuid)
+    call_dict = {
+        'get_timing_list_from_shot': lambda: db_repo.get_timing_list_from_shot(str(shot.uuid)),
+        'get_timing_list_from_project': lambda: db_repo.get_timing_list_from_project(str(project.uuid)),
+        'get_timing_from_uuid': lambda: db_repo.get_timing_from_uuid(timing_uuid),
+        'get_next_timing': lambda: db_repo.get_next_timing(timing_uuid),
+        'get_shot_from_uuid': lambda: db_repo.get_shot_from_uuid(str(shot.uuid)),
+        'get_shot_list': lambda: db_repo.get_shot_list(str(project.uuid)),
+    }
+
+    failed_list = []
+    for name, fn in call_dict.items():
+        res, query_count, time_taken = measure(fn)
+        assert res.status, res.message
+        data = res.data['data']
+        print(f"{name:<30} {len(data) if isinstance(data, list) else 1:>4} objects {query_count:>4} queries {time_taken:>8.2f} ms")
+        if query_count != EXPECTED_QUERY_COUNT[name]:
+            failed_list.append(f"{name}: {query_count} queries, expected {EXPECTED_QUERY_COUNT[name]}")
+
+    assert not failed_list, "\n".join(failed_list)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import threading
+import time
+
+import requests
+
+from common import StubServer
+
+
+'''
+backend requests of APIRepo against a local stub of the backend (with the given latency). compares bare requests
+calls (a new connection per request, as APIRepo used to make) with APIRepo's shared keep-alive session, called
+sequentially and from several threads (streamlit serves the sessions in threads). also checks that concurrent
+identical GETs reach the backend once and that a GET is retried on 503. fails if the pooled session opens more
+connections than HTTP_POOL_SIZE
+'''
+REQUEST_COUNT = 200
+THREAD_COUNT = 10
+RETRY_PATH = '/v1/data/retry'
+FAILURE_COUNT = 2           # the stub fails the first GETs of RETRY_PATH with 503
+
+class Backend:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.retry_attempt_count = 0
+
+    def respond(self, method, path, body):
+        if path.startswith(RETRY_PATH):
+            with self.lock:
+                self.retry_attempt_count += 1
+                if self.retry_attempt_count <= FAILURE_COUNT:
+                    return 503, {'status': False, 'message': 'unavailable', 'payload': None}
+
+        return 200, {'status': True, 'message': 'success', 'payload': {'path': path}}
+
+def run_threads(fn, thread_count, request_count):
+    thread_list = [threading.Thread(target=lambda i=i: [fn(i, j) for j in range(request_count // thread_count)]) \
+                   for i in range(thread_count)]
+    for thread in thread_list:
+        thread.start()
+    for thread in thread_list:
+        thread.join()
+
+def benchmark(server, fn):
+    server.reset_stats()
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):     # http_get logs the time of every call
+        fn()
+    return (time.perf_counter() - start_time) * 1000, server.request_count, server.connection_count
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=REQUEST_COUNT)
+    parser.add_argument('--threads', type=int, default=THREAD_COUNT)
+    parser.add_argument('--latency', type=float, default=0.005, help="secs added to every response")
+    args = parser.parse_args()
+
+    backend = Backend()
+    server = StubServer(backend.respond, latency=args.latency).start()
+    os.environ['SERVER_URL'] = server.url
+
+    from utils.data_repo.api_repo import HTTP_POOL_SIZE, APIRepo
+
+    api_repo = APIRepo()
+    url = APIRepo().TIMING_URL
+    call_dict = {
+        'requests.get, sequential': lambda: [requests.get(server.url + url, params={'uuid': i}) for i in range(args.requests)],
+        'APIRepo, sequential': lambda: [api_repo.http_get(url, params={'uuid': i}) for i in range(args.requests)],
+        'requests.get, threads': lambda: run_threads(lambda i, j: requests.get(server.url + url, params={'uuid': f"{i}_{j}"}), \
+                                                     args.threads, args.requests),
+        'APIRepo, threads': lambda: run_threads(lambda i, j: api_repo.http_get(url, params={'uuid': f"{i}_{j}"}), \
+                                                args.threads, args.requests),
+        'APIRepo, threads, identical GET': lambda: run_threads(lambda i, j: api_repo.http_get(url, params={'uuid': j}), \
+                                                               args.threads, args.threads),
+    }
+
+    try:
+        print(f"{args.requests} requests, {args.threads} threads, {args.latency * 1000:.0f} ms latency")
+        print(f"{'mode':<32} {'ms':>9} {'requests':>9} {'connections':>12}")
+        res_dict = {}
+        for name, fn in call_dict.items():
+            res_dict[name] = benchmark(server, fn)
+            time_taken, request_count, connection_count = res_dict[name]
+            print(f"{name:<32} {time_taken:>9.2f} {request_count:>9} {connection_count:>12}")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            res = api_repo.http_get(RETRY_PATH)
+        print(f"GET failing {FAILURE_COUNT} times with 503: {'succeeded' if res['status'] else 'failed'} "
+              f"after {backend.retry_attempt_count} attempts")
+    finally:
+        server.stop()
+
+    for name in ['APIRepo, sequential', 'APIRepo, threads']:
+        assert res_dict[name][2] <= HTTP_POOL_SIZE, f"{name}: opened {res_dict[name][2]} connections"
+    assert res_dict['APIRepo, threads, identical GET'][1] < args.threads, "identical concurrent GETs weren't shared"
+    assert res['status'], "the GET wasn't retried"
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import datetime
+import random
+import statistics
+import time
+
+from common import create_project, create_shot, setup_db
+
+
+'''
+latency of the hot filters (runner status poll, gallery page, timing/shot lists, uuid lookup) on a seeded
+database, with the composite indexes and after dropping them, along with the sqlite query plans. fails if a
+plan (with the indexes) scans the table or sorts the rows in a temp b-tree instead of reading them in the index order
+'''
+COMPOSITE_INDEX_LIST = ['inference_log_status_idx', 'file_project_tag_idx', 'shot_project_idx', 'timing_shot_idx']
+PROJECT_COUNT = 10
+GALLERY_PAGE_SIZE = 20
+REPEAT_COUNT = 20
+BATCH_SIZE = 5000
+
+def seed(file_count, log_count):
+    from backend.models import InferenceLog, InternalFileObject
+    from shared.constants import InferenceStatus, InternalFileTag
+
+    rng = random.Random(0)
+    project_list = [create_project(f"project_{i}") for i in range(PROJECT_COUNT)]
+    start_time = datetime.datetime.now() - datetime.timedelta(days=30)
+
+    # most of the logs are done, the runner only polls the few pending ones
+    status_list = [InferenceStatus.COMPLETED.value] * 90 + [InferenceStatus.FAILED.value] * 8 + \
+        [InferenceStatus.QUEUED.value, InferenceStatus.IN_PROGRESS.value]
+    log_list = [InferenceLog(project=rng.choice(project_list), status=rng.choice(status_list), model_name="sdxl") \
+                for _ in range(log_count)]
+    InferenceLog.objects.bulk_create(log_list, batch_size=BATCH_SIZE)
+
+    tag_list = [InternalFileTag.GALLERY_IMAGE.value] * 6 + [InternalFileTag.SHORTLISTED_GALLERY_IMAGE.value] + \
+        [InternalFileTag.TEMP_IMAGE.value, InternalFileTag.GENERATED_VIDEO.value, ""]
+    for offset in range(0, file_count, BATCH_SIZE):
+        file_list = [
+            InternalFileObject(
+                name=f"file_{i}.png",
+                type="image",
+                project=rng.choice(project_list),
+                tag=rng.choice(tag_list),
+                local_path=f"videos/benchmark/file_{i}.png",
+                created_on=start_time + datetime.timedelta(seconds=i * 10)
+            ) for i in range(offset, min(offset + BATCH_SIZE, file_count))
+        ]
+        InternalFileObject.objects.bulk_create(file_list)
+
+    # a few shots in the first project, the timing lists are read from the last one
+    for frame_count in [10, 30, 100]:
+        shot = create_shot(project_list[0], frame_count, with_images=False)
+
+    return project_list[0], shot
+
+# querysets built the way the app/runner build them
+def get_query_dict(project, shot):
+    from backend.models import InferenceLog, InternalFileObject, Shot, Timing
+    from shared.constants import InferenceStatus, InternalFileTag
+
+    file_uuid = InternalFileObject.objects.order_by('-id').values_list('uuid', flat=True).first()
+    gallery_file_list = InternalFileObject.objects.filter(type="image", tag=InternalFileTag.GALLERY_IMAGE.value, \
+                                                          project_id=project.id, is_disabled=False)
+    return {
+        'runner status poll': InferenceLog.objects.filter(is_disabled=False, \
+            status__in=[InferenceStatus.QUEUED.value, InferenceStatus.IN_PROGRESS.value]),
+        'gallery page': gallery_file_list.order_by('-created_on', '-id')[:GALLERY_PAGE_SIZE + 1],
+        'gallery count': gallery_file_list,
+        'timing list': Timing.objects.filter(shot_id=shot.id, is_disabled=False).order_by('frame_order', 'id'),
+        'shot list': Shot.objects.filter(project_id=project.id, is_disabled=False).order_by('shot_order', 'id'),
+        'file by uuid': InternalFileObject.objects.filter(uuid=file_uuid, is_disabled=False),
+    }
+
+def run_query(name, queryset):
+    return queryset.count() if name == 'gallery count' else len(list(queryset))
+
+def benchmark(query_dict):
+    res = {}
+    for name, queryset in query_dict.items():
+        time_list = []
+        for _ in range(REPEAT_COUNT):
+            start_time = time.perf_counter()
+            run_query(name, queryset.all())
+            time_list.append((time.perf_counter() - start_time) * 1000)
+        res[name] = (statistics.median(time_list), queryset.explain())
+
+    return res
+
+def drop_composite_indexes():
+    from django.apps import apps
+    from django.db import connection
+
+    with connection.schema_editor() as schema_editor:
+        for model in apps.get_app_config('backend').get_models():
+            for index in model._meta.indexes:
+                if index.name in COMPOSITE_INDEX_LIST:
+                    schema_editor.remove_index(model, index)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=100000)
+    parser.add_argument('--logs', type=int, default=10000)
+    args = parser.parse_args()
+
+    setup_db()
+
+    start_time = time.perf_counter()
+    project, shot = seed(args.files, args.logs)
+    print(f"seeded {args.files} files and {args.logs} logs in {time.perf_counter() - start_time:.1f} secs\n")
+
+    query_dict = get_query_dict(project, shot)
+    indexed_res = benchmark(query_dict)
+    drop_composite_indexes()
+    unindexed_res = benchmark(query_dict)
+
+    print(f"{'query':<20} {'indexed ms':>12} {'unindexed ms':>14}")
+    for name in query_dict:
+        print(f"{name:<20} {indexed_res[name][0]:>12.3f} {unindexed_res[name][0]:>14.3f}")
+
+    print("\nquery plans with the indexes:")
+    failed_list = []
+    for name in query_dict:
+        plan = indexed_res[name][1]
+        print(f"\n{name}\n{plan}")
+        if 'USING INDEX' not in plan or 'TEMP B-TREE' in plan:
+            failed_list.append(name)
+
+    assert not failed_list, f"queries not served by an index: {', '.join(failed_list)}"
+
+if __name__ == '__main__':
+    main()
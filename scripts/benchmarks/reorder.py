@@ -0,0 +1,54 @@
+import random
+import statistics
+
+from common import create_project, create_shot, measure, setup_db
+
+
+'''
+cost of moving a frame inside a shot (update_specific_timing with aux_frame_index), for shots of different
+lengths. a move only updates the moved row (the rows are re-keyed only when a gap runs out), so the
+queries and the time per move should stay flat as the shot grows
+'''
+SHOT_LENGTH_LIST = [10, 100, 1000]
+MOVE_COUNT = 50
+
+def benchmark_moves(db_repo, shot, frame_count):
+    from backend.models import Timing
+
+    uuid_list = [str(u) for u in Timing.objects.filter(shot_id=shot.id, is_disabled=False).values_list('uuid', flat=True)]
+    query_count_list, time_list = [], []
+    rng = random.Random(frame_count)
+    for _ in range(MOVE_COUNT):
+        timing_uuid, index = rng.choice(uuid_list), rng.randrange(frame_count)
+        res, query_count, time_taken = measure(lambda: db_repo.update_specific_timing(timing_uuid, aux_frame_index=index))
+        assert res.status, res.message
+        query_count_list.append(query_count)
+        time_list.append(time_taken)
+
+    return query_count_list, time_list
+
+def main():
+    setup_db()
+
+    from backend.db_repo import DBRepo
+    from backend.models import Timing
+
+    db_repo = DBRepo()
+    project = create_project()
+    median_query_count_list = []
+    print(f"{'frames':>8} {'queries (median/max)':>22} {'ms (median/max)':>18}")
+    for frame_count in SHOT_LENGTH_LIST:
+        shot = create_shot(project, frame_count, with_images=False)
+        query_count_list, time_list = benchmark_moves(db_repo, shot, frame_count)
+        median_query_count_list.append(statistics.median(query_count_list))
+        print(f"{frame_count:>8} {statistics.median(query_count_list):>13} / {max(query_count_list):<6} "
+              f"{statistics.median(time_list):>9.2f} / {max(time_list):<7.2f}")
+
+        # the moves should leave a valid order
+        order_list = list(Timing.objects.filter(shot_id=shot.id, is_disabled=False).values_list('frame_order', flat=True))
+        assert len(order_list) == frame_count
+
+    assert len(set(median_query_count_list)) == 1, "queries per move grow with the shot length"
+
+if __name__ == '__main__':
+    main()
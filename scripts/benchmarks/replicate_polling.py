@@ -0,0 +1,82 @@
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common import StubServer
+
+
+'''
+status checks of the pending replicate predictions against a local stub of the predictions api (with the given
+latency). compares checking them one by one with a new connection each (as the runner used to) with the
+runner's concurrent checks through a pooled keep-alive session (REPLICATE_POLL_WORKERS in banodoco_runner.py).
+fails if the pooled checks open more connections than the workers or aren't faster
+'''
+PREDICTION_COUNT = 40
+CYCLE_COUNT = 5
+POLL_WORKERS = 8        # REPLICATE_POLL_WORKERS
+REQUEST_TIMEOUT = 10    # REPLICATE_REQUEST_TIMEOUT
+
+def respond(method, path, body):
+    prefix = '/v1/predictions/'
+    if method != 'GET' or not path.startswith(prefix):
+        return 404, {'detail': 'not found'}
+
+    return 200, {'id': path[len(prefix):], 'status': 'processing', 'output': None}
+
+def sequential_cycle(base_url, prediction_id_list):
+    return [requests.get(f"{base_url}/v1/predictions/{prediction_id}", timeout=REQUEST_TIMEOUT).json() \
+            for prediction_id in prediction_id_list]
+
+def get_pooled_cycle(workers):
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    def cycle(base_url, prediction_id_list):
+        fetch = lambda prediction_id: session.get(f"{base_url}/v1/predictions/{prediction_id}", timeout=REQUEST_TIMEOUT).json()
+        return list(executor.map(fetch, prediction_id_list))
+
+    return cycle
+
+def benchmark(server, cycle_fn, prediction_id_list):
+    server.reset_stats()
+    time_list = []
+    for _ in range(CYCLE_COUNT):
+        start_time = time.perf_counter()
+        result_list = cycle_fn(server.url, prediction_id_list)
+        time_list.append((time.perf_counter() - start_time) * 1000)
+        assert [r['id'] for r in result_list] == prediction_id_list
+
+    return statistics.median(time_list), server.request_count, server.connection_count
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--predictions', type=int, default=PREDICTION_COUNT)
+    parser.add_argument('--latency', type=float, default=0.05, help="secs added to every response")
+    parser.add_argument('--workers', type=int, default=POLL_WORKERS)
+    args = parser.parse_args()
+
+    server = StubServer(respond, latency=args.latency).start()
+    prediction_id_list = [f"prediction_{i}" for i in range(args.predictions)]
+    try:
+        print(f"{args.predictions} pending predictions, {args.latency * 1000:.0f} ms latency, {CYCLE_COUNT} cycles")
+        print(f"{'mode':<34} {'ms per cycle':>13} {'requests':>9} {'connections':>12}")
+        res_dict = {}
+        for name, cycle_fn in [('sequential, connection per request', sequential_cycle), \
+                               (f'concurrent ({args.workers}), pooled session', get_pooled_cycle(args.workers))]:
+            res_dict[name] = benchmark(server, cycle_fn, prediction_id_list)
+            time_taken, request_count, connection_count = res_dict[name]
+            print(f"{name:<34} {time_taken:>13.2f} {request_count:>9} {connection_count:>12}")
+    finally:
+        server.stop()
+
+    (sequential_time, _, _), (pooled_time, _, pooled_connection_count) = res_dict.values()
+    assert pooled_connection_count <= args.workers, f"pooled checks opened {pooled_connection_count} connections"
+    assert pooled_time < sequential_time, "pooled checks are not faster than the sequential ones"
+
+if __name__ == '__main__':
+    main()
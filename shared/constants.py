@@ -62,6 +62,8 @@ class InternalFileTag(ExtendedEnum):
     GALLERY_IMAGE = 'gallery_image'
     SHORTLISTED_GALLERY_IMAGE = 'shortlisted_gallery_image'
     TEMP_GALLERY_IMAGE = 'temp_gallery_image'   # these generations are complete but not yet being shown in the gallery
+    PREVIEW_VIDEO = 'preview_video'             # low resolution copy of a video (derived file)
+    POSTER_IMAGE = 'poster_image'               # first frame of a video (derived file)
 
 class AnimationStyleType(ExtendedEnum):
     CREATIVE_INTERPOLATION = "Creative Interpolation"
@@ -97,10 +99,15 @@ class InferenceParamType(ExtendedEnum):
     GPU_INFERENCE = "gpu_inference"                 # gpu inference data
 
 class ProjectMetaData(ExtendedEnum):
-    DATA_UPDATE = "data_update"                     # info regarding cache/data update when runner updates the db
-    GALLERY_UPDATE = "gallery_update"
     BACKGROUND_IMG_LIST = "background_img_list"
-    SHOT_VIDEO_UPDATE = "shot_video_update"
+
+# changes made by the runner, appended in the project's change events and applied by the app in its cache
+class ProjectChangeType(ExtendedEnum):
+    TIMING_UPDATE = "timing_update"                 # timing added/updated/deleted (new variants included)
+    GALLERY_UPDATE = "gallery_update"               # new images in the gallery
+    SHOT_VIDEO_UPDATE = "shot_video_update"         # new interpolated clips of a shot
+    SHOT_UPDATE = "shot_update"                     # shot added/updated/deleted or its timing list changed
+    FILE_UPDATE = "file_update"                     # file added/updated/deleted
 
 class SortOrder(ExtendedEnum):
     ASCENDING = "asc"
@@ -131,11 +138,21 @@ AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY", "")
 OFFLINE_MODE = os.getenv('OFFLINE_MODE', False)     # for picking up secrets and file storage
 
 LOCAL_DATABASE_NAME = 'banodoco_local.db'
+SQLITE_BUSY_TIMEOUT = 30        # secs a writer waits for the lock held by the other process (app/runner)
 ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY', 'J2684nBgNUYa_K0a6oBr5H8MpSRW0EJ52Qmq7jExE-w=')
 
 QUEUE_INFERENCE_QUERIES = True
 HOSTED_BACKGROUND_RUNNER_MODE = os.getenv('HOSTED_BACKGROUND_RUNNER_MODE', False)
 GPU_INFERENCE_ENABLED = False if os.getenv('GPU_INFERENCE_ENABLED', False) in [False, 'False'] else True
+GPU_MAX_IN_FLIGHT = int(os.getenv('GPU_MAX_IN_FLIGHT', 1))   # local gpu jobs run in parallel by the runner
+
+# optional replicate webhooks, the url should forward to the runner's RUNNER_WEBHOOK_PORT (polling is used otherwise)
+REPLICATE_WEBHOOK_URL = os.getenv('REPLICATE_WEBHOOK_URL', '')
+REPLICATE_WEBHOOK_SECRET = os.getenv('REPLICATE_WEBHOOK_SECRET', '')     # signing secret (whsec_..) of the replicate account
+REPLICATE_WEBHOOK_ENABLED = bool(REPLICATE_WEBHOOK_URL and REPLICATE_WEBHOOK_SECRET)
+# interface the webhook receiver binds to. the url is expected to reach it through a tunnel/proxy on this machine,
+# set it to 0.0.0.0 to accept the callbacks from the network directly
+REPLICATE_WEBHOOK_HOST = os.getenv('REPLICATE_WEBHOOK_HOST', 'localhost')
 
 if OFFLINE_MODE:
     SECRET_ACCESS_TOKEN = os.getenv('SECRET_ACCESS_TOKEN', None)
@@ -4,9 +4,10 @@ from ui_components.constants import GalleryImageViewType
 from ui_components.methods.common_methods import get_canny_img, process_inference_output,add_new_shot, save_new_image
 from ui_components.widgets.add_key_frame_element import add_key_frame
 from ui_components.widgets.inpainting_element import inpainting_image_input
-from utils.common_utils import refresh_app
+from utils.common_utils import get_page_cursor, refresh_app, update_page_cursor
 from utils.constants import MLQueryObject
 from utils.data_repo.data_repo import DataRepo
+from utils.media_processor.thumbnail import ThumbnailSize, get_thumbnail
 from shared.constants import GPU_INFERENCE_ENABLED, QUEUE_INFERENCE_QUERIES, AIModelType, InferenceType, InternalFileTag, InternalFileType, SortOrder
 from utils import st_memory
 import time
@@ -105,7 +106,7 @@ def generate_images_element(position='explorer', project_uuid=None, timing_uuid=
                                     st.session_state['uploaded_image'] = frame_list[timing - 1].primary_image.location
                             with selection2:
                                 if frame_list and len(frame_list) and timing:
-                                    st.image(frame_list[timing - 1].primary_image.location, use_column_width=True)
+                                    st.image(get_thumbnail(frame_list[timing - 1].primary_image.location, ThumbnailSize.MEDIUM.value), use_column_width=True)
 
                         # Trigger image processing
                         if st.button("Upload Image", key=f"{output_value_name}_upload_button", use_container_width=True):
@@ -450,9 +451,20 @@ def gallery_image_view(project_uuid, shortlist=False, view=["main"], shot=None,
     if shot_uuid_list and not sidebar:
         gallery_image_filter_data["shot_uuid_list"] = shot_uuid_list
     
+    # only the fields displayed in the grid are fetched (the prompt is only needed in the inference details)
+    gallery_field_list = ['uuid', 'name', 'type', 'local_path', 'hosted_url', 'created_on', 'tag', 'shot_uuid', \
+                          'inference_log.uuid', 'inference_log.status', 'inference_log.output_details']
+    if 'view_inference_details' in view:
+        gallery_field_list.append('inference_log.input_params')
+    
+    # cursors are only valid for the filters they were fetched with
+    cursor_list_key = 'gallery_' + json.dumps({k: v for k, v in gallery_image_filter_data.items() if k != 'page'}, default=str)
     gallery_image_list, res_payload = data_repo.get_all_file_list(
-        **gallery_image_filter_data
+        **gallery_image_filter_data,
+        cursor=get_page_cursor(cursor_list_key, gallery_image_filter_data['page']),
+        fields=gallery_field_list
     )
+    update_page_cursor(cursor_list_key, gallery_image_filter_data['page'], res_payload)
 
     if not shortlist:
         if project_settings.total_gallery_pages != res_payload['total_pages']:
@@ -508,7 +520,8 @@ def gallery_image_view(project_uuid, shortlist=False, view=["main"], shot=None,
             for j in range(num_columns):
                 if i + j < len(gallery_image_list):
                     with cols[j]:                        
-                        st.image(gallery_image_list[i + j].location, use_column_width=True)
+                        thumbnail_size = ThumbnailSize.MEDIUM.value if sidebar else ThumbnailSize.LARGE.value
+                        st.image(get_thumbnail(gallery_image_list[i + j].location, thumbnail_size), use_column_width=True)
                                                 # ---------- add to shot btn ---------------
                         if "last_shot_number" not in st.session_state:
                             st.session_state["last_shot_number"] = 0
@@ -558,10 +571,10 @@ def gallery_image_view(project_uuid, shortlist=False, view=["main"], shot=None,
                         if gallery_image_list[i + j].inference_log:
                             log = gallery_image_list[i + j].inference_log # data_repo.get_inference_log_from_uuid(gallery_image_list[i + j].inference_log.uuid)
                             if log:
-                                input_params = json.loads(log.input_params)
-                                prompt = input_params.get('prompt', 'No prompt found')
-                                model = json.loads(log.output_details)['model_name'].split('/')[-1]
                                 if 'view_inference_details' in view:
+                                    input_params = json.loads(log.input_params)
+                                    prompt = input_params.get('prompt', 'No prompt found')
+                                    model = json.loads(log.output_details)['model_name'].split('/')[-1]
                                     with st.expander("Prompt Details", expanded=open_detailed_view_for_all):
                                         st.info(f"**Prompt:** {prompt}\n\n**Model:** {model}")
                                 
@@ -1,7 +1,7 @@
 import json
 import streamlit as st
 from ui_components.constants import DefaultTimingStyleParams
-from utils.common_utils import get_current_user
+from utils.common_utils import get_current_user, get_page_cursor, update_page_cursor
 from shared.constants import  SERVER,ServerType
 from utils.data_repo.data_repo import DataRepo
 
@@ -16,11 +16,14 @@ def query_logger_page():
     list_of_pages = [i for i in range(1, total_log_table_pages + 1)]
     page_number = b1.radio('Select page:', options=list_of_pages, key='inference_log_page_number', index=0, horizontal=True)
     # page_number = b1.number_input('Page number', min_value=1, max_value=total_log_table_pages, value=1, step=1)
-    inference_log_list, total_page_count = data_repo.get_all_inference_log_list(
+    inference_log_list, res_payload = data_repo.get_all_inference_log_list(
         page=page_number,
+        cursor=get_page_cursor('inference_log_table', page_number),
         data_per_page=100
     )
+    update_page_cursor('inference_log_table', page_number, res_payload)
 
+    total_page_count = res_payload.get('total_pages', 1)
     if total_log_table_pages != total_page_count:
         st.session_state['total_log_table_pages'] = total_page_count
         st.rerun()
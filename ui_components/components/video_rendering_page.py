@@ -9,6 +9,7 @@ import re
 from ui_components.methods.video_methods import render_video
 from ui_components.models import InternalFileObject, InternalFrameTimingObject
 from ui_components.widgets.attach_audio_element import attach_audio_element
+from utils.common_utils import get_lock_metrics
 
 from utils.data_repo.data_repo import DataRepo
 
@@ -33,6 +34,19 @@ def video_rendering_page(project_uuid):
             time.sleep(0.5)
         st.rerun()
 
+    # shot segments reused from the render cache
+    render_cache_stats = st.session_state.get(f"render_cache_stats_{project_uuid}", None)
+    if render_cache_stats:
+        st.caption(f"Last render: {render_cache_stats['last_hits']} shots reused, {render_cache_stats['last_misses']} shots rendered. "
+                   f"Total: {render_cache_stats['hits']} hits, {render_cache_stats['misses']} misses")
+
+    # render lease acquisitions of this app process
+    lock_metrics = get_lock_metrics()
+    if lock_metrics['acquired'] or lock_metrics['timed_out']:
+        st.caption(f"Render lock: {lock_metrics['acquired']} acquired, {lock_metrics['timed_out']} timed out, "
+                   f"{lock_metrics['contended']} contended. Wait: {round(lock_metrics['avg_wait'], 3)}s avg, "
+                   f"{round(lock_metrics['max_wait'], 3)}s max")
+
     st.markdown("***")
 
     # TODO: only show completed videos
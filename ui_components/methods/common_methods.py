@@ -13,7 +13,8 @@ import uuid
 from io import BytesIO
 import numpy as np
 import urllib3
-from shared.constants import OFFLINE_MODE, SERVER, InferenceType, InternalFileTag, InternalFileType, ProjectMetaData, ServerType
+import streamlit as st
+from shared.constants import OFFLINE_MODE, SERVER, InferenceType, InternalFileTag, InternalFileType, ServerType
 from pydub import AudioSegment
 from backend.models import InternalFileObject
 from shared.logging.constants import LoggingType
@@ -22,7 +23,6 @@ from ui_components.constants import SECOND_MASK_FILE, SECOND_MASK_FILE_PATH, Wor
 from ui_components.methods.file_methods import add_temp_file_to_project, convert_bytes_to_file, generate_pil_image, generate_temp_file, save_or_host_file, save_or_host_file_bytes
 from ui_components.methods.video_methods import sync_audio_and_duration, update_speed_of_video_clip
 from ui_components.models import InternalFrameTimingObject, InternalSettingObject
-from utils.common_utils import acquire_lock, release_lock
 from utils.data_repo.data_repo import DataRepo
 from shared.constants import AnimationStyleType
 
@@ -323,22 +323,8 @@ def promote_video_variant(shot_uuid, variant_uuid):
     if not variant_to_promote:
         return None
 
-    if variant_to_promote.location.startswith(('http://', 'https://')):
-        temp_video_path, _ = urllib3.request.urlretrieve(variant_to_promote.location)
-        video = VideoFileClip(temp_video_path)
-    else:
-        video = VideoFileClip(variant_to_promote.location)
-
-    if video.duration != shot.duration:
-        video_bytes = VideoProcessor.update_video_speed(
-            variant_to_promote.location,
-            shot.duration
-        )
-
-        hosted_url = save_or_host_file_bytes(video_bytes, variant_to_promote.local_path)
-        if hosted_url:
-            data_repo.update_file(video.uuid, hosted_url=hosted_url)
-
+    # retimed only if its duration doesn't match the shot's
+    update_speed_of_video_clip(variant_to_promote, shot.duration)
     data_repo.update_shot(uuid=shot.uuid, main_clip_id=variant_to_promote.uuid)
 
 def get_canny_img(img_obj, low_threshold, high_threshold, invert_img=False):
@@ -784,40 +770,16 @@ def process_inference_output(**kwargs):
 
 def check_project_meta_data(project_uuid):
     '''
-    checking for project metadata (like cache updates - we update specific entities using this flag)
-    project_update_data is of the format {"data_update": [timing_uuid], "gallery_update": True/False, "background_img_list": []}
+    syncs the cache with the changes made by the other sessions/processes (files, timings and shots changed,
+    new variants, gallery images, interpolated clips), read from the project's change events after the
+    last event seen by this session
     '''
     data_repo = DataRepo()
-    
-    key = project_uuid
-    if acquire_lock(key):
-        project = data_repo.get_project_from_uuid(project_uuid)
-        timing_update_data = json.loads(project.meta_data).\
-            get(ProjectMetaData.DATA_UPDATE.value, None) if project.meta_data else None
-        if timing_update_data and len(timing_update_data):
-            for timing_uuid in timing_update_data:
-                _ = data_repo.get_timing_from_uuid(timing_uuid, invalidate_cache=True)
-
-        gallery_update_data = json.loads(project.meta_data).\
-            get(ProjectMetaData.GALLERY_UPDATE.value, False) if project.meta_data else False
-        if gallery_update_data:
-            pass
-
-        shot_update_data = json.loads(project.meta_data).\
-            get(ProjectMetaData.SHOT_VIDEO_UPDATE.value, []) if project.meta_data else []
-        if shot_update_data and len(shot_update_data):
-            for shot_uuid in shot_update_data:
-                _ = data_repo.get_shot_list(shot_uuid, invalidate_cache=True)
-        
-        # clearing update data from cache
-        meta_data = {
-            ProjectMetaData.DATA_UPDATE.value: [],
-            ProjectMetaData.GALLERY_UPDATE.value: False,
-            ProjectMetaData.SHOT_VIDEO_UPDATE.value: []
-        }
-        data_repo.update_project(uuid=project.uuid, meta_data=json.dumps(meta_data))
-        
-        release_lock(key)
+
+    seq_key = 'change_event_seq_' + str(project_uuid)
+    event_data = data_repo.get_project_change_event_list(project_uuid, st.session_state.get(seq_key, None))
+    if event_data:
+        st.session_state[seq_key] = event_data['last_seq']
 
 
 def update_app_setting_keys():
@@ -116,6 +116,20 @@ def save_or_host_file_bytes(video_bytes, path, ext=".mp4"):
     
     return uploaded_url
 
+# same as save_or_host_file_bytes but moves/uploads the file at file_path, without reading it in memory
+def save_or_host_file_path(file_path, path, ext=".mp4"):
+    uploaded_url = None
+    if SERVER != ServerType.DEVELOPMENT.value:
+        data_repo = DataRepo()
+        with open(file_path, 'rb') as f:
+            uploaded_url = data_repo.upload_file(f, ext)
+        os.remove(file_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.move(file_path, path)
+    
+    return uploaded_url
+
 def add_temp_file_to_project(project_uuid, key, file_path):
     data_repo = DataRepo()
 
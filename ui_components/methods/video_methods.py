@@ -3,6 +3,8 @@ import random
 import string
 import tempfile
 import time
+import hashlib
+import json
 from typing import List
 import uuid
 import ffmpeg
@@ -10,14 +12,20 @@ import streamlit as st
 from moviepy.editor import concatenate_videoclips, concatenate_audioclips, VideoFileClip, AudioFileClip, CompositeVideoClip
 from pydub import AudioSegment
 
-from shared.constants import InferenceType, InternalFileTag
+from shared.constants import SERVER, InferenceType, InternalFileTag, InternalFileType, ServerType
 from shared.file_upload.s3 import is_s3_image_url
+from shared.logging.constants import LoggingType
+from shared.logging.logging import app_logger
 from ui_components.methods.file_methods import save_or_host_file_bytes
 from ui_components.models import InternalFileObject, InternalFrameTimingObject, InternalShotObject
-from utils.common_utils import padded_integer
+from utils.common_utils import LeaseHeartbeat, acquire_lock, padded_integer, release_lock
 from utils.data_repo.data_repo import DataRepo
 from utils.media_processor.interpolator import VideoInterpolator
-from utils.media_processor.video import VideoProcessor
+from utils.media_processor.video import RENDER_SEGMENT_FPS, RENDER_SEGMENT_SETTINGS, VideoProcessor
+
+
+RENDER_CACHE_GRACE_PERIOD = 3600        # secs, unused segments are only removed from the render cache after this
+RENDER_LEASE_DURATION = 120             # secs, the render lease outlives a stalled session by this much at most
 
 
 def create_single_interpolated_clip(shot_uuid, quality, settings={}, variant_count=1):
@@ -69,7 +77,7 @@ def create_single_interpolated_clip(shot_uuid, quality, settings={}, variant_cou
         st.rerun()
 
 def update_speed_of_video_clip(video_file: InternalFileObject, duration) -> InternalFileObject:
-    from ui_components.methods.file_methods import generate_temp_file, convert_bytes_to_file
+    from ui_components.methods.file_methods import generate_temp_file, save_or_host_file_path
 
     temp_video_file = None
     if video_file.hosted_url and is_s3_image_url(video_file.hosted_url):
@@ -80,20 +88,21 @@ def update_speed_of_video_clip(video_file: InternalFileObject, duration) -> Inte
     new_file_name = ''.join(random.choices(string.ascii_lowercase + string.digits, k=16)) + ".mp4"
     new_file_location = "videos/" + str(video_file.project.uuid) + "/assets/videos/1_final/" + str(new_file_name)
 
-    video_bytes = VideoProcessor.update_video_speed(
-        location_of_video,
-        duration
-    )
-
-    hosted_url = save_or_host_file_bytes(video_bytes, new_file_location, '.mp4')
-    data_repo = DataRepo()
-    if hosted_url:
-        data_repo.update_file(video_file.uuid, hosted_url=hosted_url)
-    else:
-        data_repo.update_file(video_file.uuid, local_path=new_file_location)
-
-    if temp_video_file:
-        os.remove(temp_video_file.name)
+    temp_output_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
+    temp_output_file.close()
+    try:
+        # the file is left as it is if it already has the duration
+        if VideoProcessor.update_video_speed(location_of_video, duration, temp_output_file.name):
+            hosted_url = save_or_host_file_path(temp_output_file.name, new_file_location, '.mp4')
+            data_repo = DataRepo()
+            if hosted_url:
+                data_repo.update_file(video_file.uuid, hosted_url=hosted_url)
+            else:
+                data_repo.update_file(video_file.uuid, local_path=new_file_location)
+    finally:
+        for file_path in [temp_output_file.name, temp_video_file.name if temp_video_file else None]:
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
 
     return video_file
 
@@ -229,12 +238,101 @@ def sync_audio_and_duration(video_file: InternalFileObject, shot_uuid, audio_syn
     return output_video
 
 
+def create_video_preview(video_file: InternalFileObject):
+    '''
+    creates the poster and the low resolution preview of the video, stored as its derived files. the ones which
+    are already present are skipped (runs in the background, check the runner)
+    '''
+    from ui_components.methods.file_methods import save_or_host_file_path
+
+    data_repo = DataRepo()
+    derived_file_dict = data_repo.get_derived_file_dict([video_file.uuid]).get(str(video_file.uuid), {})
+    project_uuid = str(video_file.project.uuid) if video_file.project else None
+    # the preview is created last, as it marks the video as processed
+    for tag, file_type, ext, create_fn in [
+        (InternalFileTag.POSTER_IMAGE.value, InternalFileType.IMAGE.value, ".jpg", VideoProcessor.create_poster),
+        (InternalFileTag.PREVIEW_VIDEO.value, InternalFileType.VIDEO.value, ".mp4", VideoProcessor.create_preview)
+    ]:
+        if tag in derived_file_dict:
+            continue
+
+        file_location = f"videos/{project_uuid or 'temp'}/assets/videos/preview/{video_file.uuid}_{tag}{ext}"
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=ext)
+        temp_file.close()
+        try:
+            create_fn(video_file.location, temp_file.name)
+            hosted_url = save_or_host_file_path(temp_file.name, file_location, ext)
+        finally:
+            if os.path.exists(temp_file.name):
+                os.remove(temp_file.name)
+
+        file_data = {
+            "name": os.path.basename(file_location),
+            "type": file_type,
+            "tag": tag,
+            "source_file_uuid": str(video_file.uuid)
+        }
+        if project_uuid:
+            file_data.update({'project_id': project_uuid})
+        if hosted_url:
+            file_data.update({'hosted_url': hosted_url})
+        else:
+            file_data.update({'local_path': file_location})
+
+        data_repo.create_file(**file_data)
+
+# rendered shot segments (speed adjusted, with the audio) are cached by the content of the inputs, so a re-render
+# only rebuilds the shots which have changed
+def get_segment_cache_key(video_file: InternalFileObject, duration, audio_file: InternalFileObject, audio_start, width, height):
+    # the location of a file changes whenever its content is replaced, so it's part of the key
+    key_data = {
+        "video": [video_file.uuid, video_file.location],
+        "duration": round(duration, 2),
+        "audio": [audio_file.uuid, audio_file.location] if audio_file else None,
+        "audio_start": round(audio_start, 2),
+        "resolution": [width, height],
+        "fps": RENDER_SEGMENT_FPS,
+        "encoder": RENDER_SEGMENT_SETTINGS
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+def update_render_cache_stats(project_uuid, hit_count, miss_count):
+    key = f"render_cache_stats_{project_uuid}"
+    stats = st.session_state.get(key, {"hits": 0, "misses": 0})
+    st.session_state[key] = {
+        "hits": stats["hits"] + hit_count,
+        "misses": stats["misses"] + miss_count,
+        "last_hits": hit_count,
+        "last_misses": miss_count
+    }
+
+def sweep_render_cache(cache_dir, keep_list):
+    '''
+    removes the cached segments which are not in keep_list and haven't been used in RENDER_CACHE_GRACE_PERIOD.
+    recently used segments and the partial files being written may belong to a concurrent render, so they are kept
+    '''
+    min_mtime = time.time() - RENDER_CACHE_GRACE_PERIOD
+    keep_list = set(os.path.abspath(p) for p in keep_list)
+    for file_name in os.listdir(cache_dir):
+        file_path = os.path.join(cache_dir, file_name)
+        if not file_name.endswith(".mp4") or os.path.abspath(file_path) in keep_list:
+            continue
+
+        try:
+            if os.path.getmtime(file_path) < min_mtime:
+                os.remove(file_path)
+        except FileNotFoundError:
+            # already removed by another render
+            pass
+
 def render_video(final_video_name, project_uuid, file_tag=InternalFileTag.GENERATED_VIDEO.value):
     '''
-    combines the main variant of all the shots to form the final video. no processing happens in this, only
-    simple combination
+    combines the main variant of all the shots to form the final video. every shot is rendered as a segment
+    of the shot's duration (along with its part of the audio), unchanged segments are reused from the
+    render cache and the segments are stream copied into the final video. a project is rendered by one session
+    at a time, under a lease which is kept alive by a heartbeat thread
     '''
-    from ui_components.methods.file_methods import convert_bytes_to_file, generate_temp_file
+    from ui_components.methods.file_methods import generate_temp_file
 
     data_repo = DataRepo()
 
@@ -243,65 +341,116 @@ def render_video(final_video_name, project_uuid, file_tag=InternalFileTag.GENERA
         time.sleep(0.3)
         return False
 
-    video_list = []
-    temp_file_list = []
-
-    # combining all the main_clip of shots in finalclip, and keeping track of temp video files
-    # in temp_file_list
     shot_list: List[InternalShotObject] = data_repo.get_shot_list(project_uuid)
-    for shot in shot_list:
-        if not shot.main_clip:
-            st.error("Please generate all videos")
-            time.sleep(0.7)
-            return False
-        
-        shot_video = sync_audio_and_duration(shot.main_clip, shot.uuid, audio_sync_required=False)
-        if not shot_video:
-            st.error("Audio sync failed. Length mismatch")
-            time.sleep(0.7)
-            return False
-        
-        data_repo.update_shot(uuid=shot.uuid, main_clip_id=shot_video.uuid)
-        data_repo.add_interpolated_clip(shot.uuid, interpolated_clip_id=shot_video.uuid)
-
-        temp_video_file = None
-        if shot_video.hosted_url:
-            temp_video_file = generate_temp_file(shot_video.hosted_url, '.mp4')
-            temp_file_list.append(temp_video_file)
-
-        file_path = temp_video_file.name if temp_video_file else shot_video.local_path
-        video_list.append(file_path)
+    if not len(shot_list) or any(not shot.main_clip for shot in shot_list):
+        st.error("Please generate all videos")
+        time.sleep(0.7)
+        return False
 
-    finalclip = concatenate_videoclips([VideoFileClip(v) for v in video_list])
+    project_settings = data_repo.get_project_setting(project_uuid)
+    audio_file = project_settings.audio
+    cache_dir = f"videos/{project_uuid}/assets/videos/render_cache"
+    os.makedirs(cache_dir, exist_ok=True)
 
-    # writing the video to the temp file
-    output_video_file = f"videos/{project_uuid}/assets/videos/2_completed/{final_video_name}.mp4"
-    temp_video_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
-    finalclip.write_videofile(
-        temp_video_file.name,
-        fps=60,  # or 60 if your original video is 60fps
-        audio_bitrate="128k",
-        bitrate="5000k",
-        codec="libx264",
-        audio_codec="aac"
-    )
-
-    temp_video_file.close()
-    video_bytes = None
-    with open(temp_video_file.name, "rb") as f:
-        video_bytes = f.read()
+    lock_key = f"render_{project_uuid}"
+    lease = acquire_lock(lock_key, lease_duration=RENDER_LEASE_DURATION)
+    if not lease:
+        st.error("This project is being rendered in another session, please try again once it's done")
+        time.sleep(0.7)
+        return False
 
-    _ = convert_bytes_to_file(
-        file_location_to_save=output_video_file,
-        mime_type="video/mp4",
-        file_bytes=video_bytes,
-        project_uuid=project_uuid,
-        inference_log_id=None,
-        filename=final_video_name,
-        tag=file_tag
-    )
+    heartbeat = LeaseHeartbeat(lock_key, lease, RENDER_LEASE_DURATION).start()
 
-    for file in temp_file_list:
-        os.remove(file.name)
+    video_list = []
+    temp_file_list = []
+    hit_count, miss_count = 0, 0
+    audio_location, start_timestamp = None, 0
+    try:
+        for shot in shot_list:
+            key = get_segment_cache_key(shot.main_clip, shot.duration, audio_file, start_timestamp, \
+                                        project_settings.width, project_settings.height)
+            segment_path = os.path.join(cache_dir, key + ".mp4")
+            if os.path.exists(segment_path):
+                hit_count += 1
+                # marking the segment as recently used, so that a concurrent render doesn't sweep it
+                os.utime(segment_path)
+            else:
+                miss_count += 1
+                if audio_file and not audio_location:
+                    audio_location = audio_file.location
+                    if 'http' in audio_location:
+                        temp_audio_file = generate_temp_file(audio_location, '.mp4')
+                        temp_file_list.append(temp_audio_file)
+                        audio_location = temp_audio_file.name
+
+                video_location = shot.main_clip.local_path
+                if shot.main_clip.hosted_url:
+                    temp_video_file = generate_temp_file(shot.main_clip.hosted_url, '.mp4')
+                    temp_file_list.append(temp_video_file)
+                    video_location = temp_video_file.name
+
+                # rendering in a separate file first, so that a failed render doesn't leave a partial segment in the
+                # cache. the name is unique so that concurrent renders of the same segment don't write the same file
+                partial_path = os.path.join(cache_dir, f"{key}.{uuid.uuid4().hex}.partial.mp4")
+                try:
+                    VideoProcessor.render_segment(video_location, shot.duration, partial_path, project_settings.width, \
+                                                  project_settings.height, audio_location, start_timestamp)
+                    os.replace(partial_path, segment_path)
+                finally:
+                    if os.path.exists(partial_path):
+                        os.remove(partial_path)
+
+            video_list.append(segment_path)
+            start_timestamp += round(shot.duration, 2)
+            if heartbeat.lost.is_set():
+                raise Exception("render lease lost")
+
+        update_render_cache_stats(project_uuid, hit_count, miss_count)
+        sweep_render_cache(cache_dir, video_list)
+
+        # rendering straight to the destination, hosted renders are uploaded from a temp file
+        output_video_file = f"videos/{project_uuid}/assets/videos/2_completed/{final_video_name}.mp4"
+        if SERVER == ServerType.DEVELOPMENT.value:
+            os.makedirs(os.path.dirname(output_video_file), exist_ok=True)
+            render_path = output_video_file
+        else:
+            temp_video_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
+            temp_video_file.close()
+            temp_file_list.append(temp_video_file)
+            render_path = temp_video_file.name
+
+        VideoProcessor.concat_videos(video_list, render_path)
+        if heartbeat.lost.is_set():
+            raise Exception("render lease lost")
+
+        file_data = {
+            "name": final_video_name,
+            "type": InternalFileType.VIDEO.value,
+            "project_id": project_uuid,
+            "tag": file_tag
+        }
+        if render_path == output_video_file:
+            file_data.update({'local_path': output_video_file})
+        else:
+            with open(render_path, "rb") as f:
+                file_data.update({'hosted_url': data_repo.upload_file(f, '.mp4')})
+
+        _ = data_repo.create_file(**file_data)
+    except ffmpeg.Error as e:
+        app_logger.log(LoggingType.ERROR, f"Error rendering the video: {e.stderr.decode() if e.stderr else e}")
+        st.error("Video rendering failed")
+        time.sleep(0.7)
+        return False
+    except Exception as e:
+        app_logger.log(LoggingType.ERROR, f"Error rendering the video: {e}")
+        st.error("Video rendering failed")
+        time.sleep(0.7)
+        return False
+    finally:
+        heartbeat.stop()
+        release_lock(lock_key, lease)
+        for file in temp_file_list:
+            if os.path.exists(file.name):
+                os.remove(file.name)
 
     return True
\ No newline at end of file
@@ -19,6 +19,7 @@ class InternalFileObject:
         self.tag = kwargs['tag'] if key_present('tag', kwargs) else None
         self.created_on = kwargs['created_on'] if key_present('created_on', kwargs) else None
         self.shot_uuid = kwargs['shot_uuid'] if key_present('shot_uuid', kwargs) else ""
+        self.source_file_uuid = kwargs['source_file_uuid'] if key_present('source_file_uuid', kwargs) else ""
         self.inference_log = InferenceLogObject(**kwargs['inference_log']) if key_present('inference_log', kwargs) else None
         self.project = InternalProjectObject(**kwargs['project']) if key_present('project', kwargs) else None
 
@@ -268,13 +269,27 @@ class InferenceLogObject:
             **kwargs["project"]) if key_present('project', kwargs) else None
         self.model = InternalAIModelObject(
             **kwargs["model"]) if key_present('model', kwargs) else None
-        self.input_params = kwargs['input_params'] if key_present('input_params', kwargs) else None
+        # input_params is left out of the projected lists, in which case it's fetched on the first access
+        self._input_params_loaded = 'input_params' in kwargs
+        self._input_params = kwargs['input_params'] if key_present('input_params', kwargs) else None
         self.output_details = kwargs['output_details'] if key_present('output_details', kwargs) else None
         self.total_inference_time = kwargs['total_inference_time'] if key_present('total_inference_time', kwargs) else None
         self.status = kwargs['status'] if key_present('status', kwargs) else None
         self.updated_on = datetime.datetime.fromisoformat(kwargs['updated_on'][:26]) if key_present('updated_on', kwargs) else None
         self.model_name = kwargs['model_name'] if key_present('model_name', kwargs) else ""
 
+    @property
+    def input_params(self):
+        if not self._input_params_loaded and self.uuid:
+            from utils.data_repo.data_repo import DataRepo
+
+            data_repo = DataRepo()
+            log = data_repo.get_inference_log_from_uuid(self.uuid)
+            self._input_params = log.input_params if log else None
+            self._input_params_loaded = True
+        
+        return self._input_params
+
 def key_present(key, dict):
     if key in dict and dict[key] is not None:
         return True
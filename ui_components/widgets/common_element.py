@@ -1,3 +1,4 @@
+from shared.constants import InternalFileTag
 from utils.data_repo.data_repo import DataRepo
 import streamlit as st
 import time
@@ -9,4 +10,23 @@ def duplicate_shot_button(shot_uuid, position="shot_view"):
         data_repo.duplicate_shot(shot.uuid)
         st.success("Shot duplicated successfully")
         time.sleep(0.3)
-        st.rerun()
\ No newline at end of file
+        st.rerun()
+def video_preview_element(video_file, derived_file_dict, key="temp"):
+    '''
+    shows the low resolution preview of the video (or its poster if the preview is not ready yet), the full video
+    is only loaded on demand. derived_file_dict is {tag: file} of the video (check DataRepo.get_derived_file_dict).
+    returns True if the full video is shown
+    '''
+    preview_file = derived_file_dict.get(InternalFileTag.PREVIEW_VIDEO.value, None)
+    poster_file = derived_file_dict.get(InternalFileTag.POSTER_IMAGE.value, None)
+    if not (preview_file or poster_file) or \
+        st.checkbox("Full quality", key=f"{key}_full_video_{video_file.uuid}"):
+        st.video(video_file.location, format='mp4', start_time=0)
+        return True
+
+    if preview_file:
+        st.video(preview_file.location, format='mp4', start_time=0)
+    else:
+        st.image(poster_file.location, use_column_width=True)
+    
+    return False
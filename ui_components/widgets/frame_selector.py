@@ -5,6 +5,7 @@ from ui_components.widgets.image_carousal import display_image
 from ui_components.widgets.shot_view import update_shot_name,update_shot_duration, delete_shot_button
 from ui_components.models import InternalFrameTimingObject, InternalShotObject
 from utils.data_repo.data_repo import DataRepo
+from utils.media_processor.thumbnail import ThumbnailSize, get_thumbnail
 from ui_components.constants import WorkflowStageType
 from utils import st_memory
 from ui_components.methods.common_methods import add_new_shot
@@ -196,7 +197,7 @@ def display_shot_frames(timing_list: List[InternalFrameTimingObject], show_butto
                         timing = timing_list[idx]
                         with grid[j]:
                             if timing.primary_image and timing.primary_image.location:
-                                st.image(timing.primary_image.location, use_column_width=True)
+                                st.image(get_thumbnail(timing.primary_image.location, ThumbnailSize.MEDIUM.value), use_column_width=True)
                                 # Show button if show_button is True
                                 if show_button:
                                     # Call jump_to_single_frame_view_button function
@@ -18,6 +18,7 @@ from ui_components.widgets.common_element import duplicate_shot_button
 from ui_components.widgets.frame_movement_widgets import change_frame_shot, delete_frame_button, jump_to_single_frame_view_button, move_frame_back_button, move_frame_forward_button, replace_image_widget
 from utils.common_utils import refresh_app
 from utils.data_repo.data_repo import DataRepo
+from utils.media_processor.thumbnail import ThumbnailSize, get_thumbnail
 from utils import st_memory
 
 def shot_keyframe_element(shot_uuid, items_per_row, column=None,position="Timeline",**kwargs):
@@ -80,7 +81,7 @@ def shot_keyframe_element(shot_uuid, items_per_row, column=None,position="Timeli
                         else:
                             timing = timing_list[idx]
                             if timing.primary_image and timing.primary_image.location:
-                                st.image(timing.primary_image.location, use_column_width=True)
+                                st.image(get_thumbnail(timing.primary_image.location, ThumbnailSize.MEDIUM.value), use_column_width=True)
                             else:                        
                                 st.warning("No primary image present.")       
                                 jump_to_single_frame_view_button(idx + 1, timing_list, f"jump_to_{idx + 1}",uuid=shot.uuid)
@@ -6,7 +6,9 @@ from ui_components.widgets.frame_movement_widgets import jump_to_single_frame_vi
 import json
 import math
 from ui_components.widgets.frame_selector import update_current_frame_index
+from ui_components.widgets.common_element import video_preview_element
 
+from utils.common_utils import get_page_cursor, update_page_cursor
 from utils.data_repo.data_repo import DataRepo
 from utils.ml_processor.constants import ML_MODEL, MODEL_FILTERS
 
@@ -52,10 +54,16 @@ def sidebar_logger(shot_uuid):
     if selected_option != "All":
         log_filter_data["model_name_list"] = [selected_option]      # multiple models can be entered here for filtering if needed
     
-    log_list, total_page_count = data_repo.get_all_inference_log_list(
-        **log_filter_data
+    # cursors are only valid for the filters they were fetched with
+    cursor_list_key = 'sidebar_log_' + json.dumps({k: v for k, v in log_filter_data.items() if k != 'page'}, default=str)
+    log_list, res_payload = data_repo.get_all_inference_log_list(
+        **log_filter_data,
+        cursor=get_page_cursor(cursor_list_key, page_number),
+        fields=['uuid', 'input_params', 'output_details', 'status', 'model_name', 'created_on', 'updated_on']
     )
+    update_page_cursor(cursor_list_key, page_number, res_payload)
     
+    total_page_count = res_payload.get('total_pages', 1)
     if project_setting.total_log_pages != total_page_count:
         project_setting.total_log_pages = total_page_count
         st.rerun()
@@ -65,10 +73,16 @@ def sidebar_logger(shot_uuid):
     # display_list = log_list[(page_number - 1) * items_per_page : page_number * items_per_page]                
 
     if log_list and len(log_list):
-        file_list = data_repo.get_file_list_from_log_uuid_list([log.uuid for log in log_list])
+        file_list = data_repo.get_file_list_from_log_uuid_list(
+            [log.uuid for log in log_list],
+            fields=['uuid', 'type', 'tag', 'local_path', 'hosted_url', 'inference_log.uuid']
+        )
         log_file_dict = {}
         for file in file_list:
             log_file_dict[str(file.inference_log.uuid)] = file
+        
+        # previews/posters of the output videos
+        derived_file_dict = data_repo.get_derived_file_dict([file.uuid for file in file_list if file.type == InternalFileType.VIDEO.value])
 
         # st.markdown("---")
         for _, log in enumerate(log_list):
@@ -100,7 +114,8 @@ def sidebar_logger(shot_uuid):
                     if output_url.endswith('png') or output_url.endswith('jpg') or output_url.endswith('jpeg') or output_url.endswith('gif'):
                         st.image(output_url)
                     elif output_url.endswith('mp4'):
-                        st.video(output_url, format='mp4', start_time=0)
+                        output_file = log_file_dict[log.uuid]
+                        video_preview_element(output_file, derived_file_dict.get(str(output_file.uuid), {}), key="sidebar_logger")
                     else:
                         st.info("No data to display")         
         
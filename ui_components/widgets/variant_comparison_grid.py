@@ -9,6 +9,7 @@ from ui_components.methods.common_methods import promote_image_variant, promote_
 from ui_components.methods.file_methods import create_duplicate_file
 from ui_components.methods.video_methods import sync_audio_and_duration
 from ui_components.widgets.shot_view import create_video_download_button
+from ui_components.widgets.common_element import video_preview_element
 from ui_components.models import InternalFileObject
 from ui_components.widgets.add_key_frame_element import add_key_frame
 from ui_components.widgets.animation_style_element import update_interpolation_settings
@@ -29,6 +30,8 @@ def variant_comparison_grid(ele_uuid, stage=CreativeProcessType.MOTION.value):
         shot = data_repo.get_shot_from_uuid(shot_uuid)
         variants = shot.interpolated_clip_list
         timing_list = data_repo.get_timing_list_from_shot(shot.uuid)
+        # previews/posters of the clips, the full clips are loaded on demand
+        derived_file_dict = data_repo.get_derived_file_dict([variant.uuid for variant in variants if variant])
     else:
         timing_uuid = ele_uuid        
         timing = data_repo.get_timing_from_uuid(timing_uuid)
@@ -73,8 +76,11 @@ def variant_comparison_grid(ele_uuid, stage=CreativeProcessType.MOTION.value):
                 st.success("**Main variant**")
             # Display the main variant
             if stage == CreativeProcessType.MOTION.value:
-                st.video(variants[current_variant].location, format='mp4', start_time=0) if (current_variant != -1 and variants[current_variant]) else st.error("No video present")
-                create_video_download_button(variants[current_variant].location, tag="var_compare")
+                if current_variant != -1 and variants[current_variant]:
+                    if video_preview_element(variants[current_variant], derived_file_dict.get(str(variants[current_variant].uuid), {}), key="var_compare"):
+                        create_video_download_button(variants[current_variant].location, tag="var_compare")
+                else:
+                    st.error("No video present")
                 variant_inference_detail_element(variants[current_variant], stage, shot_uuid, timing_list, tag="var_compare")                        
 
             else:
@@ -104,8 +110,11 @@ def variant_comparison_grid(ele_uuid, stage=CreativeProcessType.MOTION.value):
                         st.rerun()
 
                 if stage == CreativeProcessType.MOTION.value:                    
-                    st.video(variants[variant_index].location, format='mp4', start_time=0) if variants[variant_index] else st.error("No video present")
-                    create_video_download_button(variants[variant_index].location, tag="var_details")
+                    if variants[variant_index]:
+                        if video_preview_element(variants[variant_index], derived_file_dict.get(str(variants[variant_index].uuid), {}), key="var_details"):
+                            create_video_download_button(variants[variant_index].location, tag="var_details")
+                    else:
+                        st.error("No video present")
                     variant_inference_detail_element(variants[variant_index], stage, shot_uuid, timing_list, tag="var_details")
 
                 else:
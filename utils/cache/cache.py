@@ -1,3 +1,9 @@
+import functools
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
 import streamlit as st
 
 from utils.enum import ExtendedEnum
@@ -18,97 +24,659 @@ class CacheKey(ExtendedEnum):
     USER = 'user'
 
 
+# secondary keys on which cached objects can be looked up (apart from the uuid)
+class CacheIndex(ExtendedEnum):
+    NAME = "name"
+    LOG_UUID = "log_uuid"
+    SHOT_UUID = "shot_uuid"
+    PROJECT_UUID = "project_uuid"
+    USER_UUID = "user_uuid"
+    FILE_UUID = "file_uuid"         # files embedded in the cached object
+    TIMING_UUID = "timing_uuid"     # timings embedded in the cached object
+
+
+def _nested_uuid(obj, *attr_list):
+    for attr in attr_list:
+        obj = getattr(obj, attr, None)
+        if obj is None:
+            return None
+
+    return obj.uuid
+
+def _timing_file_uuid_list(timing):
+    res = [_nested_uuid(timing, attr) for attr in ['source_image', 'mask', 'canny_image', 'primary_image']]
+    if timing.alternative_images:
+        alternative_images = timing.alternative_images
+        res.extend(json.loads(alternative_images) if isinstance(alternative_images, str) else alternative_images)
+
+    return res
+
+def _shot_file_uuid_list(shot):
+    res = [_nested_uuid(shot, 'main_clip')] + [clip.uuid for clip in shot.interpolated_clip_list]
+    for timing in shot.timing_list:
+        res.extend(_timing_file_uuid_list(timing))
+
+    return res
+
+# {data_type: {index_name: value_getter}} - indexes maintained for every data type
+CACHE_INDEX_MAP = {
+    CacheKey.FILE.value: {
+        CacheIndex.NAME.value: lambda f: f.name,
+        CacheIndex.LOG_UUID.value: lambda f: _nested_uuid(f, 'inference_log'),
+        CacheIndex.SHOT_UUID.value: lambda f: f.shot_uuid,
+        CacheIndex.PROJECT_UUID.value: lambda f: _nested_uuid(f, 'project'),
+    },
+    CacheKey.TIMING_DETAILS.value: {
+        CacheIndex.SHOT_UUID.value: lambda t: _nested_uuid(t, 'shot'),
+        CacheIndex.PROJECT_UUID.value: lambda t: _nested_uuid(t, 'shot', 'project'),
+        CacheIndex.FILE_UUID.value: _timing_file_uuid_list,
+    },
+    CacheKey.SHOT.value: {
+        CacheIndex.PROJECT_UUID.value: lambda s: _nested_uuid(s, 'project'),
+        CacheIndex.FILE_UUID.value: _shot_file_uuid_list,
+        CacheIndex.TIMING_UUID.value: lambda s: [timing.uuid for timing in s.timing_list],
+    },
+    CacheKey.PROJECT_SETTING.value: {
+        CacheIndex.PROJECT_UUID.value: lambda s: _nested_uuid(s, 'project'),
+    },
+    CacheKey.AI_MODEL.value: {
+        CacheIndex.NAME.value: lambda m: m.name,
+    },
+    CacheKey.LOG.value: {
+        CacheIndex.PROJECT_UUID.value: lambda l: _nested_uuid(l, 'project'),
+    },
+    CacheKey.PROJECT.value: {
+        CacheIndex.USER_UUID.value: lambda p: p.user_uuid,
+    },
+}
+
+# {data_type: [(dependent_data_type, index_name)]} - cached objects which embed the data type and
+# have to be dropped along with it (file -> timings -> shots)
+CACHE_DEPENDENCY_MAP = {
+    CacheKey.FILE.value: [
+        (CacheKey.TIMING_DETAILS.value, CacheIndex.FILE_UUID.value),
+        (CacheKey.SHOT.value, CacheIndex.FILE_UUID.value),
+    ],
+    CacheKey.TIMING_DETAILS.value: [
+        (CacheKey.SHOT.value, CacheIndex.TIMING_UUID.value),
+    ],
+}
+
+
+class CachePolicy:
+    def __init__(self, max_items=None, ttl=None):
+        self.max_items = max_items      # LRU capacity of the data type
+        self.ttl = ttl                  # seconds after which an entry is considered stale
+
+# only these data types are evicted (LRU/TTL/byte budget). others are always looked up as complete
+# groups (e.g. all timings of a project) and are invalidated explicitly by the cache_data wrappers
+CACHE_POLICY_MAP = {
+    CacheKey.FILE.value: CachePolicy(max_items=3000, ttl=30 * 60),
+    CacheKey.LOG.value: CachePolicy(max_items=500, ttl=5 * 60),
+    CacheKey.LOG_PAGES.value: CachePolicy(max_items=100, ttl=5 * 60),
+    CacheKey.PROJECT.value: CachePolicy(max_items=200, ttl=30 * 60),
+    CacheKey.USER.value: CachePolicy(max_items=200, ttl=30 * 60),
+}
+
+SESSION_CACHE_BYTE_BUDGET = 128 * 1024 * 1024   # approx. memory a single browser session can hold in the cache
+
+# data types which are also kept in the process wide SharedCache (same for every browser session)
+SHARED_CACHE_KEY_LIST = [
+    CacheKey.AI_MODEL.value,
+    CacheKey.APP_SETTING.value,
+    CacheKey.PROJECT_SETTING.value,
+    CacheKey.FILE.value,
+]
+
+
+def _get_uuid(data):
+    return str(data['uuid'] if type(data) is dict else data.uuid)
+
+
+# rough deep size of the cached object graph (nested project/log objects included)
+def approx_size(obj, seen=None, depth=0):
+    if seen is None:
+        seen = set()
+
+    if id(obj) in seen or depth > 6:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k, seen, depth + 1) + approx_size(v, seen, depth + 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(approx_size(ele, seen, depth + 1) for ele in obj)
+    elif hasattr(obj, '__dict__'):
+        size += approx_size(obj.__dict__, seen, depth + 1)
+
+    return size
+
+
+# runs the method under the store's lock. the runner's worker threads share a single session state,
+# so a store can be read and written by several threads at once
+def _synchronized(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class CacheStore:
+    '''
+    keyed store for a single data type. objects are kept in LRU order against their uuid
+    and secondary indexes ({index_name: {value: {uuid: None}}}) are maintained on every write.
+    the public methods are thread safe
+    '''
+    def __init__(self, data_type):
+        self._lock = threading.RLock()
+        self.data_type = data_type
+        self.policy = CACHE_POLICY_MAP.get(data_type, None)
+        self.data = OrderedDict()
+        self.meta = {}      # {uuid: (added_on, approx_size)}
+        self.stamp = {}     # {uuid: SharedCache version stamp at the time of caching}
+        self.index = {k: {} for k in CACHE_INDEX_MAP.get(data_type, {}).keys()}
+        self.complete_group_list = set()    # {(index_name, value)} groups which are cached in their entirety
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def evictable(self):
+        return self.policy is not None
+
+    def _is_expired(self, uuid):
+        if not (self.policy and self.policy.ttl):
+            return False
+
+        return self.meta[uuid][0] + self.policy.ttl < time.time()
+
+    def _evict(self, uuid):
+        if self.remove(uuid):
+            self.evictions += 1
+
+    def _lookup(self, uuid):
+        if uuid not in self.data:
+            return None
+
+        if self._is_expired(uuid):
+            self._evict(uuid)
+            return None
+
+        self.data.move_to_end(uuid)
+        return self.data[uuid]
+
+    def _index_values(self, data):
+        if type(data) is dict:
+            return {}
+
+        res = {}
+        for index_name, value_getter in CACHE_INDEX_MAP.get(self.data_type, {}).items():
+            try:
+                value = value_getter(data)
+            except AttributeError:
+                value = None
+
+            value_list = value if isinstance(value, (list, tuple, set)) else [value]
+            value_list = list(dict.fromkeys(str(v) for v in value_list if v not in [None, ""]))
+            if len(value_list):
+                res[index_name] = value_list
+
+        return res
+
+    @_synchronized
+    def contains(self, uuid):
+        return str(uuid) in self.data
+
+    @_synchronized
+    def get(self, uuid):
+        data = self._lookup(str(uuid))
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return data
+
+    @_synchronized
+    def get_by_index(self, index_name, value):
+        uuid_list = list(self.index.get(index_name, {}).get(str(value), {}).keys())
+        res = [data for data in (self._lookup(uuid) for uuid in uuid_list) if data is not None]
+        if len(res):
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        return res
+
+    @_synchronized
+    def put(self, data, stamp=None):
+        uuid = _get_uuid(data)
+        if uuid in self.data:
+            self.remove(uuid)
+
+        self.data[uuid] = data
+        self.meta[uuid] = (time.time(), approx_size(data))
+        self.stamp[uuid] = stamp
+        self.size += self.meta[uuid][1]
+        for index_name, value_list in self._index_values(data).items():
+            for value in value_list:
+                self.index[index_name].setdefault(value, {})[uuid] = None
+
+        if self.policy and self.policy.max_items:
+            while len(self.data) > self.policy.max_items:
+                self.evict_lru()
+
+    # removes the least recently used entry and returns the bytes freed
+    @_synchronized
+    def evict_lru(self):
+        if not len(self.data):
+            return 0
+
+        uuid = next(iter(self.data))
+        freed = self.meta[uuid][1]
+        self._evict(uuid)
+        return freed
+
+    @_synchronized
+    def remove(self, uuid):
+        uuid = str(uuid)
+        data = self.data.pop(uuid, None)
+        if data is None:
+            return False
+
+        self.size -= self.meta.pop(uuid)[1]
+        self.stamp.pop(uuid, None)
+        for index_name, value_list in self._index_values(data).items():
+            for value in value_list:
+                # a group missing one of its members can no longer be served from the cache
+                self.complete_group_list.discard((index_name, value))
+                uuid_dict = self.index[index_name].get(value, {})
+                uuid_dict.pop(uuid, None)
+                if not uuid_dict:
+                    self.index[index_name].pop(value, None)
+
+        return True
+
+    # uuids referring to the value, without touching the LRU order or the stats
+    @_synchronized
+    def peek_index(self, index_name, value):
+        return list(self.index.get(index_name, {}).get(str(value), {}).keys())
+
+    @_synchronized
+    def mark_complete(self, index_name, value):
+        self.complete_group_list.add((index_name, str(value)))
+
+    @_synchronized
+    def mark_incomplete(self, index_name, value):
+        self.complete_group_list.discard((index_name, str(value)))
+
+    @_synchronized
+    def get_stamp(self, uuid):
+        return self.stamp.get(str(uuid), None)
+
+    @_synchronized
+    def uuid_list(self):
+        return list(self.data.keys())
+
+    # time at which the least recently used entry was added (None if the store is empty)
+    @_synchronized
+    def lru_added_on(self):
+        return self.meta[next(iter(self.data))][0] if len(self.data) else None
+
+    @_synchronized
+    def is_complete(self, index_name, value):
+        return (index_name, str(value)) in self.complete_group_list
+
+    @_synchronized
+    def clear(self):
+        self.data.clear()
+        self.meta.clear()
+        self.stamp.clear()
+        self.complete_group_list.clear()
+        self.index = {k: {} for k in self.index.keys()}
+        self.size = 0
+
+    @_synchronized
+    def values(self):
+        for uuid in [uuid for uuid in self.data if self._is_expired(uuid)]:
+            self._evict(uuid)
+
+        return list(self.data.values())
+
+    @_synchronized
+    def stats(self):
+        return {
+            'count': len(self.data),
+            'bytes': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    @_synchronized
+    def __len__(self):
+        return len(self.data)
+
+
+class SharedCache:
+    '''
+    process wide tier under the session cache, shared by every browser session. every entry carries a
+    version stamp (generation of the data type, version of the uuid) which is bumped on invalidation,
+    session copies with an older stamp are treated as stale
+    '''
+    _lock = threading.RLock()
+    _store_dict = {}        # {data_type: CacheStore}
+    _generation = {}        # {data_type: int}
+    _version = {}           # {data_type: {uuid: int}}
+
+    @classmethod
+    def _get_store(cls, data_type) -> CacheStore:
+        if data_type not in cls._store_dict:
+            cls._store_dict[data_type] = CacheStore(data_type)
+
+        return cls._store_dict[data_type]
+
+    @classmethod
+    def stamp(cls, uuid, data_type):
+        with cls._lock:
+            return (cls._generation.get(data_type, 0), cls._version.get(data_type, {}).get(str(uuid), 0))
+
+    # returns (obj, stamp)
+    @classmethod
+    def get(cls, uuid, data_type):
+        with cls._lock:
+            data = cls._get_store(data_type).get(uuid)
+            return data, cls.stamp(uuid, data_type)
+
+    # returns [(obj, stamp)]
+    @classmethod
+    def get_by_index(cls, index_name, value, data_type):
+        with cls._lock:
+            data_list = cls._get_store(data_type).get_by_index(index_name, value)
+            return [(data, cls.stamp(_get_uuid(data), data_type)) for data in data_list]
+
+    # returns [(obj, stamp)] for every object of the data type
+    @classmethod
+    def get_all(cls, data_type):
+        with cls._lock:
+            return [(data, cls.stamp(_get_uuid(data), data_type)) for data in cls._get_store(data_type).values()]
+
+    @classmethod
+    def put(cls, data, data_type):
+        with cls._lock:
+            cls._get_store(data_type).put(data)
+            return cls.stamp(_get_uuid(data), data_type)
+
+    @classmethod
+    def invalidate(cls, uuid, data_type):
+        with cls._lock:
+            uuid = str(uuid)
+            version_dict = cls._version.setdefault(data_type, {})
+            version_dict[uuid] = version_dict.get(uuid, 0) + 1
+            cls._get_store(data_type).remove(uuid)
+
+    @classmethod
+    def invalidate_group(cls, index_name, value, data_type):
+        with cls._lock:
+            for uuid in cls._get_store(data_type).peek_index(index_name, value):
+                cls.invalidate(uuid, data_type)
+
+    @classmethod
+    def invalidate_all(cls, data_type):
+        with cls._lock:
+            cls._generation[data_type] = cls._generation.get(data_type, 0) + 1
+            cls._version[data_type] = {}
+            cls._get_store(data_type).clear()
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            return {data_type: store.stats() for data_type, store in cls._store_dict.items()}
+
+
 class StCache:
+    _store_lock = threading.Lock()      # two threads of the same session shouldn't create a store each
+
     @staticmethod
-    def get(uuid, data_type):
+    def _get_store(data_type, create=False) -> CacheStore:
+        store = st.session_state.get(data_type, None)
+        if not isinstance(store, CacheStore):
+            store = None
+
+        if store is None and create:
+            with StCache._store_lock:
+                store = st.session_state.get(data_type, None)
+                if not isinstance(store, CacheStore):
+                    store = CacheStore(data_type)
+                    st.session_state[data_type] = store
+
+        return store
+
+    @staticmethod
+    def _is_shared(data_type):
+        return data_type in SHARED_CACHE_KEY_LIST
+
+    # drops the session copy if the entry has been invalidated (by any session) since it was cached
+    @staticmethod
+    def _drop_if_stale(store, uuid):
         uuid = str(uuid)
-        if data_type in st.session_state:
-            for ele in st.session_state[data_type]:
-                ele_uuid = ele['uuid'] if type(ele) is dict else str(ele.uuid)
-                if ele_uuid == uuid:
-                    return ele
-        
-        return None
-    
+        if store.contains(uuid) and store.get_stamp(uuid) != SharedCache.stamp(uuid, store.data_type):
+            store.remove(uuid)
+
+    @staticmethod
+    def _put(store, data):
+        stamp = SharedCache.put(data, store.data_type) if StCache._is_shared(store.data_type) else None
+        store.put(data, stamp=stamp)
+
+    @staticmethod
+    def get(uuid, data_type):
+        store = StCache._get_store(data_type)
+        if StCache._is_shared(data_type):
+            if store is not None:
+                StCache._drop_if_stale(store, uuid)
+
+            data = store.get(uuid) if store is not None else None
+            if data is None:
+                data, stamp = SharedCache.get(uuid, data_type)
+                if data is not None:
+                    StCache._get_store(data_type, create=True).put(data, stamp=stamp)
+
+            return data
+
+        return store.get(uuid) if store is not None else None
+
+    # returns {uuid: obj} for all the uuids present in the cache
+    @staticmethod
+    def get_many(uuid_list, data_type):
+        res = {}
+        for uuid in uuid_list:
+            obj = StCache.get(uuid, data_type)
+            if obj is not None:
+                res[str(uuid)] = obj
+
+        return res
+
+    @staticmethod
+    def get_by_index(index_name, value, data_type):
+        if value is None:
+            return []
+
+        store = StCache._get_store(data_type)
+        if StCache._is_shared(data_type):
+            if store is not None:
+                for data in store.get_by_index(index_name, value):
+                    StCache._drop_if_stale(store, _get_uuid(data))
+
+            data_list = store.get_by_index(index_name, value) if store is not None else []
+            if not len(data_list):
+                shared_list = SharedCache.get_by_index(index_name, value, data_type)
+                if len(shared_list):
+                    store = StCache._get_store(data_type, create=True)
+                    for data, stamp in shared_list:
+                        store.put(data, stamp=stamp)
+                    data_list = [data for data, _ in shared_list]
+
+            return data_list
+
+        return store.get_by_index(index_name, value) if store is not None else []
+
     @staticmethod
     def update(data, data_type) -> bool:
-        object_found = False
-        uuid = data['uuid'] if type(data) is dict else data.uuid
-        uuid = str(uuid)
+        store = StCache._get_store(data_type)
+        if store is not None and store.contains(_get_uuid(data)):
+            StCache._put(store, data)
+            StCache._enforce_budget()
+            return True
 
-        if data_type in st.session_state:
-            object_list = st.session_state[data_type]
-            for idx, ele in enumerate(object_list):
-                ele_uuid = ele['uuid'] if type(ele) is dict else str(ele.uuid)
-                if ele_uuid == uuid:
-                    object_list[idx] = data
-                    object_found = True
-            
-            st.session_state[data_type] = object_list
+        return False
 
-        return object_found
-    
     @staticmethod
     def add(data, data_type) -> bool:
-        uuid = data['uuid'] if type(data) is dict else data.uuid
-        uuid = str(uuid)
-        obj = StCache.get(uuid, data_type)
-        if obj:
-            StCache.update(data, data_type)
-        else:
-            if data_type in st.session_state:
-                object_list = st.session_state[data_type]
-            else:
-                object_list = []
-            
-            object_list.append(data)
+        store = StCache._get_store(data_type, create=True)
+        StCache._put(store, data)
+        StCache._enforce_budget()
+        return True
+
+    @staticmethod
+    def add_many(data_list, data_type) -> bool:
+        store = StCache._get_store(data_type, create=True)
+        for data in data_list:
+            StCache._put(store, data)
+
+        StCache._enforce_budget()
+        return True
+
+    # evicts least recently used entries of the evictable data types until the session is within budget
+    @staticmethod
+    def _enforce_budget():
+        store_list = [StCache._get_store(c) for c in CacheKey.value_list()]
+        store_list = [store for store in store_list if store is not None]
+        total_size = sum(store.size for store in store_list)
 
-            st.session_state[data_type] = object_list
+        evictable_list = [store for store in store_list if store.evictable]
+        while total_size > SESSION_CACHE_BYTE_BUDGET:
+            added_on_list = [(store.lru_added_on(), store) for store in evictable_list]
+            added_on_list = [(added_on, store) for added_on, store in added_on_list if added_on is not None]
+            if not len(added_on_list):
+                break
 
+            # evicting from the store whose least recently used entry is the oldest
+            store = min(added_on_list, key=lambda x: x[0])[1]
+            total_size -= store.evict_lru()
 
     @staticmethod
     def delete(uuid, data_type) -> bool:
-        object_found = False
-        uuid = str(uuid)
-        if data_type in st.session_state:
-            object_list = st.session_state[data_type]
-            for ele in object_list:
-                ele_uuid = ele['uuid'] if type(ele) is dict else str(ele.uuid)
-                if ele_uuid == uuid:
-                    object_list.remove(ele)
-                    object_found = True
-                    break
-            
-            st.session_state[data_type] = object_list
-        
-        return object_found
-    
-    @staticmethod
-    def delete_all(data_type) -> bool:
-        if data_type in st.session_state:
-            del st.session_state[data_type]
+        if StCache._is_shared(data_type):
+            SharedCache.invalidate(uuid, data_type)
+
+        store = StCache._get_store(data_type)
+        return store.remove(uuid) if store is not None else False
+
+    # clears the data but keeps the hit/miss/eviction counters of the data type
+    @staticmethod
+    def delete_all(data_type, shared=True) -> bool:
+        if shared and StCache._is_shared(data_type):
+            SharedCache.invalidate_all(data_type)
+
+        store = StCache._get_store(data_type)
+        if store is not None:
+            store.clear()
             return True
-        
+
         return False
-    
+
+    # drops the object along with every cached object that embeds it (file -> timings -> shots)
     @staticmethod
-    def add_all(data_list, data_type) -> bool:
-        for data in data_list:
-            StCache.add(data, data_type)
-        
+    def delete_with_dependents(uuid, data_type) -> bool:
+        for dependent_data_type, index_name in CACHE_DEPENDENCY_MAP.get(data_type, []):
+            store = StCache._get_store(dependent_data_type)
+            if store is not None:
+                for dependent_uuid in store.peek_index(index_name, uuid):
+                    StCache.delete_with_dependents(dependent_uuid, dependent_data_type)
+
+        return StCache.delete(uuid, data_type)
+
+    # drops every cached object of the group (e.g. all timings of a shot) along with its dependents
+    @staticmethod
+    def delete_group(index_name, value, data_type) -> bool:
+        if value is None:
+            return False
+
+        # other sessions may hold the group even if this one doesn't
+        if StCache._is_shared(data_type):
+            SharedCache.invalidate_group(index_name, value, data_type)
+
+        store = StCache._get_store(data_type)
+        if store is None:
+            return False
+
+        for uuid in store.peek_index(index_name, value):
+            StCache.delete_with_dependents(uuid, data_type)
+
+        store.mark_incomplete(index_name, value)
         return True
-        
+
+    # marks that every object of the group is present in the cache (e.g. all shots of a project)
+    @staticmethod
+    def mark_complete(index_name, value, data_type):
+        StCache._get_store(data_type, create=True).mark_complete(index_name, value)
+
+    # marks that the group may be missing objects (e.g. a timing added to the project)
+    @staticmethod
+    def mark_incomplete(index_name, value, data_type):
+        store = StCache._get_store(data_type)
+        if store is not None:
+            store.mark_incomplete(index_name, value)
+
+    @staticmethod
+    def is_complete(index_name, value, data_type) -> bool:
+        store = StCache._get_store(data_type)
+        return store.is_complete(index_name, value) if store is not None else False
+
+    @staticmethod
+    def add_all(data_list, data_type) -> bool:
+        return StCache.add_many(data_list, data_type)
+
     @staticmethod
     def get_all(data_type):
-        if data_type in st.session_state:
-            return st.session_state[data_type]
-        
-        return []
-    
-    # deletes all cached objects of every data type
+        store = StCache._get_store(data_type)
+        if StCache._is_shared(data_type):
+            if store is not None:
+                for uuid in store.uuid_list():
+                    StCache._drop_if_stale(store, uuid)
+
+            data_list = store.values() if store is not None else []
+            if not len(data_list):
+                shared_list = SharedCache.get_all(data_type)
+                if len(shared_list):
+                    store = StCache._get_store(data_type, create=True)
+                    for data, stamp in shared_list:
+                        store.put(data, stamp=stamp)
+                    data_list = [data for data, _ in shared_list]
+
+            return data_list
+
+        return store.values() if store is not None else []
+
+    # {data_type: {count, bytes, hits, misses, evictions}} for the current session
+    @staticmethod
+    def get_stats():
+        res = {}
+        for c in CacheKey.value_list():
+            store = StCache._get_store(c)
+            if store is not None:
+                res[c] = store.stats()
+
+        return res
+
+    # deletes all cached objects of every data type (only for the current session)
     @staticmethod
     def clear_entire_cache() -> bool:
         for c in CacheKey.value_list():
-            StCache.delete_all(c)
-        
-        return True
\ No newline at end of file
+            StCache.delete_all(c, shared=False)
+
+        return True
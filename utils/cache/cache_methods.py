@@ -1,11 +1,94 @@
+import json
+import math
+import time
 import uuid
 from shared.logging.logging import AppLogger
-from utils.cache.cache import CacheKey, StCache
+from shared.constants import InternalFileType, ProjectChangeType
+from utils.cache.cache import CacheIndex, CacheKey, StCache
 import streamlit as st
 
 logger = AppLogger()
 
 
+# drops the shot along with its cached timings (a timing update can shift the aux_frame_index of the other timings of the shot)
+def _invalidate_shot_timing_list(shot_uuid, project_uuid=None):
+    if not shot_uuid:
+        return
+
+    StCache.delete_group(CacheIndex.SHOT_UUID.value, shot_uuid, CacheKey.TIMING_DETAILS.value)
+    StCache.delete(shot_uuid, CacheKey.SHOT.value)
+    if project_uuid:
+        StCache.mark_incomplete(CacheIndex.PROJECT_UUID.value, project_uuid, CacheKey.TIMING_DETAILS.value)
+        StCache.mark_incomplete(CacheIndex.PROJECT_UUID.value, project_uuid, CacheKey.SHOT.value)
+
+# drops all the shots of the project (shot_idx of the other shots can shift on any shot update)
+def _invalidate_project_shot_list(project_uuid):
+    if project_uuid:
+        StCache.delete_group(CacheIndex.PROJECT_UUID.value, project_uuid, CacheKey.SHOT.value)
+    else:
+        StCache.delete_all(CacheKey.SHOT.value)
+
+FILE_BATCH_SIZE = 100           # max uuids in a single bulk file lookup
+
+# files referenced by uuid (and not embedded) in the fetched entities, i.e. the variants of the timings and the
+# temp files of the projects, are queued and fetched along with the next file lookup that misses the cache
+def _queue_referenced_file_list(entity_list):
+    uuid_list = []
+    for entity in entity_list:
+        timing_list = getattr(entity, 'timing_list', None) or [entity]
+        for timing in timing_list:
+            alternative_images = getattr(timing, 'alternative_images', None)
+            if alternative_images:
+                uuid_list.extend(json.loads(alternative_images) if isinstance(alternative_images, str) else alternative_images)
+        
+        temp_file_list = getattr(entity, 'temp_file_list', None)
+        if temp_file_list:
+            uuid_list.extend(json.loads(temp_file_list).values())
+
+    if len(uuid_list):
+        st.session_state.setdefault('queued_file_uuid_set', set()).update(str(file_uuid) for file_uuid in uuid_list if file_uuid)
+
+# pops upto count queued uuids which are still not cached
+def _pop_queued_file_list(count, exclude_list=[]):
+    queued_set = st.session_state.get('queued_file_uuid_set', set())
+    queued_set.difference_update(set(exclude_list) | set(StCache.get_many(list(queued_set), CacheKey.FILE.value).keys()))
+    uuid_list = []
+    while len(queued_set) and len(uuid_list) < count:
+        uuid_list.append(queued_set.pop())
+    
+    return uuid_list
+
+LIST_COUNT_CACHE_TTL = 30      # secs, counts also change through the runner
+
+# total counts of the paginated lists are cached, so that every page fetch doesn't run a COUNT(*)
+def _get_list_count_key(list_name, kwargs):
+    filter_data = {k: v for k, v in kwargs.items() if k not in ['page', 'cursor', 'include_count', 'fields']}
+    return list_name + json.dumps(filter_data, sort_keys=True, default=str)
+
+def _get_cached_list_count(count_key):
+    count_data = st.session_state.get('list_count_cache', {}).get(count_key, None)
+    return count_data[0] if count_data and count_data[1] + LIST_COUNT_CACHE_TTL > time.time() else None
+
+# caches the count of the fetched page or adds the cached count (count None) in it
+def _update_list_count(res_payload, count_key, count):
+    if not (res_payload and 'data_per_page' in res_payload):
+        return
+    
+    if count is None:
+        if 'count' in res_payload:
+            st.session_state.setdefault('list_count_cache', {})[count_key] = (res_payload['count'], time.time())
+    else:
+        res_payload['count'] = count
+        res_payload['total_pages'] = max(math.ceil(count / res_payload['data_per_page']), 1)
+
+def _invalidate_list_count():
+    st.session_state['list_count_cache'] = {}
+
+def _get_cached_shot_project_uuid(shot_uuid):
+    shot = StCache.get(shot_uuid, CacheKey.SHOT.value) if shot_uuid else None
+    return shot.project.uuid if shot and shot.project else None
+
+
 # NOTE: caching only timing_details, project settings, models and app settings. invalidating cache everytime a related data is updated
 def cache_data(cls):
     # ---------------- FILE METHODS ----------------------
@@ -14,8 +97,9 @@ def cache_data(cls):
         file = original_func(self, *args, **kwargs)
         
         if file:
-            StCache.delete(file.uuid, CacheKey.FILE.value)
+            StCache.delete_with_dependents(file.uuid, CacheKey.FILE.value)
             StCache.add(file, CacheKey.FILE.value)
+            _invalidate_list_count()
         
         return file
     
@@ -29,6 +113,7 @@ def cache_data(cls):
         if file:
             StCache.delete(file.uuid, CacheKey.FILE.value)
             StCache.add(file, CacheKey.FILE.value)
+            _invalidate_list_count()
         
         return file
     
@@ -40,8 +125,10 @@ def cache_data(cls):
         status = original_func(self, *args, **kwargs)
         
         if status:
-            StCache.delete(args[0], CacheKey.TIMING_DETAILS.value)
-            StCache.delete_all(CacheKey.TIMING_DETAILS.value)
+            StCache.delete_with_dependents(args[0], CacheKey.FILE.value)
+            _invalidate_list_count()
+        
+        return status
     
     setattr(cls, '_original_delete_file_from_uuid', cls.delete_file_from_uuid)
     setattr(cls, "delete_file_from_uuid", _cache_delete_file_from_uuid)
@@ -51,8 +138,10 @@ def cache_data(cls):
         file = original_func(self, *args, **kwargs)
         
         if file:
-            StCache.delete(file.uuid, CacheKey.FILE.value)
+            # timings/shots embedding the file are dropped as well
+            StCache.delete_with_dependents(file.uuid, CacheKey.FILE.value)
             StCache.add(file, CacheKey.FILE.value)
+            _invalidate_list_count()
         
         return file
     
@@ -60,11 +149,10 @@ def cache_data(cls):
     setattr(cls, "update_file", _cache_update_file)
 
     def _cache_get_file_from_name(self, *args, **kwargs):
-        file_list = StCache.get_all(CacheKey.FILE.value)
-        if file_list and len(file_list) and len(args) > 0:
-            for file in file_list:
-                if file.name == args[0]:
-                    return file
+        if len(args) > 0:
+            file_list = StCache.get_by_index(CacheIndex.NAME.value, args[0], CacheKey.FILE.value)
+            if len(file_list):
+                return file_list[0]
         
         original_func = getattr(cls, '_original_get_file_from_name')
         file = original_func(self, *args, **kwargs)
@@ -76,11 +164,26 @@ def cache_data(cls):
     setattr(cls, '_original_get_file_from_name', cls.get_file_from_name)
     setattr(cls, "get_file_from_name", _cache_get_file_from_name)
 
+    # fetches the files along with the queued ones in a single bulk call and caches them
+    def _fetch_file_list(self, uuid_list):
+        uuid_list = list(dict.fromkeys(str(file_uuid) for file_uuid in uuid_list))
+        uuid_list += _pop_queued_file_list(FILE_BATCH_SIZE - len(uuid_list), uuid_list)
+        original_func = getattr(cls, '_original_get_image_list_from_uuid_list')
+        file_list = original_func(self, uuid_list, file_type=None)
+        StCache.add_many(file_list, CacheKey.FILE.value)
+        
+        return {str(file.uuid): file for file in file_list}
+
     def _cache_get_file_from_uuid(self, *args, **kwargs):
-        file_list = StCache.get_all(CacheKey.FILE.value)
-        if file_list and len(file_list) and len(args) > 0:
-            for file in file_list:
-                if file.uuid == args[0]:
+        if len(args) > 0:
+            file = StCache.get(args[0], CacheKey.FILE.value)
+            if file:
+                return file
+            
+            # coalescing the lookup with the queued files
+            if len(st.session_state.get('queued_file_uuid_set', set())):
+                file = _fetch_file_list(self, [args[0]]).get(str(args[0]), None)
+                if file:
                     return file
         
         original_func = getattr(cls, '_original_get_file_from_uuid')
@@ -94,35 +197,18 @@ def cache_data(cls):
     setattr(cls, "get_file_from_uuid", _cache_get_file_from_uuid)
 
     def _cache_get_image_list_from_uuid_list(self, *args, **kwargs):
-        not_found_list, found_list = [], {}
         # finding the images in the cache
-        file_list = StCache.get_all(CacheKey.FILE.value)
-        if file_list and len(file_list) and len(args) > 0:
-            for file in file_list:
-                if file.uuid in args[0]:
-                    found_list[file.uuid] = file
-
-        for file_uuid in args[0]:
-            if file_uuid not in found_list:
-                not_found_list.append(file_uuid)
+        found_list = StCache.get_many(args[0], CacheKey.FILE.value)
+        not_found_list = [file_uuid for file_uuid in args[0] if str(file_uuid) not in found_list]
 
-        # images which are not present in the cache are fetched through the db
+        # images which are not present in the cache are fetched (along with the queued files) through the db
         if len(not_found_list):
-            original_func = getattr(cls, '_original_get_image_list_from_uuid_list')
-            res = original_func(self, not_found_list, **kwargs)
-            for file in res:
-                found_list[file.uuid] = file
-
-        # ordering the result
-        res = []
-        if found_list:
-            for file_uuid in args[0]:
-                if file_uuid in found_list:
-                    res.append(found_list[file_uuid])
-
-        for file in res:
-            StCache.delete(file, CacheKey.FILE.value)
-            StCache.add(file, CacheKey.FILE.value)
+            found_list.update(_fetch_file_list(self, not_found_list))
+
+        # ordering the result (the fetched batch can have other types as well)
+        file_type = args[1] if len(args) > 1 else kwargs.get('file_type', InternalFileType.IMAGE.value)
+        res = [found_list[str(file_uuid)] for file_uuid in args[0] if str(file_uuid) in found_list and \
+               (not file_type or found_list[str(file_uuid)].type == file_type)]
         
         return res
     
@@ -132,32 +218,24 @@ def cache_data(cls):
     def _cache_get_file_list_from_log_uuid_list(self, *args, **kwargs):
         not_found_list, found_list = [], {}
         # finding files in the cache
-        file_list = StCache.get_all(CacheKey.FILE.value)
-        if file_list and len(file_list) and len(args) > 0:
-            for file in file_list:
-                if file.inference_log and file.inference_log.uuid in args[0]:
-                    found_list[file.inference_log.uuid] = file
-        
         for log_uuid in args[0]:
-            if log_uuid not in found_list:
+            file_list = StCache.get_by_index(CacheIndex.LOG_UUID.value, log_uuid, CacheKey.FILE.value)
+            if len(file_list):
+                found_list[str(log_uuid)] = file_list[0]
+            else:
                 not_found_list.append(log_uuid)
 
         if len(not_found_list):
             original_func = getattr(cls, '_original_get_file_list_from_log_uuid_list')
-            res = original_func(self, not_found_list, **kwargs)
-            for file in res:
+            fetched_list = original_func(self, not_found_list, **kwargs)
+            # projected files are partial, so they are not cached
+            if kwargs.get('fields', None) is None:
+                StCache.add_many(fetched_list, CacheKey.FILE.value)
+            for file in fetched_list:
                 if file.inference_log:
-                    found_list[file.inference_log.uuid] = file
+                    found_list[str(file.inference_log.uuid)] = file
 
-        res = []
-        if found_list:
-            for log_uuid in args[0]:
-                if log_uuid in found_list:
-                    res.append(found_list[log_uuid])
-
-        for file in res:
-            StCache.delete(file, CacheKey.FILE.value)
-            StCache.add(file, CacheKey.FILE.value)
+        res = [found_list[str(log_uuid)] for log_uuid in args[0] if str(log_uuid) in found_list]
         
         return res
     
@@ -169,8 +247,6 @@ def cache_data(cls):
     def _cache_create_project(self, *args, **kwargs):
         original_func = getattr(cls, '_original_create_project')
         project = original_func(self, *args, **kwargs)
-        if project:
-            StCache.delete_all(CacheKey.PROJECT_SETTING.value)
         
         return project
     
@@ -183,8 +259,10 @@ def cache_data(cls):
         status = original_func(self, *args, **kwargs)
         
         if status:
-            StCache.delete_all(CacheKey.PROJECT_SETTING.value)
-            StCache.delete_all(CacheKey.TIMING_DETAILS.value)
+            for data_type in [CacheKey.PROJECT_SETTING.value, CacheKey.TIMING_DETAILS.value, CacheKey.SHOT.value]:
+                StCache.delete_group(CacheIndex.PROJECT_UUID.value, args[0], data_type)
+        
+        return status
     
     setattr(cls, '_original_delete_project_from_uuid', cls.delete_project_from_uuid)
     setattr(cls, "delete_project_from_uuid", _cache_delete_project_from_uuid)
@@ -192,11 +270,10 @@ def cache_data(cls):
     
     # -------------------- AI MODEL METHODS ----------------------
     def _cache_get_ai_model_from_uuid(self, *args, **kwargs):
-        model_list = StCache.get_all(CacheKey.AI_MODEL.value)
-        if model_list and len(model_list) and len(args) > 0:
-            for model in model_list:
-                if model.uuid == args[0]:
-                    return model
+        if len(args) > 0:
+            model = StCache.get(args[0], CacheKey.AI_MODEL.value)
+            if model:
+                return model
         
         original_func = getattr(cls, '_original_get_ai_model_from_uuid')
         model = original_func(self, *args, **kwargs)
@@ -209,11 +286,10 @@ def cache_data(cls):
     setattr(cls, "get_ai_model_from_uuid", _cache_get_ai_model_from_uuid)
 
     def _cache_get_ai_model_from_name(self, *args, **kwargs):
-        model_list = StCache.get_all(CacheKey.AI_MODEL.value)
-        if model_list and len(model_list) and len(args) > 0:
-            for model in model_list:
-                if model.name == args[0]:
-                    return model
+        if len(args) > 0:
+            model_list = StCache.get_by_index(CacheIndex.NAME.value, args[0], CacheKey.AI_MODEL.value)
+            if len(model_list):
+                return model_list[0]
         
         original_func = getattr(cls, '_original_get_ai_model_from_name')
         model = original_func(self, *args, **kwargs)
@@ -229,7 +305,7 @@ def cache_data(cls):
         original_func = getattr(cls, '_original_create_ai_model')
         ai_model = original_func(self, *args, **kwargs)
         if ai_model:
-            StCache.delete_all(CacheKey.AI_MODEL.value)
+            StCache.add(ai_model, CacheKey.AI_MODEL.value)
         
         return ai_model
     
@@ -240,7 +316,8 @@ def cache_data(cls):
         original_func = getattr(cls, '_original_update_ai_model')
         ai_model = original_func(self, *args, **kwargs)
         if ai_model:
-            StCache.delete_all(CacheKey.AI_MODEL.value)
+            StCache.delete(ai_model.uuid, CacheKey.AI_MODEL.value)
+            StCache.add(ai_model, CacheKey.AI_MODEL.value)
         
         return ai_model
     
@@ -252,7 +329,9 @@ def cache_data(cls):
         status = original_func(self, *args, **kwargs)
         
         if status:
-            StCache.delete_all(CacheKey.AI_MODEL.value)
+            StCache.delete(args[0], CacheKey.AI_MODEL.value)
+        
+        return status
     
     setattr(cls, '_original_delete_ai_model_from_uuid', cls.delete_ai_model_from_uuid)
     setattr(cls, "delete_ai_model_from_uuid", _cache_delete_ai_model_from_uuid)
@@ -261,22 +340,19 @@ def cache_data(cls):
     # ------------------- TIMING METHODS ---------------------
     def _cache_get_timing_list_from_project(self, *args, **kwargs):
         # checking if it's already present in the cache
-        timing_list = StCache.get_all(CacheKey.TIMING_DETAILS.value)
-        if timing_list and len(timing_list) and len(args) > 0:
-            project_specific_list = []
-            for timing in timing_list:
-                if timing.shot.project.uuid == args[0]:
-                    project_specific_list.append(timing)
-
-            # if there are any timings for the project, return them
-            if len(project_specific_list):
-                sorted_objects = sorted(project_specific_list, key=lambda x: x.aux_frame_index)
-                return sorted_objects
+        # only served from the cache if all the timings of the project are present in it
+        if len(args) > 0 and StCache.is_complete(CacheIndex.PROJECT_UUID.value, args[0], CacheKey.TIMING_DETAILS.value):
+            project_specific_list = StCache.get_by_index(CacheIndex.PROJECT_UUID.value, args[0], CacheKey.TIMING_DETAILS.value)
+            sorted_objects = sorted(project_specific_list, key=lambda x: x.aux_frame_index)
+            return sorted_objects
         
         original_func = getattr(cls, '_original_get_timing_list_from_project')
         timing_list = original_func(self, *args, **kwargs)
         if timing_list and len(timing_list):
-            StCache.add_all(timing_list, CacheKey.TIMING_DETAILS.value)
+            StCache.add_many(timing_list, CacheKey.TIMING_DETAILS.value)
+            _queue_referenced_file_list(timing_list)
+            if len(args) > 0:
+                StCache.mark_complete(CacheIndex.PROJECT_UUID.value, args[0], CacheKey.TIMING_DETAILS.value)
 
         return timing_list
     
@@ -286,56 +362,82 @@ def cache_data(cls):
     def _cache_create_timing(self, *args, **kwargs):
         original_func = getattr(cls, '_original_create_timing')
         timing = original_func(self, *args, **kwargs)
-        if timing:
-            StCache.delete_all(CacheKey.TIMING_DETAILS.value)
-            StCache.delete_all(CacheKey.SHOT.value)
+        if timing and timing.shot:
+            _invalidate_shot_timing_list(timing.shot.uuid, timing.shot.project.uuid if timing.shot.project else None)
         
         return timing
     
     setattr(cls, '_original_create_timing', cls.create_timing)
     setattr(cls, "create_timing", _cache_create_timing)
 
+    # bulk timing ops invalidate the shot only once for the whole batch
+    def _cache_create_timings(self, *args, **kwargs):
+        original_func = getattr(cls, '_original_create_timings')
+        timing_list = original_func(self, *args, **kwargs)
+        if timing_list and timing_list[0].shot:
+            shot = timing_list[0].shot
+            _invalidate_shot_timing_list(shot.uuid, shot.project.uuid if shot.project else None)
+        
+        return timing_list
+    
+    setattr(cls, '_original_create_timings', cls.create_timings)
+    setattr(cls, "create_timings", _cache_create_timings)
+
+    def _cache_reorder_timings(self, *args, **kwargs):
+        project_uuid = _get_cached_shot_project_uuid(args[0])
+        original_func = getattr(cls, '_original_reorder_timings')
+        status = original_func(self, *args, **kwargs)
+        if status:
+            _invalidate_shot_timing_list(args[0], project_uuid)
+        
+        return status
+    
+    setattr(cls, '_original_reorder_timings', cls.reorder_timings)
+    setattr(cls, "reorder_timings", _cache_reorder_timings)
+
     def _cache_update_specific_timing(self, *args, **kwargs):
+        # timing update can be moving it from one shot to another, so both the shots are invalidated
+        prev_timing = StCache.get(args[0], CacheKey.TIMING_DETAILS.value)
         original_func = getattr(cls, '_original_update_specific_timing')
         status = original_func(self, *args, **kwargs)
         
-        if status:
-            StCache.delete_all(CacheKey.TIMING_DETAILS.value)
-            # deleting shots as well. for e.g. timing update can be moving it from
-            # one shot to another
-            StCache.delete_all(CacheKey.SHOT.value)
+        if not status:
+            return status
+
+        StCache.delete_with_dependents(args[0], CacheKey.TIMING_DETAILS.value)
+        if prev_timing and prev_timing.shot:
+            _invalidate_shot_timing_list(prev_timing.shot.uuid)
 
-        # updating the timing list
         timing_func = getattr(cls, '_original_get_timing_from_uuid')
         timing = timing_func(self, args[0])
-        if timing and timing.shot.project:
-            # original_func = getattr(cls, '_original_get_timing_list_from_project')
-            # timing_list = original_func(self, timing.shot.project.uuid)
-            # if timing_list and len(timing_list):
-            #     StCache.add_all(timing_list, CacheKey.TIMING_DETAILS.value)
+        if timing and timing.shot and timing.shot.project:
+            project_uuid = timing.shot.project.uuid
+            _invalidate_shot_timing_list(timing.shot.uuid, project_uuid)
 
             # updating shot list
             original_func = getattr(cls, '_original_get_shot_list')
-            shot_list = original_func(self, timing.shot.project.uuid)
+            shot_list = original_func(self, project_uuid)
             if shot_list:
-                StCache.add_all(shot_list, CacheKey.SHOT.value)
+                StCache.add_many(shot_list, CacheKey.SHOT.value)
+                StCache.mark_complete(CacheIndex.PROJECT_UUID.value, project_uuid, CacheKey.SHOT.value)
+
+        return status
     
     setattr(cls, '_original_update_specific_timing', cls.update_specific_timing)
     setattr(cls, "update_specific_timing", _cache_update_specific_timing)
 
     def _cache_get_timing_from_uuid(self, *args, **kwargs):
-        if not kwargs.get('invalidate_cache', False):
-            timing_list = StCache.get_all(CacheKey.TIMING_DETAILS.value)
-            if timing_list and len(timing_list) and len(args) > 0:
-                for timing in timing_list:
-                    if timing.uuid == args[0]:
-                        return timing
+        if not kwargs.get('invalidate_cache', False) and len(args) > 0:
+            timing = StCache.get(args[0], CacheKey.TIMING_DETAILS.value)
+            if timing:
+                return timing
         
         original_func = getattr(cls, '_original_get_timing_from_uuid')
         timing = original_func(self, *args, **kwargs)
 
         if timing:
             StCache.add(timing, CacheKey.TIMING_DETAILS.value)
+            _queue_referenced_file_list([timing])
 
         return timing
     
@@ -343,12 +445,20 @@ def cache_data(cls):
     setattr(cls, "get_timing_from_uuid", _cache_get_timing_from_uuid)
 
     def _cache_delete_timing_from_uuid(self, *args, **kwargs):
+        # fetching the shot before the timing is deleted
+        timing = StCache.get(args[0], CacheKey.TIMING_DETAILS.value) or \
+            getattr(cls, '_original_get_timing_from_uuid')(self, args[0])
         original_func = getattr(cls, '_original_delete_timing_from_uuid')
         status = original_func(self, *args, **kwargs)
         
         if status:
-            StCache.delete(args[0],CacheKey.TIMING_DETAILS.value)
-            StCache.delete_all(CacheKey.SHOT.value)
+            StCache.delete_with_dependents(args[0], CacheKey.TIMING_DETAILS.value)
+            if timing and timing.shot:
+                _invalidate_shot_timing_list(timing.shot.uuid, timing.shot.project.uuid if timing.shot.project else None)
+            else:
+                StCache.delete_all(CacheKey.SHOT.value)
+        
+        return status
     
     setattr(cls, '_original_delete_timing_from_uuid', cls.delete_timing_from_uuid)
     setattr(cls, "delete_timing_from_uuid", _cache_delete_timing_from_uuid)
@@ -358,8 +468,15 @@ def cache_data(cls):
         status = original_func(self, *args, **kwargs)
         
         if status:
-            StCache.delete_all(CacheKey.TIMING_DETAILS.value)
-            StCache.delete_all(CacheKey.SHOT.value)
+            project_uuid = args[0] if len(args) > 0 else None
+            if project_uuid:
+                StCache.delete_group(CacheIndex.PROJECT_UUID.value, project_uuid, CacheKey.TIMING_DETAILS.value)
+                StCache.delete_group(CacheIndex.PROJECT_UUID.value, project_uuid, CacheKey.SHOT.value)
+            else:
+                StCache.delete_all(CacheKey.TIMING_DETAILS.value)
+                StCache.delete_all(CacheKey.SHOT.value)
+        
+        return status
     
     setattr(cls, '_original_remove_existing_timing', cls.remove_existing_timing)
     setattr(cls, "remove_existing_timing", _cache_remove_existing_timing)
@@ -369,8 +486,10 @@ def cache_data(cls):
         status = original_func(self, *args, **kwargs)
         
         if status:
-            StCache.delete_all(CacheKey.TIMING_DETAILS.value)
-            StCache.delete_all(CacheKey.SHOT.value)
+            # only this timing (and the shot containing it) is affected
+            StCache.delete_with_dependents(args[0], CacheKey.TIMING_DETAILS.value)
+        
+        return status
     
     setattr(cls, '_original_remove_primary_frame', cls.remove_primary_frame)
     setattr(cls, "remove_primary_frame", _cache_remove_primary_frame)
@@ -380,8 +499,10 @@ def cache_data(cls):
         status = original_func(self, *args, **kwargs)
         
         if status:
-            StCache.delete_all(CacheKey.TIMING_DETAILS.value)
-            StCache.delete_all(CacheKey.SHOT.value)
+            # only this timing (and the shot containing it) is affected
+            StCache.delete_with_dependents(args[0], CacheKey.TIMING_DETAILS.value)
+        
+        return status
     
     setattr(cls, '_original_remove_source_image', cls.remove_source_image)
     setattr(cls, "remove_source_image", _cache_remove_source_image)
@@ -393,10 +514,10 @@ def cache_data(cls):
         if not len(kwargs) and len(app_setting_list):
             return app_setting_list[0]
         
-        if app_setting_list and len(app_setting_list) and len(kwargs.keys()):
-            for app_setting in app_setting_list:
-                if app_setting.uuid == kwargs['uuid']:
-                    return app_setting
+        if len(kwargs.keys()):
+            app_setting = StCache.get(kwargs['uuid'], CacheKey.APP_SETTING.value)
+            if app_setting:
+                return app_setting
         
         original_func = getattr(cls, '_original_get_app_setting_from_uuid')
         app_setting = original_func(self, *args, **kwargs)
@@ -431,8 +552,9 @@ def cache_data(cls):
         
         original_func = getattr(cls, '_original_get_all_app_setting_list')
         app_setting_list = original_func(self, *args, **kwargs)
-        StCache.delete_all(CacheKey.APP_SETTING.value)
-        StCache.add_all(app_setting_list, CacheKey.APP_SETTING.value)
+        # a read miss only resets this session's copy, the shared tier holds nothing newer
+        StCache.delete_all(CacheKey.APP_SETTING.value, shared=False)
+        StCache.add_many(app_setting_list, CacheKey.APP_SETTING.value)
 
         return app_setting_list
     
@@ -483,10 +605,9 @@ def cache_data(cls):
 
     # ------------------ PROJECT SETTING METHODS ---------------------
     def _cache_get_project_setting(self, *args, **kwargs):
-        project_setting_list = StCache.get_all(CacheKey.PROJECT_SETTING.value)
-        for ele in project_setting_list:
-            if str(ele.project.uuid) == str(args[0]):
-                return ele
+        project_setting_list = StCache.get_by_index(CacheIndex.PROJECT_UUID.value, args[0], CacheKey.PROJECT_SETTING.value)
+        if len(project_setting_list):
+            return project_setting_list[0]
         
         original_func = getattr(cls, '_original_get_project_setting')
         project_setting = original_func(self, *args, **kwargs)
@@ -514,7 +635,7 @@ def cache_data(cls):
         status = original_func(self, *args, **kwargs)
         
         if status:
-            StCache.delete_all(CacheKey.PROJECT_SETTING.value)
+            StCache.delete_group(CacheIndex.PROJECT_UUID.value, args[0], CacheKey.PROJECT_SETTING.value)
         
         return status
     
@@ -526,7 +647,7 @@ def cache_data(cls):
         status = original_func(self, *args, **kwargs)
         
         if status:
-            StCache.delete_all(CacheKey.PROJECT_SETTING.value)
+            StCache.delete(kwargs['uuid'], CacheKey.PROJECT_SETTING.value)
         
         return status
     
@@ -586,21 +707,21 @@ def cache_data(cls):
 
     # ---------------------- SHOT METHODS ---------------------
     def _cache_get_shot_from_uuid(self, *args, **kwargs):
-        shot_list = StCache.get_all(CacheKey.SHOT.value)
-        if shot_list and len(shot_list):
-            for shot in shot_list:
-                if shot.uuid == args[0]:
-                    return shot
+        shot = StCache.get(args[0], CacheKey.SHOT.value)
+        if shot:
+            return shot
         
         original_func = getattr(cls, '_original_get_shot_from_uuid')
         shot = original_func(self, *args, **kwargs)
 
-        if shot and not (shot_list and len(shot_list)):
+        # loading all the shots of the project, as the rest of them are generally accessed next
+        if shot and shot.project and not StCache.is_complete(CacheIndex.PROJECT_UUID.value, shot.project.uuid, CacheKey.SHOT.value):
             original_func = getattr(cls, '_original_get_shot_list')
             shot_list = original_func(self, shot.project.uuid)
             if shot_list:
-                StCache.delete_all(CacheKey.SHOT.value)
-                StCache.add_all(shot_list, CacheKey.SHOT.value)
+                StCache.add_many(shot_list, CacheKey.SHOT.value)
+                StCache.mark_complete(CacheIndex.PROJECT_UUID.value, shot.project.uuid, CacheKey.SHOT.value)
+                _queue_referenced_file_list(shot_list)
         
         return shot
 
@@ -608,10 +729,10 @@ def cache_data(cls):
     setattr(cls, "get_shot_from_uuid", _cache_get_shot_from_uuid)
 
     def _cache_get_shot_from_number(self, *args, **kwargs):
-        shot_list = StCache.get_all(CacheKey.SHOT.value)
-        if shot_list and len(shot_list):
+        if StCache.is_complete(CacheIndex.PROJECT_UUID.value, args[0], CacheKey.SHOT.value):
+            shot_list = StCache.get_by_index(CacheIndex.PROJECT_UUID.value, args[0], CacheKey.SHOT.value)
             for shot in shot_list:
-                if shot.project.uuid == args[0] and shot.shot_idx == kwargs['shot_number']:
+                if shot.shot_idx == kwargs['shot_number']:
                     return shot
         
         original_func = getattr(cls, '_original_get_shot_from_number')
@@ -624,21 +745,18 @@ def cache_data(cls):
 
     def _cache_get_shot_list(self, *args, **kwargs):
         if not kwargs.get('invalidate_cache', False):
-            shot_list = StCache.get_all(CacheKey.SHOT.value)
-            if shot_list and len(shot_list):
-                res = []
-                for shot in shot_list:
-                    if shot.project.uuid == args[0]:
-                        res.append(shot)
-                if len(res):
-                    return res
+            if StCache.is_complete(CacheIndex.PROJECT_UUID.value, args[0], CacheKey.SHOT.value):
+                res = StCache.get_by_index(CacheIndex.PROJECT_UUID.value, args[0], CacheKey.SHOT.value)
+                return sorted(res, key=lambda x: x.shot_idx)
         else:
-            StCache.delete_all(CacheKey.SHOT.value)
+            StCache.delete_group(CacheIndex.PROJECT_UUID.value, args[0], CacheKey.SHOT.value)
         
         original_func = getattr(cls, '_original_get_shot_list')
         shot_list = original_func(self, *args, **kwargs)
         if shot_list:
-            StCache.add_all(shot_list, CacheKey.SHOT.value)
+            StCache.add_many(shot_list, CacheKey.SHOT.value)
+            StCache.mark_complete(CacheIndex.PROJECT_UUID.value, args[0], CacheKey.SHOT.value)
+            _queue_referenced_file_list(shot_list)
         
         return shot_list
     
@@ -650,9 +768,9 @@ def cache_data(cls):
         shot = original_func(self, *args, **kwargs)
         
         if shot:
-            # deleting all the shots as this could have affected other shots as well
+            # deleting all the shots of the project as this could have affected other shots as well
             # for e.g. shot_idx shift
-            StCache.delete_all(CacheKey.SHOT.value)
+            _invalidate_project_shot_list(args[0] if len(args) > 0 else kwargs.get('project_uuid', None))
         
         return shot
     
@@ -660,11 +778,12 @@ def cache_data(cls):
     setattr(cls, "create_shot", _cache_create_shot)
 
     def _cache_update_shot(self, *args, **kwargs):
+        project_uuid = _get_cached_shot_project_uuid(kwargs.get('uuid', None))
         original_func = getattr(cls, '_original_update_shot')
         status = original_func(self, *args, **kwargs)
         
         if status:
-            StCache.delete_all(CacheKey.SHOT.value)
+            _invalidate_project_shot_list(project_uuid)
         
         return status
     
@@ -672,11 +791,13 @@ def cache_data(cls):
     setattr(cls, "update_shot", _cache_update_shot)
 
     def _cache_delete_shot(self, *args, **kwargs):
+        project_uuid = _get_cached_shot_project_uuid(args[0])
         original_func = getattr(cls, '_original_delete_shot')
         status = original_func(self, *args, **kwargs)
         
         if status:
-            StCache.delete(args[0], CacheKey.SHOT.value)
+            StCache.delete_group(CacheIndex.SHOT_UUID.value, args[0], CacheKey.TIMING_DETAILS.value)
+            _invalidate_project_shot_list(project_uuid)
         
         return status
     
@@ -696,11 +817,9 @@ def cache_data(cls):
     setattr(cls, "add_interpolated_clip", _cache_add_interpolated_clip)
 
     def _cache_get_timing_list_from_shot(self, *args, **kwargs):
-        shot_list = StCache.get_all(CacheKey.SHOT.value)
-        if shot_list and len(shot_list):
-            for shot in shot_list:
-                if str(shot.uuid) == str(args[0]):
-                    return shot.timing_list
+        shot = StCache.get(args[0], CacheKey.SHOT.value)
+        if shot:
+            return shot.timing_list
         
         original_func = getattr(cls, '_original_get_timing_list_from_shot')
         timing_list = original_func(self, *args, **kwargs)
@@ -711,17 +830,80 @@ def cache_data(cls):
     setattr(cls, "get_timing_list_from_shot", _cache_get_timing_list_from_shot)
 
     def _cache_duplicate_shot(self, *args, **kwargs):
+        project_uuid = _get_cached_shot_project_uuid(args[0])
         original_func = getattr(cls, '_original_duplicate_shot')
         shot = original_func(self, *args, **kwargs)
         
         if shot:
-            StCache.delete_all(CacheKey.SHOT.value)
+            _invalidate_project_shot_list(project_uuid)
         
         return shot
     
     setattr(cls, '_original_duplicate_shot', cls.duplicate_shot)
     setattr(cls, "duplicate_shot", _cache_duplicate_shot)
 
+    # ---------------------- SYNC METHODS ---------------------
+    # applies the changes made by the other sessions/processes since the last seen event
+    def _cache_get_project_change_event_list(self, *args, **kwargs):
+        original_func = getattr(cls, '_original_get_project_change_event_list')
+        event_data = original_func(self, *args, **kwargs)
+        if not event_data:
+            return event_data
+        
+        project_uuid = args[0]
+        if event_data['is_reset']:
+            StCache.delete_group(CacheIndex.PROJECT_UUID.value, project_uuid, CacheKey.FILE.value)
+            StCache.delete_group(CacheIndex.PROJECT_UUID.value, project_uuid, CacheKey.TIMING_DETAILS.value)
+            _invalidate_project_shot_list(project_uuid)
+            _invalidate_list_count()
+            return event_data
+        
+        shot_updated = False
+        for event in event_data['event_list']:
+            if event['change_type'] == ProjectChangeType.TIMING_UPDATE.value:
+                StCache.delete_with_dependents(event['entity_uuid'], CacheKey.TIMING_DETAILS.value)
+            elif event['change_type'] == ProjectChangeType.GALLERY_UPDATE.value:
+                _invalidate_list_count()
+            elif event['change_type'] == ProjectChangeType.SHOT_VIDEO_UPDATE.value:
+                StCache.delete(event['entity_uuid'], CacheKey.SHOT.value)
+                StCache.mark_incomplete(CacheIndex.PROJECT_UUID.value, project_uuid, CacheKey.SHOT.value)
+            elif event['change_type'] == ProjectChangeType.SHOT_UPDATE.value:
+                _invalidate_shot_timing_list(event['entity_uuid'], project_uuid)
+                shot_updated = True
+            elif event['change_type'] == ProjectChangeType.FILE_UPDATE.value:
+                StCache.delete_with_dependents(event['entity_uuid'], CacheKey.FILE.value)
+                _invalidate_list_count()
+        
+        # shot_idx of the other shots shifts when a shot is added/moved/deleted (positions are computed at read time)
+        if shot_updated:
+            _invalidate_project_shot_list(project_uuid)
+        
+        # new timings are not present in the cache, so the project's timing group can't be served anymore
+        if len(event_data['event_list']):
+            StCache.mark_incomplete(CacheIndex.PROJECT_UUID.value, project_uuid, CacheKey.TIMING_DETAILS.value)
+        
+        return event_data
+    
+    setattr(cls, '_original_get_project_change_event_list', cls.get_project_change_event_list)
+    setattr(cls, "get_project_change_event_list", _cache_get_project_change_event_list)
+
+    # ---------------------- PAGINATED METHODS ---------------------
+    # the pages after the first fetch reuse the cached total count instead of running a COUNT(*) again
+    def _cache_get_all_file_list(self, *args, **kwargs):
+        original_func = getattr(cls, '_original_get_all_file_list')
+        if not (kwargs.get('page', None) or kwargs.get('cursor', None)):
+            return original_func(self, *args, **kwargs)
+        
+        count_key = _get_list_count_key(CacheKey.FILE.value, kwargs)
+        count = _get_cached_list_count(count_key)
+        file_list, res_payload = original_func(self, *args, **{**kwargs, 'include_count': count is None})
+        _update_list_count(res_payload, count_key, count)
+        
+        return file_list, res_payload
+    
+    setattr(cls, '_original_get_all_file_list', cls.get_all_file_list)
+    setattr(cls, "get_all_file_list", _cache_get_all_file_list)
+
     # ---------------------- APPROXIMATE METHODS ---------------------
     '''
     these methods output whatever is last cached in them, irrespective of the input/query params
@@ -732,32 +914,34 @@ def cache_data(cls):
         if 'maintain_state' in st.session_state and st.session_state['maintain_state']:
             log_list = StCache.get_all(CacheKey.LOG.value)
             if log_list and len(log_list):
-                return log_list, st.session_state['log_pages_approx']
+                return log_list, st.session_state['log_payload_approx']
         
         original_func = getattr(cls, '_original_get_all_inference_log_list')
-        output_log_list, total_pages = original_func(self, *args, **kwargs)
+        count_key = _get_list_count_key(CacheKey.LOG.value, kwargs)
+        count = _get_cached_list_count(count_key)
+        output_log_list, res_payload = original_func(self, *args, **{**kwargs, 'include_count': count is None})
+        _update_list_count(res_payload, count_key, count)
         if output_log_list and len(output_log_list):
             StCache.delete_all(CacheKey.LOG.value)
-            StCache.add_all(output_log_list, CacheKey.LOG.value)
-            st.session_state['log_pages_approx'] = total_pages
+            StCache.add_many(output_log_list, CacheKey.LOG.value)
+            st.session_state['log_payload_approx'] = res_payload
         
-        return output_log_list, total_pages
+        return output_log_list, res_payload
     
     setattr(cls, '_original_get_all_inference_log_list', cls.get_all_inference_log_list)
     setattr(cls, "get_all_inference_log_list", _cache_get_all_inference_log_list)
 
     def _cache_get_project_from_uuid(self, *args, **kwargs):
         if 'maintain_state' in st.session_state and st.session_state['maintain_state']:
-            project_list = StCache.get_all(CacheKey.PROJECT.value)
-            if project_list and len(project_list):
-                for project in project_list:
-                    if str(project.uuid) == str(args[0]):
-                        return project
+            project = StCache.get(args[0], CacheKey.PROJECT.value)
+            if project:
+                return project
         
         original_func = getattr(cls, '_original_get_project_from_uuid')
         output_project = original_func(self, *args, **kwargs)
         if output_project:
             StCache.add(output_project, CacheKey.PROJECT.value)
+            _queue_referenced_file_list([output_project])
         
         return output_project
     
@@ -766,20 +950,14 @@ def cache_data(cls):
     
     def _cache_get_all_project_list(self, *args, **kwargs):
         if 'maintain_state' in st.session_state and st.session_state['maintain_state']:
-            project_list = StCache.get_all(CacheKey.PROJECT.value)
-            if project_list and len(project_list):
-                res = []
-                for project in project_list:
-                    if str(project.user_uuid) == str(kwargs['user_id']):
-                        res.append(project)
-                
-                if len(res):
-                    return res
+            res = StCache.get_by_index(CacheIndex.USER_UUID.value, kwargs['user_id'], CacheKey.PROJECT.value)
+            if len(res):
+                return res
         
         original_func = getattr(cls, '_original_get_all_project_list')
         output_project_list = original_func(self, *args, **kwargs)
         if output_project_list:
-            StCache.add_all(output_project_list, CacheKey.PROJECT.value)
+            StCache.add_many(output_project_list, CacheKey.PROJECT.value)
         
         return output_project_list
     
@@ -795,7 +973,7 @@ def cache_data(cls):
         original_func = getattr(cls, '_original_get_all_user_list')
         user_list = original_func(self, *args, **kwargs)
         if user_list and len(user_list):
-            StCache.add_all(user_list, CacheKey.USER.value)
+            StCache.add_many(user_list, CacheKey.USER.value)
         
         return user_list
     
@@ -3,6 +3,9 @@ import os
 import csv
 import subprocess
 import time
+import random
+import threading
+import uuid
 import psutil
 import socket
 import streamlit as st
@@ -10,9 +13,12 @@ import json
 import platform
 from shared.constants import SERVER, CreativeProcessPage, ServerType
 from ui_components.models import InternalUserObject
+from backend.constants import LOCK_LEASE_DURATION
 from utils.cache.cache import CacheKey, StCache
 from utils.data_repo.data_repo import DataRepo
 from ui_components.constants import DefaultProjectSettingParams
+from shared.logging.constants import LoggingType
+from shared.logging.logging import app_logger
 
 def set_default_values(shot_uuid):
     data_repo = DataRepo()
@@ -246,21 +252,111 @@ def is_process_active(custom_process_name, custom_process_port):
     return False
 
 
-def acquire_lock(key):
+LOCK_WAIT_TIMEOUT = 2           # secs
+LOCK_MAX_BACKOFF = 0.5          # secs
+LEASE_RENEW_FRACTION = 1 / 3    # heartbeat leases are renewed after this fraction of their duration
+
+# lock acquisition stats of this process
+_lock_metric_lock = threading.Lock()
+_lock_metrics = {
+    'acquired': 0,
+    'timed_out': 0,
+    'contended': 0,         # acquisitions which had to wait
+    'total_wait': 0,        # secs
+    'max_wait': 0,
+}
+
+def get_lock_metrics():
+    with _lock_metric_lock:
+        res = dict(_lock_metrics)
+    
+    res['avg_wait'] = res['total_wait'] / res['acquired'] if res['acquired'] else 0
+    return res
+
+def _update_lock_metrics(acquired, wait_time, attempt_count):
+    with _lock_metric_lock:
+        _lock_metrics['acquired' if acquired else 'timed_out'] += 1
+        _lock_metrics['contended'] += 1 if attempt_count > 1 else 0
+        _lock_metrics['total_wait'] += wait_time if acquired else 0
+        _lock_metrics['max_wait'] = max(_lock_metrics['max_wait'], wait_time)
+
+# returns the lease (to be passed in release_lock/renew_lock) or None if the lock couldn't be acquired
+# within the timeout. waits with an exponential backoff (with jitter) while the lock is held by someone else
+def acquire_lock(key, timeout=LOCK_WAIT_TIMEOUT, lease_duration=LOCK_LEASE_DURATION):
     data_repo = DataRepo()
-    retries = 0
-    while retries < 1:
-        lock_status = data_repo.acquire_lock(key)
-        if lock_status:
-            return lock_status
-        retries += 1
-        time.sleep(0.2)
-    return False
+    owner = uuid.uuid4().hex
+    start_time, backoff, attempt_count = time.time(), 0.02, 0
+    while True:
+        attempt_count += 1
+        lease = data_repo.acquire_lock(key, owner, lease_duration=lease_duration)
+        wait_time = time.time() - start_time
+        if lease or wait_time + backoff > timeout:
+            break
+        
+        time.sleep(random.uniform(backoff / 2, backoff))
+        backoff = min(backoff * 2, LOCK_MAX_BACKOFF)
+
+    _update_lock_metrics(bool(lease), wait_time, attempt_count)
+    if not lease:
+        app_logger.log(LoggingType.DEBUG, f"lock {key} not acquired in {round(wait_time, 2)} secs")
 
-def release_lock(key):
+    return lease or None
+
+# extends the lease, returns False if it was lost meanwhile (expired and taken over by someone else)
+def renew_lock(key, lease, lease_duration=LOCK_LEASE_DURATION):
+    data_repo = DataRepo()
+    return data_repo.renew_lock(key, lease['owner'], lease['fence'], lease_duration=lease_duration)
+
+def release_lock(key, lease):
     data_repo = DataRepo()
-    data_repo.release_lock(key)
-    return True
+    return data_repo.release_lock(key, lease['owner'])
+
+class LeaseHeartbeat:
+    '''
+    keeps a lease alive from a background thread while a long task runs under it, the lease is renewed
+    every LEASE_RENEW_FRACTION of its duration. lost is set if a renewal is refused (the lease expired and
+    was taken over), the task should stop before writing its results
+    '''
+    def __init__(self, key, lease, lease_duration=LOCK_LEASE_DURATION):
+        self.key = key
+        self.lease = lease
+        self.lease_duration = lease_duration
+        self.lost = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        # the thread reads the session (auth token of the api calls)
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx:
+            add_script_run_ctx(self._thread, ctx)
+
+        self._thread.start()
+        return self
+
+    def _run(self):
+        from django.db import connection
+
+        try:
+            while not self._stop_event.wait(self.lease_duration * LEASE_RENEW_FRACTION):
+                try:
+                    renewed = renew_lock(self.key, self.lease, self.lease_duration)
+                except Exception as e:
+                    # the lease is still valid till it expires, retrying in the next beat
+                    app_logger.log(LoggingType.ERROR, f"Error renewing the lease of {self.key}: {e}")
+                    continue
+
+                if not renewed:
+                    app_logger.log(LoggingType.ERROR, f"Lease of {self.key} lost")
+                    self.lost.set()
+                    return
+        finally:
+            connection.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
 
 
 def refresh_app(maintain_state=False):
@@ -271,3 +367,16 @@ def refresh_app(maintain_state=False):
 def padded_integer(integer, pad_length=4):
     padded_string = str(integer).zfill(pad_length)
     return padded_string
+
+# cursors of the visited pages of a paginated list, the next pages are fetched from their cursor instead of an OFFSET
+def get_page_cursor(list_key, page):
+    return st.session_state.get('page_cursor_' + list_key, {}).get(page, None)
+
+def update_page_cursor(list_key, page, res_payload):
+    cursor_dict = st.session_state.setdefault('page_cursor_' + list_key, {})
+    # the first page is always fetched fresh (new entries are added on top), so the older cursors are dropped
+    if page == 1:
+        cursor_dict.clear()
+    
+    if res_payload and res_payload.get('next_cursor', None):
+        cursor_dict[page + 1] = res_payload['next_cursor']
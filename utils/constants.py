@@ -10,6 +10,7 @@ AUTH_TOKEN = 'auth_details'
 REFRESH_AUTH_TOKEN = 'refresh_auth_details'
 RUNNER_PROCESS_NAME = 'banodoco_runner'
 RUNNER_PROCESS_PORT = 12345
+RUNNER_WEBHOOK_PORT = 12346
 
 class ImageStage(ExtendedEnum):
     SOURCE_IMAGE = 'Source Image'
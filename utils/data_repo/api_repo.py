@@ -1,10 +1,16 @@
 
+import copy
 import json
 import os
+import random
 import socket
+import threading
+import time
 
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from shared.constants import HOSTED_BACKGROUND_RUNNER_MODE, SERVER, InternalFileType, InternalResponse, ServerType
 from utils.common_decorators import log_time
 
@@ -12,21 +18,77 @@ from utils.constants import AUTH_TOKEN
 from utils.local_storage.url_storage import delete_url_param, get_url_param
 
 
-class APIRepo:
-    def __init__(self):
-        self._load_base_url()
-        self._setup_urls()
+BASE_URL_CACHE_TTL = 60        # secs, the service discovery address is resolved again after this
+HTTP_POOL_SIZE = 20             # keep-alive connections to the backend (streamlit serves the sessions in threads)
+HTTP_CONNECT_TIMEOUT = 5        # secs
+HTTP_READ_TIMEOUT = 60          # secs, a stalled response fails instead of blocking the rerun (and the deduped GETs)
+HTTP_UPLOAD_READ_TIMEOUT = 300  # secs, for the file uploads
+HTTP_MAX_RETRIES = 3
+
+
+class JitteredRetry(Retry):
+    '''
+    exponential backoff with full jitter, so that the app sessions don't retry against the backend in lockstep
+    '''
+    def get_backoff_time(self):
+        return random.uniform(0, super().get_backoff_time())
+
+
+_session_lock = threading.Lock()
+_session = None
+_base_url_data = None       # (base_url, resolved_on)
+_inflight_lock = threading.Lock()
+_inflight_dict = {}         # {request key: response data} of the GET requests in flight
+
+# keep-alive session shared by all the APIRepo instances. only the idempotent methods are retried (on connection
+# errors and gateway failures), a POST can create an entry even if the response is lost
+def get_http_session():
+    global _session
+    with _session_lock:
+        if not _session:
+            retry = JitteredRetry(
+                total=HTTP_MAX_RETRIES,
+                backoff_factor=0.3,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=['GET', 'PUT', 'DELETE'],
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+            _session = requests.Session()
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+            _session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+
+        return _session
+
+def get_base_url():
+    global _base_url_data
+    with _session_lock:
+        if _base_url_data and _base_url_data[1] + BASE_URL_CACHE_TTL > time.time():
+            return _base_url_data[0]
 
-    def _load_base_url(self):
         import dotenv
         dotenv.load_dotenv()
 
         SERVER_URL = os.getenv('SERVER_URL', '')
         if not SERVER_URL.startswith("http"):
             # connecting through service discovery
-            self.base_url = "http://" + socket.gethostbyname(SERVER_URL) + ":8080"
+            base_url = "http://" + socket.gethostbyname(SERVER_URL) + ":8080"
         else:
-            self.base_url = SERVER_URL
+            base_url = SERVER_URL
+
+        _base_url_data = (base_url, time.time())
+        return base_url
+
+
+class APIRepo:
+    def __init__(self):
+        self._load_base_url()
+        self._setup_urls()
+        self.session = get_http_session()
+
+    def _load_base_url(self):
+        self.base_url = get_base_url()
 
     def _setup_urls(self):
         # user
@@ -48,11 +110,14 @@ class APIRepo:
         self.TIMING_NUMBER_URL = '/v1/data/timing/number'
         self.SHIFT_TIMING_URL = '/v1/data/timing/shift'
         self.TIMING_LIST_URL = '/v1/data/timing/list'
+        self.TIMING_BULK_URL = '/v1/data/timing/bulk'
+        self.TIMING_REORDER_URL = '/v1/data/timing/reorder'
 
         # project
         self.PROJECT_URL = '/v1/data/project'
         self.PROJECT_LIST_URL = '/v1/data/project/list'
         self.EXPLORER_STATS_URL = '/v1/data/project/stats'
+        self.PROJECT_CHANGE_EVENT_LIST_URL = '/v1/data/project/change-event/list'
         
         # project setting
         self.PROJECT_SETTING_URL = '/v1/data/project-setting'
@@ -66,6 +131,7 @@ class APIRepo:
         self.FILE_LIST_URL = '/v1/data/file/list'
         self.FILE_UUID_LIST_URL = '/v1/data/file/uuid-list'
         self.FILE_UPLOAD_URL = '/v1/data/file/upload'
+        self.FILE_DERIVED_LIST_URL = '/v1/data/file/derived-list'
         self.FILE_EXTRA_URL = '/v1/data/file/extra'      # TODO: fix url patterns
         
         # app setting
@@ -110,33 +176,58 @@ class APIRepo:
 
         return headers
 
+    # concurrent identical GETs (same url, params and auth) share the response of the first one
     @log_time
     def http_get(self, url, params = None):
         self._load_base_url()
-        res = requests.get(self.base_url + url, params = params, headers=self._get_headers())
-        return res.json()
+        headers = self._get_headers()
+        key = (self.base_url + url, json.dumps(params, sort_keys=True, default=str), headers.get("Authorization"))
+        with _inflight_lock:
+            inflight = _inflight_dict.get(key, None)
+            is_leader = inflight is None
+            if is_leader:
+                inflight = {'event': threading.Event()}
+                _inflight_dict[key] = inflight
+
+        if not is_leader:
+            inflight['event'].wait()
+            if 'error' in inflight:
+                raise inflight['error']
+            return copy.deepcopy(inflight['data'])
+
+        try:
+            res = self.session.get(self.base_url + url, params = params, headers=headers, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+            inflight['data'] = res.json()
+            return copy.deepcopy(inflight['data'])
+        except Exception as e:
+            inflight['error'] = e
+            raise
+        finally:
+            with _inflight_lock:
+                del _inflight_dict[key]
+            inflight['event'].set()
 
     @log_time
     def http_post(self, url, data = {}, file_content = None):
         self._load_base_url()
         if file_content:
             files = {'file': file_content}
-            res = requests.post(self.base_url + url, data=data, files=files, headers=self._get_headers(None))
+            res = self.session.post(self.base_url + url, data=data, files=files, headers=self._get_headers(None), timeout=(HTTP_CONNECT_TIMEOUT, HTTP_UPLOAD_READ_TIMEOUT))
         else:
-            res = requests.post(self.base_url + url, json=data, headers=self._get_headers())
+            res = self.session.post(self.base_url + url, json=data, headers=self._get_headers(), timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
 
         return res.json()
     
     @log_time
     def http_put(self, url, data = None):
         self._load_base_url()
-        res = requests.put(self.base_url + url, json=data, headers=self._get_headers())
+        res = self.session.put(self.base_url + url, json=data, headers=self._get_headers(), timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
         return res.json()
     
     @log_time
     def http_delete(self, url, params=None):
         self._load_base_url()
-        res = requests.delete(self.base_url + url, params=params, headers=self._get_headers())
+        res = self.session.delete(self.base_url + url, params=params, headers=self._get_headers(), timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
         return res.json()
 
     #########################################
@@ -144,7 +235,7 @@ class APIRepo:
         headers = {}
         headers["Authorization"] = f"Bearer {refresh_token}"
         headers["Content-Type"] = "application/json"
-        res = requests.get(self.base_url + self.AUTH_REFRESH_URL, headers=headers)
+        res = self.session.get(self.base_url + self.AUTH_REFRESH_URL, headers=headers, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
         payload = { 'data': None }
         res_json = json.loads(res._content)
         if res.status_code == 200 and res_json['status']:
@@ -154,7 +245,7 @@ class APIRepo:
     def user_password_login(self, **kwargs):
         headers = {}
         headers["Content-Type"] = "application/json"
-        res = requests.post(self.base_url + self.AUTH_OP_URL, json=kwargs, headers=headers)
+        res = self.session.post(self.base_url + self.AUTH_OP_URL, json=kwargs, headers=headers, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
         payload = { 'data': None }
         res_json = json.loads(res._content)
         if res.status_code == 200 and res_json['status']:
@@ -164,7 +255,7 @@ class APIRepo:
     def google_user_login(self, **kwargs):
         headers = {}
         headers["Content-Type"] = "application/json"
-        res = requests.post(self.base_url + self.GOOGLE_LOGIN_URL, json=kwargs, headers=headers)
+        res = self.session.post(self.base_url + self.GOOGLE_LOGIN_URL, json=kwargs, headers=headers, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
         payload = { 'data': None }
         res_json = json.loads(res._content)
         if res.status_code == 200 and res_json['status']:
@@ -213,11 +304,21 @@ class APIRepo:
         res = self.http_get(self.FILE_URL, params={'uuid': uuid})
         return InternalResponse(res['payload'], 'success', res['status'])
     
-    def get_file_list_from_log_uuid_list(self, log_uuid_list):
-        res = self.http_post(self.FILE_UUID_LIST_URL, data={'log_uuid_list': log_uuid_list})
+    def get_file_list_from_log_uuid_list(self, log_uuid_list, fields=None):
+        data = {'log_uuid_list': log_uuid_list}
+        if fields is not None:
+            data['fields'] = fields
+        res = self.http_post(self.FILE_UUID_LIST_URL, data=data)
+        return InternalResponse(res['payload'], 'success', res['status'])
+    
+    def get_derived_file_list(self, source_file_uuid_list, tag_list=None):
+        res = self.http_post(self.FILE_DERIVED_LIST_URL, data={'source_file_uuid_list': source_file_uuid_list, 'tag_list': tag_list})
         return InternalResponse(res['payload'], 'success', res['status'])
     
+    # field projections are sent as comma separated query params
     def get_all_file_list(self, **kwargs):
+        if kwargs.get('fields', None) is not None:
+            kwargs['fields'] = ','.join(kwargs['fields'])
         res = self.http_get(self.FILE_LIST_URL, params=kwargs)
         return InternalResponse(res['payload'], 'success', res['status'])
     
@@ -316,6 +417,8 @@ class APIRepo:
         return InternalResponse(res['payload'], 'success', res['status'])
     
     def get_all_inference_log_list(self, **kwargs):
+        if kwargs.get('fields', None) is not None:
+            kwargs['fields'] = ','.join(kwargs['fields'])
         res = self.http_get(self.LOG_LIST_URL, params=kwargs)
         return InternalResponse(res['payload'], 'success', res['status'])
     
@@ -376,6 +479,14 @@ class APIRepo:
         res = self.http_post(url=self.TIMING_URL, data=kwargs)
         return InternalResponse(res['payload'], 'success', res['status'])
     
+    def create_timings(self, shot_uuid, timing_data_list):
+        res = self.http_post(url=self.TIMING_BULK_URL, data={'shot_id': shot_uuid, 'timing_list': timing_data_list})
+        return InternalResponse(res['payload'], 'success', res['status'])
+    
+    def reorder_timings(self, shot_uuid, timing_uuid_list):
+        res = self.http_put(url=self.TIMING_REORDER_URL, data={'shot_id': shot_uuid, 'timing_uuid_list': timing_uuid_list})
+        return InternalResponse(res['payload'], 'success', res['status'])
+    
     def update_specific_timing(self, uuid, **kwargs):
         kwargs['uuid'] = uuid
         res = self.http_put(url=self.TIMING_URL, data=kwargs)
@@ -484,12 +595,20 @@ class APIRepo:
         return InternalResponse(res['payload'], 'success', res['status'])
     
     # lock
-    def acquire_lock(self, key):
-        res = self.http_get(self.LOCK_URL, params={'key': key, 'action': 'acquire'})
+    # the lock operations change the lease, so they are sent as POSTs (which are neither deduped nor retried,
+    # a retried acquire which already succeeded on the server would report the lock as held by someone else)
+    def acquire_lock(self, key, owner=None, lease_duration=None):
+        data = {'key': key, 'action': 'acquire', 'owner': owner, 'lease_duration': lease_duration}
+        res = self.http_post(self.LOCK_URL, data=data)
+        return InternalResponse(res['payload'], 'success', res['status'])
+    
+    def renew_lock(self, key, owner, fence, lease_duration=None):
+        data = {'key': key, 'action': 'renew', 'owner': owner, 'fence': fence, 'lease_duration': lease_duration}
+        res = self.http_post(self.LOCK_URL, data=data)
         return InternalResponse(res['payload'], 'success', res['status'])
     
-    def release_lock(self, key):
-        res = self.http_get(self.LOCK_URL, params={'key': key, 'action': 'release'})
+    def release_lock(self, key, owner):
+        res = self.http_post(self.LOCK_URL, data={'key': key, 'action': 'release', 'owner': owner})
         return InternalResponse(res['payload'], 'success', res['status'])
     
     # shot
@@ -536,4 +655,8 @@ class APIRepo:
     # combined
     def get_explorer_pending_stats(self, project_uuid, log_status_list):
         res = self.http_get(self.EXPLORER_STATS_URL, params={'project_uuid': project_uuid, 'log_status_list': log_status_list})
-        return InternalResponse(res['payload'], 'success', res['status'])
\ No newline at end of file
+        return InternalResponse(res['payload'], 'success', res['status'])
+    
+    def get_project_change_event_list(self, project_uuid, after_seq=None):
+        res = self.http_get(self.PROJECT_CHANGE_EVENT_LIST_URL, params={'project_uuid': project_uuid, 'after_seq': after_seq})
+        return InternalResponse(res['payload'], 'success', res['status'])
@@ -6,7 +6,9 @@ from shared.constants import SERVER, ServerType
 from shared.logging.constants import LoggingType
 from shared.logging.logging import AppLogger
 from ui_components.models import InferenceLogObject, InternalAIModelObject, InternalAppSettingObject, InternalBackupObject, InternalFrameTimingObject, InternalProjectObject, InternalFileObject, InternalSettingObject, InternalShotObject, InternalUserObject
+from backend.constants import LOCK_LEASE_DURATION
 from utils.cache.cache_methods import cache_data
+from utils.media_processor.thumbnail import queue_thumbnails
 
 from utils.data_repo.api_repo import APIRepo
 
@@ -91,12 +93,28 @@ class DataRepo:
         file = res.data['data'] if res.status else None
         return InternalFileObject(**file) if file else None
     
-    def get_file_list_from_log_uuid_list(self, log_uuid_list):
-        res = self.db_repo.get_file_list_from_log_uuid_list(log_uuid_list)
+    # fields - optional projection of the output (e.g. ['uuid', 'local_path', 'inference_log.uuid'])
+    def get_file_list_from_log_uuid_list(self, log_uuid_list, fields=None):
+        res = self.db_repo.get_file_list_from_log_uuid_list(log_uuid_list, fields=fields)
         file_list = res.data['data'] if res.status else []
         return [InternalFileObject(**file) for file in file_list]
     
-    # kwargs -  file_type: InternalFileType, tag = None, shot_uuid = "", project_id = None, page=None, data_per_page=None, sort_order=None
+    # returns {source_file_uuid: {tag: file}} of the files derived from the source files (previews, posters..)
+    def get_derived_file_dict(self, source_file_uuid_list, tag_list=None):
+        if not len(source_file_uuid_list):
+            return {}
+        
+        res = self.db_repo.get_derived_file_list(source_file_uuid_list, tag_list)
+        file_list = res.data['data'] if res.status else []
+        derived_file_dict = {}
+        for file in file_list:
+            file = InternalFileObject(**file)
+            derived_file_dict.setdefault(file.source_file_uuid, {})[file.tag] = file
+
+        return derived_file_dict
+    
+    # kwargs -  file_type: InternalFileType, tag = None, shot_uuid = "", project_id = None, page=None, data_per_page=None, sort_order=None,
+    # cursor=None (next_cursor of the previous page), include_count=True, fields=None (projection of the output)
     def get_all_file_list(self, **kwargs):
         kwargs["type"] = kwargs['file_type']
         del kwargs['file_type']
@@ -130,9 +148,11 @@ class DataRepo:
         file = res.data['data'] if res.status else None
         file = InternalFileObject(**file) if file else None
 
-        if file and file.type == InternalFileType.IMAGE.value:
+        # derived files (previews, posters..) keep their own size
+        if file and file.type == InternalFileType.IMAGE.value and not file.source_file_uuid:
             from ui_components.methods.file_methods import normalize_size_internal_file_obj
             file = normalize_size_internal_file_obj(file, **kwargs)
+            queue_thumbnails(file.location)
         
         return file
     
@@ -143,9 +163,9 @@ class DataRepo:
     def get_image_list_from_uuid_list(self, image_uuid_list, file_type=InternalFileType.IMAGE.value):
         if not (image_uuid_list and len(image_uuid_list)):
             return []
+        # file_type None fetches the files of all the types
         image_list = self.db_repo.get_image_list_from_uuid_list(image_uuid_list, file_type=file_type).data['data']
         
-        print("--------------- ", image_list[0]['project']['uuid'])
         return [InternalFileObject(**image) for image in image_list] if image_list else []
     
     def update_file(self, file_uuid, **kwargs):
@@ -230,9 +250,8 @@ class DataRepo:
     def get_all_inference_log_list(self, **kwargs):
         res = self.db_repo.get_all_inference_log_list(**kwargs)
         log_list = res.data['data'] if res.status else None
-        total_page_count = res.data['total_pages'] if res.status else None
 
-        return ([InferenceLogObject(**log) for log in log_list] if log_list else None, total_page_count)
+        return ([InferenceLogObject(**log) for log in log_list] if log_list else None, res.data)
     
     
     def create_inference_log(self, **kwargs):
@@ -309,6 +328,17 @@ class DataRepo:
         timing = res.data['data'] if res.status else None
         return InternalFrameTimingObject(**timing) if timing else None
     
+    # creates multiple timings inside the shot at once
+    def create_timings(self, shot_uuid, timing_data_list):
+        res = self.db_repo.create_timings(shot_uuid, timing_data_list)
+        timing_list = res.data['data'] if res.status else None
+        return [InternalFrameTimingObject(**timing) for timing in timing_list] if timing_list else []
+    
+    # timing_uuid_list should have all the timings of the shot in the new order
+    def reorder_timings(self, shot_uuid, timing_uuid_list):
+        res = self.db_repo.reorder_timings(shot_uuid, timing_uuid_list)
+        return res.status
+    
     def update_specific_timing(self, uuid, **kwargs):
         res = self.db_repo.update_specific_timing(uuid, **kwargs)
         return res.status
@@ -424,11 +454,12 @@ class DataRepo:
         return link
     
     # lock
-    def acquire_lock(self, key):
-        retry_count = 0
+    # returns the lease dict if acquired (check DBRepo.acquire_lock)
+    def acquire_lock(self, key, owner, lease_duration=LOCK_LEASE_DURATION):
+        res, retry_count = None, 0
         while retry_count < 3:
             try:
-                res = self.db_repo.acquire_lock(key)
+                res = self.db_repo.acquire_lock(key, owner=owner, lease_duration=lease_duration)
                 retry_count = 10
             except Exception as e:
                 app_logger = AppLogger()
@@ -438,8 +469,12 @@ class DataRepo:
 
         return res.data['data'] if res and res.status else None
     
-    def release_lock(self, key):
-        res = self.db_repo.release_lock(key)
+    def renew_lock(self, key, owner, fence, lease_duration=LOCK_LEASE_DURATION):
+        res = self.db_repo.renew_lock(key, owner, fence, lease_duration=lease_duration)
+        return res.data['data'] if res.status else False
+    
+    def release_lock(self, key, owner):
+        res = self.db_repo.release_lock(key, owner=owner)
         return res.status
     
     # shot
@@ -486,4 +521,9 @@ class DataRepo:
         log_status_list = [InferenceStatus.IN_PROGRESS.value, InferenceStatus.QUEUED.value]
         res = self.db_repo.get_explorer_pending_stats(project_uuid, log_status_list)
         count_data = res.data['data'] if res.status else {"temp_image_count": 0, "pending_image_count": 0}
-        return count_data
\ No newline at end of file
+        return count_data
+    
+    # changes made by the other sessions/processes after the sequence number after_seq, check DBRepo.get_project_change_event_list
+    def get_project_change_event_list(self, project_uuid, after_seq=None):
+        res = self.db_repo.get_project_change_event_list(project_uuid, after_seq)
+        return res.data['data'] if res.status else None
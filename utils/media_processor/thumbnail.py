@@ -0,0 +1,167 @@
+import hashlib
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import requests
+from PIL import Image
+
+from shared.logging.constants import LoggingType
+from shared.logging.logging import app_logger
+from utils.enum import ExtendedEnum
+
+
+'''
+webp thumbnails of the images, shown in the grids instead of the full images. thumbnails are stored by the
+content hash of the image (images with the same content share them) and an index maps every image location
+to its content hash, so a lookup doesn't need to read the image
+'''
+THUMBNAIL_DIR = "videos/thumbnails"
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_REQUEST_TIMEOUT = 30
+
+# max width/height of the thumbnails
+class ThumbnailSize(ExtendedEnum):
+    SMALL = 128
+    MEDIUM = 256
+    LARGE = 512
+
+_lock = threading.Lock()
+_index_dict = {}        # {source_key: content_hash}
+_pending_set = set()    # locations queued in the pool
+_failed_set = set()     # locations whose thumbnails couldn't be created, not retried
+_pool = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+
+# local files are keyed by their path and stat (they can be overwritten in place), urls are never overwritten
+def _get_source_key(location):
+    if location.startswith('http'):
+        data = location
+    else:
+        stat = os.stat(location)
+        data = f"{os.path.abspath(location)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    return hashlib.sha256(data.encode()).hexdigest()
+
+def _get_thumbnail_path(content_hash, size):
+    return os.path.join(THUMBNAIL_DIR, content_hash[:2], f"{content_hash}_{size}.webp")
+
+def _get_index_path(source_key):
+    return os.path.join(THUMBNAIL_DIR, "index", source_key[:2], source_key)
+
+# files are written in a temp file first, so that the other processes never read a partial file
+def _write_file(path, write_fn):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    write_fn(temp_path)
+    os.replace(temp_path, path)
+
+def _lookup(source_key):
+    content_hash = _index_dict.get(source_key, None)
+    if content_hash is None:
+        index_path = _get_index_path(source_key)
+        if os.path.exists(index_path):
+            with open(index_path, "r") as f:
+                content_hash = f.read().strip()
+            with _lock:
+                _index_dict[source_key] = content_hash
+
+    return content_hash
+
+def create_thumbnails(location):
+    '''
+    creates the thumbnails (of every size) of the image, returns the content hash of the image
+    '''
+    source_key = _get_source_key(location)
+    content_hash = _lookup(source_key)
+    if content_hash:
+        return content_hash
+
+    if location.startswith('http'):
+        response = requests.get(location, timeout=THUMBNAIL_REQUEST_TIMEOUT)
+        response.raise_for_status()
+        content = response.content
+    else:
+        with open(location, "rb") as f:
+            content = f.read()
+
+    content_hash = hashlib.sha256(content).hexdigest()
+    image = None
+    for size in ThumbnailSize.value_list():
+        thumbnail_path = _get_thumbnail_path(content_hash, size)
+        if os.path.exists(thumbnail_path):
+            continue
+
+        if image is None:
+            image = Image.open(BytesIO(content))
+            image = image.convert("RGBA" if 'A' in image.getbands() or 'transparency' in image.info else "RGB")
+
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size))       # keeps the aspect ratio, never upscales
+        _write_file(thumbnail_path, lambda path: thumbnail.save(path, format="WEBP", quality=THUMBNAIL_QUALITY))
+
+    # the index is written last, an indexed image always has its thumbnails
+    def write_index(path):
+        with open(path, "w") as f:
+            f.write(content_hash)
+
+    _write_file(_get_index_path(source_key), write_index)
+    with _lock:
+        _index_dict[source_key] = content_hash
+
+    return content_hash
+
+def _run(location):
+    try:
+        create_thumbnails(location)
+    except Exception as e:
+        app_logger.log(LoggingType.ERROR, f"Error creating the thumbnails of {location}: {e}")
+        with _lock:
+            _failed_set.add(location)
+    finally:
+        with _lock:
+            _pending_set.discard(location)
+
+# creates the thumbnails in the background
+def queue_thumbnails(location):
+    if not location:
+        return
+
+    with _lock:
+        if location in _pending_set or location in _failed_set:
+            return
+        _pending_set.add(location)
+
+    _pool.submit(_run, location)
+
+def get_thumbnail(location, size=ThumbnailSize.MEDIUM.value):
+    '''
+    location of the thumbnail of the image, in the smallest size which is at least size. missing thumbnails of
+    local images are created right away, the ones of remote images are queued and the image itself is returned
+    meanwhile (also returned if the thumbnail can't be created)
+    '''
+    if not location:
+        return location
+
+    if location in _failed_set:
+        return location
+
+    size_list = sorted(ThumbnailSize.value_list())
+    size = next((s for s in size_list if s >= size), size_list[-1])
+    try:
+        content_hash = _lookup(_get_source_key(location))
+        if not content_hash:
+            if location.startswith('http'):
+                queue_thumbnails(location)
+                return location
+
+            content_hash = create_thumbnails(location)
+
+        thumbnail_path = _get_thumbnail_path(content_hash, size)
+        return thumbnail_path if os.path.exists(thumbnail_path) else location
+    except Exception as e:
+        app_logger.log(LoggingType.ERROR, f"Error fetching the thumbnail of {location}: {e}")
+        with _lock:
+            _failed_set.add(location)
+        return location
@@ -1,68 +1,199 @@
 import os
 import tempfile
-from moviepy.editor import VideoFileClip, vfx
+from fractions import Fraction
+import ffmpeg
+
+CONCAT_VIDEO_BITRATE = "5000k"
+CONCAT_AUDIO_BITRATE = "128k"
+CONCAT_AUDIO_SAMPLE_RATE = 44100
+PREVIEW_VIDEO_HEIGHT = 240          # max height of the previews/posters shown in the grids
+PREVIEW_VIDEO_CRF = 30
+SPEED_DURATION_TOLERANCE = 0.05        # secs, videos this close to the desired duration are not retimed
+
+# encoder settings of the rendered shot segments, every segment has the same format so that they can be stream copied
+RENDER_SEGMENT_FPS = 60
+RENDER_SEGMENT_SETTINGS = {
+    "vcodec": "libx264",
+    "video_bitrate": CONCAT_VIDEO_BITRATE,
+    "preset": "fast",
+    "pix_fmt": "yuv420p",
+    "acodec": "aac",
+    "audio_bitrate": CONCAT_AUDIO_BITRATE,
+    "ar": CONCAT_AUDIO_SAMPLE_RATE,
+    "ac": 2
+}
 
 class VideoProcessor:
     @staticmethod
-    def update_video_speed(video_location, desired_duration):
-        clip = VideoFileClip(video_location)
+    def get_video_info(video_location):
+        '''
+        codec, resolution, frame rate and audio params (None if there is no audio) of the video, read through ffprobe
+        '''
+        probe = ffmpeg.probe(video_location)
+        video_stream = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
+        audio_stream = next((s for s in probe['streams'] if s['codec_type'] == 'audio'), None)
+        if not video_stream:
+            raise ValueError(f"No video stream found in {video_location}")
+
+        return {
+            "codec": video_stream['codec_name'],
+            "width": int(video_stream['width']),
+            "height": int(video_stream['height']),
+            "fps": video_stream.get('r_frame_rate', ""),
+            "pix_fmt": video_stream.get('pix_fmt', ""),
+            "time_base": video_stream.get('time_base', ""),
+            "duration": float(probe['format'].get('duration', 0) or 0),
+            "audio": (audio_stream['codec_name'], audio_stream.get('sample_rate', ""), audio_stream.get('channels', 0)) \
+                if audio_stream else None
+        }
 
-        return VideoProcessor.update_clip_speed(clip, desired_duration)
-    
     @staticmethod
-    def update_video_bytes_speed(video_bytes, desired_duration):
-        # Use a context manager for the temporary file to ensure it's deleted when done
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4", mode='wb') as temp_file:
-            temp_file.write(video_bytes)
-            temp_file_path = temp_file.name  # Store the file name to delete later
-
-        # Process the video file
-        with VideoFileClip(temp_file_path) as clip:
-            result = VideoProcessor.update_clip_speed(clip, desired_duration)
-
-        # After processing and closing the clip, it's safe to delete the source temp file
-        os.remove(temp_file_path)
-
-        return result
+    def concat_videos(video_location_list, output_path):
+        '''
+        joins the videos into output_path. if all of them have the same codec, resolution, frame rate and audio
+        params they are stream copied through the concat demuxer (nothing is re-encoded), otherwise they are
+        re-encoded in a single pass. returns True if the videos were stream copied
+        '''
+        info_list = [VideoProcessor.get_video_info(video_location) for video_location in video_location_list]
+        key_list = ['codec', 'width', 'height', 'fps', 'pix_fmt', 'time_base', 'audio']
+        if len(set(tuple(info[key] for key in key_list) for info in info_list)) == 1:
+            VideoProcessor._concat_stream_copy(video_location_list, output_path)
+            return True
+        
+        VideoProcessor._concat_reencode(video_location_list, info_list, output_path)
+        return False
 
     @staticmethod
-    def update_clip_speed(clip: VideoFileClip, desired_duration):
-        # Use a context manager to ensure temporary file for output is deleted when done
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4", mode='wb') as temp_output_file:
-            temp_output_path = temp_output_file.name  # Store the file name for later use
-
-        # if animation_style == AnimationStyleType.DIRECT_MORPHING.value:
-        #     clip = clip.set_fps(120)
-
-        #     # Calculate the number of frames to keep
-        #     input_duration = clip.duration
-        #     total_frames = len(list(clip.iter_frames()))
-        #     target_frames = int(total_frames * (desired_duration / input_duration))
-
-        #     # Determine which frames to keep
-        #     keep_every_n_frames = total_frames / target_frames
-        #     frames_to_keep = [int(i * keep_every_n_frames)
-        #                     for i in range(target_frames)]
-
-        #     # Create a new video clip with the selected frames
-        #     output_clip = concatenate_videoclips(
-        #         [clip.subclip(i/clip.fps, (i+1)/clip.fps) for i in frames_to_keep])
-
-        #     output_clip.write_videofile(filename=temp_output_file.name, codec="libx265")
-
-
-        # Apply desired video speed change and write to the temporary output file
-        input_video_duration = clip.duration
-        desired_speed_change = float(input_video_duration) / float(desired_duration)
-        print("Desired Speed Change: " + str(desired_speed_change))
-        output_clip = clip.fx(vfx.speedx, desired_speed_change)
-        output_clip.write_videofile(filename=temp_output_path, codec="libx264", preset="fast")
+    def render_segment(video_location, duration, output_path, width, height, audio_location=None, audio_start=0):
+        '''
+        renders the video stretched to duration (secs) and fit in width x height, along with the audio starting at
+        audio_start (secs) in audio_location. the part not covered by the audio is silent
+        '''
+        info = VideoProcessor.get_video_info(video_location)
+        speed_factor = duration / info['duration'] if info['duration'] else 1
+        width, height = width // 2 * 2, height // 2 * 2
+        video_stream = ffmpeg.input(video_location).video\
+            .filter('setpts', f"{speed_factor}*PTS")\
+            .filter('scale', width, height, force_original_aspect_ratio='decrease')\
+            .filter('pad', width, height, '(ow-iw)/2', '(oh-ih)/2')\
+            .filter('setsar', 1)\
+            .filter('fps', fps=RENDER_SEGMENT_FPS)
+
+        if audio_location:
+            audio_stream = ffmpeg.input(audio_location, ss=audio_start, t=duration).audio.filter('apad')
+        else:
+            audio_stream = ffmpeg.input(f"anullsrc=r={CONCAT_AUDIO_SAMPLE_RATE}:cl=stereo", f='lavfi', t=duration).audio
+
+        ffmpeg.output(video_stream, audio_stream, output_path, t=duration, movflags='+faststart', **RENDER_SEGMENT_SETTINGS)\
+            .overwrite_output()\
+            .run(quiet=True)
+
+    # small h264 copy of the video (without the audio) to be shown in the grids
+    @staticmethod
+    def create_preview(video_location, output_location, height=PREVIEW_VIDEO_HEIGHT):
+        ffmpeg.input(video_location).video\
+            .filter('scale', -2, f"min({height},ih)")\
+            .output(output_location, vcodec='libx264', crf=PREVIEW_VIDEO_CRF, preset='veryfast', pix_fmt='yuv420p', \
+                    movflags='+faststart')\
+            .overwrite_output()\
+            .run(quiet=True)
+
+    # first frame of the video
+    @staticmethod
+    def create_poster(video_location, output_location, height=PREVIEW_VIDEO_HEIGHT):
+        ffmpeg.input(video_location).video\
+            .filter('scale', -2, f"min({height},ih)")\
+            .output(output_location, vframes=1)\
+            .overwrite_output()\
+            .run(quiet=True)
 
-        # Read the processed video bytes from the temporary output file
-        with open(temp_output_path, 'rb') as f:
-            video_bytes = f.read()
+    @staticmethod
+    def _concat_stream_copy(video_location_list, output_path):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".txt", mode='w') as list_file:
+            for video_location in video_location_list:
+                # single quotes are escaped as '\'' in the concat list
+                list_file.write("file '" + os.path.abspath(video_location).replace("'", "'\\''") + "'\n")
+
+        try:
+            ffmpeg.input(list_file.name, format='concat', safe=0)\
+                .output(output_path, c='copy', movflags='+faststart')\
+                .overwrite_output()\
+                .run(quiet=True)
+        finally:
+            os.remove(list_file.name)
 
-        # Now it's safe to delete the output temp file since its content is already read
-        os.remove(temp_output_path)
+    @staticmethod
+    def _concat_reencode(video_location_list, info_list, output_path):
+        # videos are fit in the resolution of the first one, at the highest frame rate among them
+        width, height = info_list[0]['width'] // 2 * 2, info_list[0]['height'] // 2 * 2
+        fps = max([Fraction(info['fps']) for info in info_list if info['fps'] and not info['fps'].endswith('/0')] or [Fraction(30)])
+        has_audio = any(info['audio'] for info in info_list)
+
+        stream_list = []
+        for video_location, info in zip(video_location_list, info_list):
+            input_stream = ffmpeg.input(video_location)
+            stream_list.append(
+                input_stream.video
+                    .filter('scale', width, height, force_original_aspect_ratio='decrease')
+                    .filter('pad', width, height, '(ow-iw)/2', '(oh-ih)/2')
+                    .filter('setsar', 1)
+                    .filter('fps', fps=float(fps))
+                    .filter('format', 'yuv420p')
+            )
+
+            if has_audio:
+                # silence for the videos without audio, so that the segments stay aligned
+                audio_stream = input_stream.audio if info['audio'] else \
+                    ffmpeg.input(f"anullsrc=r={CONCAT_AUDIO_SAMPLE_RATE}:cl=stereo", f='lavfi', t=info['duration']).audio
+                stream_list.append(audio_stream.filter('aformat', sample_rates=CONCAT_AUDIO_SAMPLE_RATE, channel_layouts='stereo'))
+
+        joined = ffmpeg.concat(*stream_list, v=1, a=1 if has_audio else 0).node
+        output_stream_list = [joined[0], joined[1]] if has_audio else [joined[0]]
+        audio_params = {"acodec": "aac", "audio_bitrate": CONCAT_AUDIO_BITRATE} if has_audio else {}
+        ffmpeg.output(*output_stream_list, output_path, vcodec='libx264', video_bitrate=CONCAT_VIDEO_BITRATE, \
+                      preset='fast', movflags='+faststart', **audio_params)\
+            .overwrite_output()\
+            .run(quiet=True)
+
+    # atempo only takes factors in [0.5, 2], larger changes are chained
+    @staticmethod
+    def _get_atempo_factor_list(speed):
+        factor_list = []
+        while speed > 2:
+            factor_list.append(2.0)
+            speed /= 2
+        while speed < 0.5:
+            factor_list.append(0.5)
+            speed /= 0.5
+        
+        factor_list.append(speed)
+        return factor_list
 
-        return video_bytes
+    @staticmethod
+    def update_video_speed(video_location, desired_duration, output_location):
+        '''
+        writes the video retimed to desired_duration (secs) in output_location. ffmpeg streams it from file to file
+        (setpts/atempo). returns False (nothing is written) if the duration already matches within the tolerance
+        '''
+        info = VideoProcessor.get_video_info(video_location)
+        if not info['duration'] or abs(info['duration'] - desired_duration) <= SPEED_DURATION_TOLERANCE:
+            return False
+
+        speed = info['duration'] / float(desired_duration)
+        input_stream = ffmpeg.input(video_location)
+        stream_list = [input_stream.video.filter('setpts', f"{1 / speed}*PTS")]
+        # keeping the frame rate of the source (frames are dropped/duplicated)
+        output_params = {"r": info['fps']} if info['fps'] and not info['fps'].endswith('/0') else {}
+        if info['audio']:
+            audio_stream = input_stream.audio
+            for factor in VideoProcessor._get_atempo_factor_list(speed):
+                audio_stream = audio_stream.filter('atempo', factor)
+            stream_list.append(audio_stream)
+            output_params["acodec"] = "aac"
+
+        ffmpeg.output(*stream_list, output_location, vcodec='libx264', preset='fast', pix_fmt='yuv420p', \
+                      movflags='+faststart', **output_params)\
+            .overwrite_output()\
+            .run(quiet=True)
+        
+        return True
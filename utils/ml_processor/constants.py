@@ -15,6 +15,12 @@ class ComfyWorkflow(ExtendedEnum):
     STEERABLE_MOTION = "steerable_motion"
     SDXL_IMG2IMG = "sdxl_img2img"
 
+# local gpu jobs are picked in the order of their priority (higher first), long running video workflows
+# are ranked lower so that they don't hold up quick image generations
+GPU_WORKFLOW_PRIORITY = {
+    ComfyWorkflow.STEERABLE_MOTION.value: -1,
+}
+
 @dataclass
 class MLModel:
     # properties for replicate (result of ad-hoc coding new features :<)
@@ -9,7 +9,7 @@ from utils.common_utils import padded_integer
 from utils.constants import MLQueryObject
 from utils.data_repo.data_repo import DataRepo
 from utils.ml_processor.comfy_data_transform import get_file_list_from_query_obj, get_model_workflow_from_query
-from utils.ml_processor.constants import ML_MODEL, ComfyWorkflow, MLModel
+from utils.ml_processor.constants import GPU_WORKFLOW_PRIORITY, ML_MODEL, ComfyWorkflow, MLModel
 from utils.ml_processor.gpu.utils import predict_gpu_output, setup_comfy_runner
 from utils.ml_processor.ml_interface import MachineLearningProcessor
 import time
@@ -88,7 +88,8 @@ class GPUProcessor(MachineLearningProcessor):
             "file_path_list": file_path_list,
             "output_node_ids": output_node_ids,
             "extra_model_list": extra_model_list,
-            "ignore_model_list": ignore_list
+            "ignore_model_list": ignore_list,
+            "priority": GPU_WORKFLOW_PRIORITY.get(model.display_name(), 0)
         }
 
         params = {
@@ -0,0 +1,70 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from shared.logging.constants import LoggingType
+from shared.logging.logging import app_logger
+
+
+class GPUJobQueue:
+    '''
+    runs the queued local gpu (comfy) inferences in background threads. the queue itself is the inference log
+    table (queued/in_progress logs) so the pending jobs survive runner restarts. the head (oldest job) of every
+    project is picked in the order of its priority and creation time and only one job of a project runs
+    at a time, so the jobs of a project are always completed in the order they were created
+    '''
+    def __init__(self, max_in_flight, run_job, cancel_job):
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._max_in_flight = max_in_flight
+        self._run_job = run_job             # run_job(log, data), completes/fails the log
+        self._cancel_job = cancel_job       # cancel_job(log_id, is_only_running_job), stops a running job
+        self._lock = threading.Lock()
+        self._running_dict = {}             # {log_id: project_id}
+        self._done_set = set()              # log_ids completed by this process (still pending until the output is processed)
+        self._canceled_set = set()          # log_ids of the running jobs which have already been stopped
+
+    # job_list: [(log, data)] of all the pending gpu logs, called on every cycle of the runner
+    def sync(self, job_list):
+        pending_id_list = set(log.id for log, _ in job_list)
+        canceled_list, start_list = [], []
+        with self._lock:
+            self._done_set &= pending_id_list
+
+            # running jobs which are no longer pending (canceled/failed from the app)
+            for log_id in self._running_dict:
+                if log_id not in pending_id_list and log_id not in self._canceled_set:
+                    self._canceled_set.add(log_id)
+                    canceled_list.append((log_id, len(self._running_dict) == 1))
+
+            busy_project_list = set(self._running_dict.values())
+            head_dict = {}      # {project_id: (log, data)}
+            for log, data in sorted(job_list, key=lambda job: (job[0].created_on, job[0].id)):
+                if log.id in self._done_set or log.id in self._running_dict:
+                    continue
+                if log.project_id not in busy_project_list and log.project_id not in head_dict:
+                    head_dict[log.project_id] = (log, data)
+
+            head_list = sorted(head_dict.values(), key=lambda job: (-job[1].get('priority', 0), job[0].created_on, job[0].id))
+            for log, data in head_list[:max(self._max_in_flight - len(self._running_dict), 0)]:
+                self._running_dict[log.id] = log.project_id
+                start_list.append((log, data))
+
+        for log_id, is_only_running_job in canceled_list:
+            app_logger.log(LoggingType.DEBUG, f"stopping gpu job of log {log_id}")
+            self._cancel_job(log_id, is_only_running_job)
+
+        for log, data in start_list:
+            self._executor.submit(self._run, log, data)
+
+    def _run(self, log, data):
+        try:
+            self._run_job(log, data)
+        except Exception as e:
+            app_logger.log(LoggingType.ERROR, f"Error in gpu job of log {log.id}: {e}")
+        finally:
+            with self._lock:
+                del self._running_dict[log.id]
+                self._canceled_set.discard(log.id)
+                self._done_set.add(log.id)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
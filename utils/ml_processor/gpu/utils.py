@@ -3,7 +3,9 @@ import os
 import sys
 import subprocess
 import time
+import requests
 from git import Repo
+from shared.constants import COMFY_PORT
 from shared.logging.constants import LoggingType
 from shared.logging.logging import app_logger
 
@@ -34,6 +36,13 @@ def predict_gpu_output(workflow: str, file_path_list=[], output_node=None, extra
 
     return output['file_paths']   # ignoring text output for now {"file_paths": [], "text_content": []}
 
+# stops the prompt currently being executed by the comfy server
+def interrupt_gpu_prediction():
+    try:
+        requests.post(f"http://127.0.0.1:{COMFY_PORT}/interrupt", timeout=5)
+    except requests.exceptions.RequestException as e:
+        app_logger.log(LoggingType.DEBUG, f"unable to interrupt the comfy server: {e}")
+
 def is_comfy_runner_present():
     return os.path.exists(COMFY_RUNNER_PATH)     # hackish sol, will fix later
 
@@ -0,0 +1,59 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from shared.logging.constants import LoggingType
+from shared.logging.logging import app_logger
+
+
+class ProjectJobPool:
+    '''
+    bounded thread pool in which the jobs of a single project run one at a time, in the order they
+    were submitted (e.g. variant promotions of a timing are applied in order), while jobs of different
+    projects run in parallel. every job has a key and a key can only be queued/running once
+    '''
+    def __init__(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._queue_dict = {}       # {project_id: deque([(key, fn)])} waiting jobs of the projects with a running job
+        self._key_set = set()       # keys of the queued/running jobs
+
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._key_set
+
+    # returns False if a job with the same key is already queued/running
+    def submit(self, key, project_id, fn) -> bool:
+        with self._lock:
+            if key in self._key_set:
+                return False
+
+            self._key_set.add(key)
+            if project_id in self._queue_dict:
+                self._queue_dict[project_id].append((key, fn))
+                return True
+
+            self._queue_dict[project_id] = deque()
+
+        self._executor.submit(self._run, project_id, key, fn)
+        return True
+
+    def _run(self, project_id, key, fn):
+        try:
+            fn()
+        except Exception as e:
+            app_logger.log(LoggingType.ERROR, f"Error in job {key}: {e}")
+
+        with self._lock:
+            self._key_set.discard(key)
+            project_queue = self._queue_dict[project_id]
+            if not len(project_queue):
+                del self._queue_dict[project_id]
+                return
+
+            next_key, next_fn = project_queue.popleft()
+
+        self._executor.submit(self._run, project_id, next_key, next_fn)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
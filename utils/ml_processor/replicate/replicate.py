@@ -2,7 +2,7 @@ import asyncio
 import io
 import time
 import uuid
-from shared.constants import InferenceParamType
+from shared.constants import REPLICATE_WEBHOOK_ENABLED, REPLICATE_WEBHOOK_URL, InferenceParamType
 from shared.file_upload.s3 import upload_file
 from shared.logging.constants import LoggingType
 from shared.logging.logging import AppLogger
@@ -128,6 +128,11 @@ class ReplicateProcessor(MachineLearningProcessor):
             "input": dict(kwargs)
         }
 
+        # the runner is notified on completion, instead of discovering it through polling
+        if REPLICATE_WEBHOOK_ENABLED:
+            data["webhook"] = REPLICATE_WEBHOOK_URL
+            data["webhook_events_filter"] = ["completed"]
+
         # converting io buffers to base64 format
         for k, v in data['input'].items():
             if not isinstance(v, (int, str, list, dict, float, tuple)):
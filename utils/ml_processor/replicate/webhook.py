@@ -0,0 +1,94 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from shared.constants import REPLICATE_WEBHOOK_HOST, REPLICATE_WEBHOOK_SECRET
+from shared.logging.constants import LoggingType
+from shared.logging.logging import app_logger
+
+
+WEBHOOK_TIMESTAMP_TOLERANCE = 5 * 60    # callbacks older than this are rejected (replay protection)
+MAX_WEBHOOK_BODY_SIZE = 10 * 1024 * 1024
+
+
+# replicate signs webhooks as base64(hmac_sha256(secret, "<webhook-id>.<webhook-timestamp>.<body>"))
+# and sends them as space separated "v1,<signature>" values in the webhook-signature header
+def verify_webhook(headers, body):
+    webhook_id = headers.get('webhook-id', None)
+    timestamp = headers.get('webhook-timestamp', None)
+    signature_header = headers.get('webhook-signature', None)
+    if not (REPLICATE_WEBHOOK_SECRET and webhook_id and timestamp and signature_header):
+        return False
+
+    try:
+        if abs(time.time() - int(timestamp)) > WEBHOOK_TIMESTAMP_TOLERANCE:
+            return False
+
+        secret = base64.b64decode(REPLICATE_WEBHOOK_SECRET.split('_', 1)[-1])
+    except ValueError:
+        return False
+
+    signed_content = f"{webhook_id}.{timestamp}.".encode() + body
+    expected_signature = base64.b64encode(hmac.new(secret, signed_content, hashlib.sha256).digest()).decode()
+    for signature in signature_header.split(' '):
+        if hmac.compare_digest(expected_signature, signature.split(',', 1)[-1]):
+            return True
+
+    return False
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    on_result = None        # callback receiving the prediction dict of every verified callback
+
+    def _reply(self, status):
+        self.send_response(status)
+        self.end_headers()
+
+    def do_POST(self):
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            content_length = 0
+
+        if content_length <= 0:
+            self._reply(400)
+            return
+
+        # the body is not read, the connection is closed after the response (HTTP/1.0)
+        if content_length > MAX_WEBHOOK_BODY_SIZE:
+            self._reply(413)
+            return
+
+        body = self.rfile.read(content_length)
+        if not verify_webhook(self.headers, body):
+            app_logger.log(LoggingType.DEBUG, "invalid webhook signature")
+            self._reply(401)
+            return
+
+        try:
+            result = json.loads(body)
+            self.on_result(result)
+        except Exception as e:
+            app_logger.log(LoggingType.ERROR, f"Error in processing webhook: {e}")
+            self._reply(400)
+            return
+
+        self._reply(200)
+
+    # suppressing the default per request stderr logs
+    def log_message(self, format, *args):
+        pass
+
+
+# starts the webhook receiver in a daemon thread, on_result is called from the server's threads
+def start_webhook_server(port, on_result, host=REPLICATE_WEBHOOK_HOST):
+    handler = type('ReplicateWebhookHandler', (WebhookHandler, ), {'on_result': staticmethod(on_result)})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    app_logger.log(LoggingType.INFO, f"webhook receiver listening on {host}:{port}")
+    return server